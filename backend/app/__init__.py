@@ -9,25 +9,71 @@ from flask_bcrypt import Bcrypt
 from flask_cors import CORS
 from flask_migrate import Migrate
 from app.config import Config
+from app.replicas import READ_PRIMARY_HEADER, RoutingSession, replica_binds
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
 migrate = Migrate()
 
+# Opciones que solo aceptan los pools con tamaño (QueuePool); SQLite usa otros pools
+SIZED_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
 def create_app(config_class=Config):
     app = Flask(__name__, static_folder='static')
     app.config.from_object(config_class)
     
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            key: value for key, value in app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}).items()
+            if key not in SIZED_POOL_OPTIONS
+        }
+    
+    # Réplicas de lectura y shards como binds adicionales (ver app/replicas.py y app/shards.py)
+    from app.shards import shard_binds
+    app.config['SQLALCHEMY_BINDS'] = {
+        **app.config.get('SQLALCHEMY_BINDS', {}),
+        **replica_binds(app.config['DB_REPLICA_URIS']),
+        **shard_binds(app.config['DB_SHARD_URIS']),
+    }
+    
     db.init_app(app)
     bcrypt.init_app(app)
     migrate.init_app(app, db)
     
+    from app.auth import init_auth
+    from app.cache import init_cache
+    from app.compression import init_compression
+    from app.hashing import init_hashing
+    from app.json_provider import init_json
+    from app.profiling import init_profiling
+    from app.ratelimit import init_rate_limit
+    from app.replicas import init_replicas
+    from app.reports import init_reports
+    from app.archive import init_archive
+    from app.recurring import init_recurring
+    from app.shards import init_shards
+    init_json(app)
+    init_auth(app)
+    init_cache(app)
+    init_hashing(app)
+    init_compression(app)
+    init_profiling(app)
+    init_rate_limit(app)
+    init_reports(app)
+    init_replicas(app, db)
+    init_shards(app)
+    init_archive(app)
+    init_recurring(app)
+    
     # --- MODIFICACIÓN CLAVE AQUÍ ---
     # Cambiamos la lista de "localhost" por "*"
     # Esto permite que tu Frontend en Render (y cualquier otro) pueda conectarse sin errores.
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    CORS(app, resources={r"/api/*": {"origins": "*"}}, expose_headers=[READ_PRIMARY_HEADER])
     
     from app.routes import main
     app.register_blueprint(main)
     
+    from app.commands import register_commands
+    register_commands(app)
+    
     return app
@@ -0,0 +1,253 @@
+# Archivo: app/archive.py
+"""Archivo de transacciones antiguas (almacenamiento frío).
+
+Las transacciones con fecha anterior al horizonte (ARCHIVE_AFTER_MONTHS
+meses antes del mes en curso) se mueven por bloques a
+`transactions_archive`. La tabla caliente queda con los datos recientes y
+sus índices más pequeños. Los totales mensuales no cambian: `monthly_rollups`
+ya los contiene y el resumen del dashboard no mira ninguna de las dos tablas.
+
+Las lecturas solo consultan el archivo cuando hace falta. Un usuario sin
+filas archivadas, o un rango de fechas que empieza después de su última
+fecha archivada (`users.archived_until`, que se actualiza al archivar), se
+resuelve solo con `transactions`. Si no, se consultan
+ambas tablas con el mismo filtro y orden y se mezclan por la clave de orden.
+En los listados paginados cada tabla aporta como mucho `limit + 1` filas.
+
+Las transacciones archivadas son de solo lectura.
+
+El archivado se lanza con `flask archive-transactions` o lo ejecuta un hilo
+en cada worker cada ARCHIVE_CHECK_MINUTES minutos (app/scheduling.py). En
+MySQL un bloqueo con nombre (GET_LOCK) impide que dos procesos archiven a la
+vez.
+"""
+import atexit
+import heapq
+from datetime import date, datetime
+from itertools import islice
+from flask import current_app, g
+from app import db
+from app.models import User, Transaction, ArchivedTransaction
+from app.queries import (
+    apply_transaction_filters, transaction_list_query, apply_cursor, keyset_condition, cursor_value
+)
+from app.rollups import month_key, month_start, shift_month
+from app.scheduling import named_lock, PeriodicTask
+from app.shards import each_shard, moving_users
+
+# Columnas que se copian tal cual de `transactions` al archivo
+ARCHIVED_COLUMNS = (
+    'id', 'user_id', 'category_id', 'amount', 'type', 'description',
+    'transaction_date', 'created_at', 'change_version', 'updated_at', 'recurring_rule_id',
+)
+ARCHIVE_LOCK_NAME = 'gestomoney_archive'
+
+
+# --- ARCHIVADO ---
+
+def archive_cutoff(months, today=None):
+    """Primer día del mes `months` meses antes del actual: lo anterior se archiva."""
+    return month_start(shift_month(month_key(today or date.today()), -months))
+
+
+def has_archivable(cutoff):
+    """True si queda alguna transacción anterior a `cutoff` en la tabla caliente."""
+    return db.session.query(
+        db.session.query(Transaction.id).filter(Transaction.transaction_date < cutoff).exists()
+    ).scalar()
+
+
+def archive_transactions(cutoff, chunk_size, user_id=None, include_moving=False):
+    """Mueve al archivo las transacciones anteriores a `cutoff`.
+
+    Cada bloque es un INSERT ... SELECT, un DELETE por id y el UPDATE de
+    `users.archived_until` de sus dueños, confirmados juntos; los rollups y
+    las versiones de datos no cambian porque el contenido lógico es el
+    mismo. Los usuarios que se están cambiando de shard se dejan para la
+    siguiente pasada: su copia lee la tabla caliente y después el archivo, y
+    una fila archivada entre ambas lecturas se copiaría dos veces.
+    `move_user` archiva en el destino con `include_moving`. Devuelve el
+    número de filas movidas.
+    """
+    hot = Transaction.__table__
+    cold = ArchivedTransaction.__table__
+    moved = 0
+    moving = [] if include_moving else moving_users()
+    # La fila con el id más alto se queda siempre en la tabla caliente: SQLite
+    # y MySQL < 8.0 recalculan el autoincremento desde MAX(id) y, sin ella,
+    # una transacción nueva podría reutilizar el id de una archivada.
+    newest = db.session.execute(db.select(db.func.max(hot.c.id))).scalar()
+    if newest is None:
+        return moved
+
+    while True:
+        select_ids = db.select(hot.c.id).where(hot.c.transaction_date < cutoff, hot.c.id < newest)
+        if user_id is not None:
+            select_ids = select_ids.where(hot.c.user_id == user_id)
+        if moving:
+            select_ids = select_ids.where(hot.c.user_id.notin_(moving))
+        ids = db.session.execute(select_ids.order_by(hot.c.id).limit(chunk_size)).scalars().all()
+        if not ids:
+            return moved
+
+        try:
+            db.session.execute(cold.insert().from_select(
+                [*ARCHIVED_COLUMNS, 'archived_at'],
+                db.select(*(hot.c[name] for name in ARCHIVED_COLUMNS), db.literal(datetime.utcnow()))
+                .where(hot.c.id.in_(ids))
+            ))
+            db.session.execute(hot.delete().where(hot.c.id.in_(ids)))
+            _update_archived_until(ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        moved += len(ids)
+
+
+def _update_archived_until(ids):
+    # Recalcula `users.archived_until` de los dueños de las filas recién archivadas
+    users = User.__table__
+    cold = ArchivedTransaction.__table__
+    db.session.execute(
+        users.update()
+        .where(users.c.id.in_(db.select(cold.c.user_id).where(cold.c.id.in_(ids)).distinct()))
+        .values(archived_until=db.select(db.func.max(cold.c.transaction_date))
+                .where(cold.c.user_id == users.c.id).scalar_subquery())
+    )
+
+
+def archive_lock():
+    """Bloqueo entre procesos para el archivado; cede False si otro lo tiene."""
+    return named_lock(ARCHIVE_LOCK_NAME)
+
+
+def run_scheduled_archive():
+    """Archiva en cada shard si hay filas pendientes y nadie más lo está haciendo.
+
+    Requiere contexto de app.
+    """
+    config = current_app.config
+    cutoff = archive_cutoff(config['ARCHIVE_AFTER_MONTHS'])
+    moved = 0
+    with archive_lock() as acquired:
+        if not acquired:
+            return 0
+        for _ in each_shard():
+            if has_archivable(cutoff):
+                moved += archive_transactions(cutoff, config['ARCHIVE_CHUNK_SIZE'])
+    if moved:
+        current_app.logger.info("Archivado: %s transacciones anteriores a %s", moved, cutoff)
+    return moved
+
+
+archive_scheduler = PeriodicTask(run_scheduled_archive, 'archive-scheduler', "Error en el archivado programado")
+atexit.register(archive_scheduler.stop)
+
+
+def init_archive(app):
+    """Arranca el archivado periódico si ARCHIVE_CHECK_MINUTES > 0."""
+    minutes = app.config['ARCHIVE_CHECK_MINUTES']
+    if minutes > 0 and not app.config.get('TESTING'):
+        archive_scheduler.start(app, minutes * 60)
+    else:
+        archive_scheduler.stop()
+
+
+# --- LECTURAS SOBRE CALIENTE + FRÍO ---
+
+def archived_until(user_id):
+    """Fecha de la transacción archivada más reciente del usuario (None si no tiene).
+
+    Sale de `users.archived_until`, que mantiene `archive_transactions`; si
+    la petición ya leyó la fila del usuario (`conditional_get`) no consulta
+    nada.
+    """
+    known = g.get('archived_until')
+    if known is not None and known[0] == user_id:
+        return known[1]
+    return db.session.query(User.archived_until).filter(User.id == user_id).scalar()
+
+
+def needs_archive(user_id, filters):
+    """True si el rango de `filters` puede incluir transacciones archivadas."""
+    until = archived_until(user_id)
+    return until is not None and filters.get('start_date', date.min) <= until
+
+
+def transaction_sources(user_id, filters, sort_key, descending):
+    """Consultas (consulta, entidad) del listado: la caliente y, si hace falta, la del archivo."""
+    sources = [(transaction_list_query(user_id, filters, sort_key, descending), Transaction)]
+    if needs_archive(user_id, filters):
+        sources.append((
+            transaction_list_query(user_id, filters, sort_key, descending, entity=ArchivedTransaction),
+            ArchivedTransaction,
+        ))
+    return sources
+
+
+def merge_key(sort_key):
+    """Clave Python equivalente al ORDER BY (clave, id) de la base de datos.
+
+    El texto se ordena en binario en todos los motores (`binary_text` en
+    app/queries.py), que es también como compara `str`.
+    """
+    def key(row):
+        transaction, category_name = row
+        return cursor_value(transaction, category_name, sort_key), transaction.id
+    return key
+
+
+def fetch_transactions(sources, sort_key, descending, limit=None, cursor=None):
+    """Filas (transacción, nombre de categoría) ordenadas, desde `cursor` y hasta `limit`."""
+    pages = []
+    for query, entity in sources:
+        if cursor:
+            query = apply_cursor(query, cursor, sort_key, descending, entity)
+        pages.append(query.limit(limit).all() if limit is not None else query.all())
+    if len(pages) == 1:
+        return pages[0]
+    rows = heapq.merge(*pages, key=merge_key(sort_key), reverse=descending)
+    return list(islice(rows, limit)) if limit is not None else list(rows)
+
+
+def _keyset_rows(query, entity, sort_key, descending, batch_size):
+    # Páginas completas por keyset: no deja cursores abiertos en la conexión
+    # y la memoria no depende del driver (mysqlconnector no tiene cursores de
+    # servidor y con `yield_per` cargaría todo el resultado)
+    page = query
+    while True:
+        rows = page.limit(batch_size).all()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last, category_name = rows[-1]
+        page = query.filter(keyset_condition(
+            sort_key, descending, cursor_value(last, category_name, sort_key), last.id, entity
+        ))
+
+
+def iter_transactions(sources, sort_key, descending, batch_size):
+    """Iterador ordenado de todas las filas, leído por páginas keyset de `batch_size`."""
+    if len(sources) == 1:
+        query, entity = sources[0]
+        return _keyset_rows(query, entity, sort_key, descending, batch_size)
+    return heapq.merge(
+        *(_keyset_rows(query, entity, sort_key, descending, batch_size) for query, entity in sources),
+        key=merge_key(sort_key), reverse=descending
+    )
+
+
+def count_transactions(user_id, filters, include_archive):
+    """Número de transacciones que cumplen `filters` (sumando el archivo si se indica)."""
+    entities = (Transaction, ArchivedTransaction) if include_archive else (Transaction,)
+    return sum(
+        apply_transaction_filters(db.session.query(db.func.count(entity.id)), user_id, filters, entity=entity).scalar()
+        for entity in entities
+    )
+
+
+def is_archived(user_id, transaction_id):
+    return db.session.query(ArchivedTransaction.id).filter(
+        ArchivedTransaction.id == transaction_id, ArchivedTransaction.user_id == user_id
+    ).first() is not None
@@ -0,0 +1,324 @@
+# Archivo: app/asgi.py
+"""Variante ASGI de solo lectura para alta concurrencia.
+
+Sirve los endpoints de lectura (`/api/categories`, `/api/data/summary` y
+`/api/transactions`) con Starlette y sesiones asíncronas de SQLAlchemy, de
+modo que una conexión lenta no retiene un hilo mientras espera a MySQL o al
+cliente. Comparte con la app Flask los modelos, la configuración, las
+consultas (app/queries.py, app/rollups.py, app/categories.py), la caché y
+el formato de ETag, así que ambas pueden servir el mismo tráfico detrás de
+un balanceador. Las escrituras siguen en la app WSGI.
+
+Los listados que alcanzan transacciones archivadas (app/archive.py) se
+resuelven con la sesión síncrona en el pool de hilos y sin streaming. Con
+shards (app/shards.py) hay un engine asíncrono por shard y cada petición
+usa el del usuario.
+
+Dependencias opcionales: pip install starlette uvicorn aiomysql
+(aiosqlite para SQLite). Arranque:
+    uvicorn asgi:app --workers 4
+"""
+import math
+from contextlib import asynccontextmanager
+from datetime import datetime
+from flask import Flask
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+import jwt
+from app import create_app, db
+from app.auth import Principal, decode_access_token
+from app.cache import LocalCache, response_cache, summary_key, categories_key
+from app.categories import categories_statement, serialize_categories
+from app.config import Config
+from app.archive import transaction_sources, fetch_transactions, count_transactions
+from app.models import User, UserShard, Transaction
+from app.ratelimit import rate_limiter, LocalBuckets
+from app.queries import (
+    FilterError, MAX_PAGE_SIZE, parse_transaction_filters, parse_sort, transaction_list_statement,
+    apply_transaction_filters, apply_cursor, encode_cursor, cursor_value
+)
+from app.rollups import month_key, shift_month, monthly_overview_statement, summarize_overview
+from app.shards import shard_binds, shard_router, shard_context
+from app.routes import serialize_transaction, summary_payload, STREAM_BATCH_SIZE
+from app.versioning import build_etag, CACHE_CONTROL
+
+# Driver asíncrono por dialecto cuando ASYNC_DATABASE_URI no está definida
+ASYNC_DRIVERS = {'mysql': 'aiomysql', 'sqlite': 'aiosqlite', 'postgresql': 'asyncpg'}
+
+
+def async_database_uri(config, uri=None):
+    """URL del engine asíncrono: ASYNC_DATABASE_URI o la síncrona (o `uri`) con el driver async."""
+    if uri is None and config.get('ASYNC_DATABASE_URI'):
+        return config['ASYNC_DATABASE_URI']
+    url = make_url(uri or config['SQLALCHEMY_DATABASE_URI'])
+    driver = config.get('ASYNC_DB_DRIVER') or ASYNC_DRIVERS[url.get_backend_name()]
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+class ReadAPI:
+    """Handlers asíncronos; `flask_app` aporta configuración y proveedor JSON."""
+
+    def __init__(self, flask_app: Flask):
+        self.flask_app = flask_app
+        self.config = flask_app.config
+        self.json = flask_app.json
+        options = dict(self.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        self.engine = create_async_engine(async_database_uri(self.config), **options)
+        self.dialect = self.engine.dialect.name
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.shard_engines = {
+            key: create_async_engine(async_database_uri(self.config, uri), **options)
+            for key, uri in shard_binds(self.config['DB_SHARD_URIS']).items()
+        }
+        self.shard_sessions = {
+            key: async_sessionmaker(engine, expire_on_commit=False) for key, engine in self.shard_engines.items()
+        }
+
+    # --- UTILIDADES ---
+
+    def json_response(self, data, status_code=200, headers=None):
+        return Response(self.json.dumps_bytes(data) + b'\n', status_code=status_code,
+                        media_type='application/json', headers=headers)
+
+    def error(self, message, status_code):
+        return self.json_response({'message': message}, status_code)
+
+    async def authenticate(self, request, cost=1):
+        """Principal del token Bearer, o una respuesta 401/429."""
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return None, self.error('Token de autenticación requerido', 401)
+        try:
+            principal = Principal.from_claims(decode_access_token(auth_header.split(' ')[1]))
+        except jwt.ExpiredSignatureError:
+            return None, self.error('Token expirado. Inicia sesión nuevamente', 401)
+        except Exception:
+            return None, self.error('Token inválido', 401)
+        if principal.is_revoked():
+            return None, self.error('Token inválido', 401)
+        # Mismo cubo por usuario que la app Flask
+        in_memory = isinstance(rate_limiter.backend, LocalBuckets)
+        wait = await self.offload(in_memory, rate_limiter.check_user, principal.id, cost)
+        if wait is not None:
+            return None, self.json_response(
+                {'message': 'Demasiadas peticiones, inténtalo de nuevo más tarde'}, 429,
+                headers={'Retry-After': str(max(1, math.ceil(wait)))}
+            )
+        return principal, None
+
+    @staticmethod
+    async def offload(in_memory, method, *args):
+        # Los backends locales están en memoria; Redis hace E/S y va a un hilo
+        if in_memory:
+            return method(*args)
+        return await run_in_threadpool(method, *args)
+
+    async def cache_call(self, method, *args):
+        return await self.offload(isinstance(response_cache.backend, LocalCache), method, *args)
+
+    async def conditional(self, request, session, user_id):
+        """(etag, respuesta 304 o None) según If-None-Match.
+
+        Deja `data_version` (para las claves de la caché) y `archived_until`
+        del usuario en `request.state` (misma lectura).
+        """
+        row = (await session.execute(
+            db.select(User.data_version, User.archived_until).where(User.id == user_id)
+        )).first()
+        version, request.state.archived_until = row if row is not None else (0, None)
+        version = request.state.data_version = version or 0
+        full_path = f"{request.url.path}?{request.url.query}"
+        etag = build_etag(user_id, version, full_path)
+        sent = request.headers.get('If-None-Match', '')
+        tags = {tag.strip().removeprefix('W/').strip('"') for tag in sent.split(',')}
+        if etag in tags or '*' in tags:
+            return etag, Response(status_code=304, headers=self.cache_headers(etag))
+        return etag, None
+
+    async def user_shard(self, user_id):
+        """Shard del usuario (None = principal), con la misma caché que `shard_router.lookup`."""
+        if not shard_router.enabled:
+            return None
+        entry = shard_router.cached(user_id)
+        if entry is None:
+            async with self.sessions() as session:
+                row = (await session.execute(
+                    db.select(UserShard.shard, UserShard.moving).where(UserShard.user_id == user_id)
+                )).first()
+            entry = shard_router.remember(user_id, row)
+        return entry[0]
+
+    def sessions_for(self, shard):
+        return self.sessions if shard is None else self.shard_sessions[shard]
+
+    @staticmethod
+    def cache_headers(etag):
+        return {'ETag': f'"{etag}"', 'Cache-Control': CACHE_CONTROL}
+
+    # --- ENDPOINTS ---
+
+    async def categories(self, request):
+        principal, failure = await self.authenticate(request)
+        if failure:
+            return failure
+        shard = await self.user_shard(principal.id)
+        async with self.sessions_for(shard)() as session:
+            etag, not_modified = await self.conditional(request, session, principal.id)
+            if not_modified:
+                return not_modified
+            cache_key = categories_key(principal.id, request.state.data_version)
+            categories = await self.cache_call(response_cache.get, cache_key)
+            if categories is None:
+                categories = serialize_categories((await session.execute(categories_statement(principal.id))).all())
+                await self.cache_call(response_cache.set, cache_key, categories)
+        return self.json_response(categories, headers=self.cache_headers(etag))
+
+    async def summary(self, request):
+        principal, failure = await self.authenticate(request)
+        if failure:
+            return failure
+        current_month = month_key(datetime.now())
+        shard = await self.user_shard(principal.id)
+        async with self.sessions_for(shard)() as session:
+            etag, not_modified = await self.conditional(request, session, principal.id)
+            if not_modified:
+                return not_modified
+            cache_key = summary_key(principal.id, current_month, request.state.data_version)
+            overview = await self.cache_call(response_cache.get, cache_key)
+            if overview is None:
+                first_month = shift_month(current_month, -(self.config['DASHBOARD_TREND_MONTHS'] - 1))
+                rows = (await session.execute(
+                    monthly_overview_statement(principal.id, first_month, current_month)
+                )).all()
+                overview = summarize_overview(rows, first_month, current_month)
+                await self.cache_call(response_cache.set, cache_key, overview)
+        return self.json_response(summary_payload(principal.full_name, overview), headers=self.cache_headers(etag))
+
+    async def transactions(self, request):
+        args = request.query_params
+        # Mismo coste que `_list_cost` en la app Flask
+        paginated = args.get('limit') and args.get('format', 'json') != 'ndjson'
+        principal, failure = await self.authenticate(request, 1 if paginated else 5)
+        if failure:
+            return failure
+        try:
+            filters = parse_transaction_filters(args)
+            sort_key, descending = parse_sort(args)
+            statement = transaction_list_statement(principal.id, filters, sort_key, descending, self.dialect)
+            limit = int(args['limit']) if args.get('limit') else None
+            if args.get('cursor'):
+                statement = apply_cursor(statement, args['cursor'], sort_key, descending)
+        except FilterError as e:
+            return self.error(str(e), 400)
+        except ValueError:
+            return self.error('El parámetro limit debe ser un entero', 400)
+
+        if limit is not None and limit <= 0:
+            return self.error('El parámetro limit debe ser positivo', 400)
+        if limit is not None:
+            limit = min(limit, MAX_PAGE_SIZE)
+        ndjson = args.get('format', 'json') == 'ndjson'
+        include_total = args.get('include_total') in ('1', 'true')
+
+        shard = await self.user_shard(principal.id)
+        async with self.sessions_for(shard)() as session:
+            etag, not_modified = await self.conditional(request, session, principal.id)
+            if not_modified:
+                return not_modified
+
+            if self.reaches_archive(request.state.archived_until, filters):
+                rows, total = await run_in_threadpool(
+                    self._archive_rows, shard, principal.id, filters, sort_key, descending,
+                    None if ndjson or limit is None else limit + 1, args.get('cursor'), include_total
+                )
+                if ndjson:
+                    return StreamingResponse(self._dump(rows), media_type='application/x-ndjson',
+                                             headers=self.cache_headers(etag))
+            else:
+                if ndjson:
+                    return StreamingResponse(self._stream(shard, statement), media_type='application/x-ndjson',
+                                             headers=self.cache_headers(etag))
+                total = None
+                if include_total:
+                    total = await session.scalar(apply_transaction_filters(
+                        db.select(db.func.count(Transaction.id)), principal.id, filters, self.dialect
+                    ))
+                if limit is not None:
+                    statement = statement.limit(limit + 1)
+                rows = (await session.execute(statement)).all()
+
+            next_cursor = None
+            if limit is not None and len(rows) > limit:
+                rows = rows[:limit]
+                last, last_category_name = rows[-1]
+                next_cursor = encode_cursor(sort_key, cursor_value(last, last_category_name, sort_key), last.id)
+
+        transaction_list = [serialize_transaction(t, category_name) for t, category_name in rows]
+        response = {
+            'transactions': transaction_list,
+            'count': len(transaction_list),
+            'next_cursor': next_cursor,
+            'message': 'Lista de transacciones cargada con éxito'
+        }
+        if total is not None:
+            response['total'] = total
+        return self.json_response(response, headers=self.cache_headers(etag))
+
+    @staticmethod
+    def reaches_archive(until, filters):
+        # Misma comprobación que `needs_archive`, con el `archived_until` leído en `conditional`
+        return until is not None and ('start_date' not in filters or filters['start_date'] <= until)
+
+    def _archive_rows(self, shard, user_id, filters, sort_key, descending, limit, cursor, include_total):
+        with self.flask_app.app_context(), shard_context(shard):
+            sources = transaction_sources(user_id, filters, sort_key, descending)
+            rows = fetch_transactions(sources, sort_key, descending, limit, cursor)
+            total = count_transactions(user_id, filters, len(sources) > 1) if include_total else None
+        return rows, total
+
+    async def _dump(self, rows):
+        for t, category_name in rows:
+            yield self.json.dumps_bytes(serialize_transaction(t, category_name)) + b'\n'
+
+    async def _stream(self, shard, statement):
+        async with self.sessions_for(shard)() as session:
+            # `session.stream` abre un cursor de servidor (SSCursor en aiomysql/asyncmy);
+            # el lado síncrono no lo tiene con mysqlconnector y pagina por keyset
+            result = await session.stream(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+            async for t, category_name in result:
+                yield self.json.dumps_bytes(serialize_transaction(t, category_name)) + b'\n'
+
+
+def create_asgi_app(config_class=Config):
+    """Crea la app ASGI de lectura reutilizando la configuración de `create_app`."""
+    flask_app = create_app(config_class)
+    api = ReadAPI(flask_app)
+
+    middleware = [Middleware(CORSMiddleware, allow_origins=['*'], allow_headers=['*'])]
+    if flask_app.config['COMPRESS_ENABLED']:
+        middleware.append(Middleware(GZipMiddleware, minimum_size=flask_app.config['COMPRESS_MIN_SIZE'],
+                                     compresslevel=flask_app.config['COMPRESS_LEVEL']))
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await api.engine.dispose()
+        for engine in api.shard_engines.values():
+            await engine.dispose()
+
+    return Starlette(
+        routes=[
+            Route('/api/categories', api.categories, methods=['GET']),
+            Route('/api/data/summary', api.summary, methods=['GET']),
+            Route('/api/transactions', api.transactions, methods=['GET']),
+        ],
+        middleware=middleware,
+        lifespan=lifespan,
+    )
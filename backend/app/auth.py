@@ -0,0 +1,154 @@
+# Archivo: app/auth.py
+"""Autenticación sin estado basada en los claims del JWT.
+
+`token_required` construye un `Principal` directamente desde el token, sin
+consultar la base de datos. El registro del usuario solo se carga (y se
+guarda en una caché LRU con TTL en memoria) cuando un handler lo necesita.
+
+La revocación (`revoke_tokens`, POST /api/logout-all) sube `token_version`;
+como la comprobación solo mira la caché de cada proceso, es por worker y
+de mejor esfuerzo: ver `Principal.is_revoked`.
+"""
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+import jwt
+from app import db
+from app.cache import LocalCache
+from app.models import User
+from app.shards import current_shard, directory_execute
+
+TOKEN_LIFETIME = timedelta(hours=24)
+
+# Instantánea inmutable del usuario (sin el hash de la contraseña)
+CachedUser = namedtuple('CachedUser', ['id', 'full_name', 'email', 'token_version'])
+
+
+def _jwt_secret():
+    return os.environ.get('JWT_SECRET_KEY', 'dev-jwt-secret-key')
+
+
+def create_access_token(user):
+    """Genera el JWT de un usuario con los claims que usa el Principal."""
+    payload = {
+        'user_id': user.id,
+        'name': user.full_name,
+        'tv': user.token_version or 0,
+        'exp': datetime.utcnow() + TOKEN_LIFETIME
+    }
+    return jwt.encode(payload, _jwt_secret(), algorithm='HS256')
+
+
+def decode_access_token(token):
+    """Decodifica y valida un JWT. Propaga las excepciones de PyJWT."""
+    return jwt.decode(token, _jwt_secret(), algorithms=['HS256'])
+
+
+# Caché LRU con TTL de instantáneas de usuario
+user_cache = LocalCache(max_size=1024, ttl=300)
+
+
+def init_auth(app):
+    """Configura la caché de usuarios según la configuración de la app."""
+    user_cache.max_size = app.config['USER_CACHE_SIZE']
+    user_cache.ttl = app.config['USER_CACHE_TTL']
+    user_cache.clear()
+
+
+def get_cached_user(user_id):
+    """Devuelve la instantánea del usuario, consultando la BD solo si no está en caché."""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    record = db.session.query(
+        User.id, User.full_name, User.email, User.token_version
+    ).filter(User.id == user_id).first()
+    if record is None:
+        return None
+
+    user = CachedUser(record.id, record.full_name, record.email, record.token_version or 0)
+    user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id):
+    """Elimina un usuario de la caché (llamar tras modificarlo)."""
+    user_cache.delete(user_id)
+
+
+def revoke_tokens(user_id):
+    """Invalida todos los tokens emitidos al usuario subiendo su `token_version`.
+
+    Se actualiza la fila del directorio (la que firma los tokens en el login)
+    y, si el usuario vive en un shard, su copia (la que lee la caché). No hace
+    commit: tras confirmar, llamar a `invalidate_user`.
+    """
+    table = User.__table__
+    statement = table.update().where(table.c.id == user_id).values(token_version=table.c.token_version + 1)
+    directory_execute(statement)
+    if current_shard() is not None:
+        db.session.execute(statement)
+
+
+@db.event.listens_for(User, 'after_update')
+@db.event.listens_for(User, 'after_delete')
+def _invalidate_on_change(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+class Principal:
+    """Usuario autenticado construido a partir de los claims del token.
+
+    `id` y `token_version` vienen del token. `full_name` usa el claim `name`
+    si existe; cualquier otro atributo se resuelve cargando el usuario.
+    """
+
+    def __init__(self, user_id, full_name=None, token_version=None):
+        self.id = user_id
+        self.token_version = token_version
+        self._full_name = full_name
+        self._user = None
+
+    @classmethod
+    def from_claims(cls, claims):
+        return cls(int(claims['user_id']), claims.get('name'), claims.get('tv'))
+
+    @property
+    def user(self):
+        """Registro del usuario (instantánea cacheada); None si ya no existe."""
+        if self._user is None:
+            self._user = get_cached_user(self.id)
+        return self._user
+
+    @property
+    def full_name(self):
+        if self._full_name is not None:
+            return self._full_name
+        return self.user.full_name if self.user else None
+
+    def is_revoked(self):
+        """True si el usuario en caché tiene otra versión de token.
+
+        Solo consulta la caché de este proceso: si el usuario no está
+        cacheado el token se acepta sin ir a la base de datos. La revocación
+        es por tanto de mejor esfuerzo y por worker: el que atiende el
+        logout-all la aplica al momento y los demás solo cuando su caché
+        vuelve a cargar al usuario (al caducar USER_CACHE_TTL o porque un
+        handler lo necesita); hasta entonces el token anterior sigue valiendo.
+        """
+        if self.token_version is None:
+            return False
+        cached = user_cache.get(self.id)
+        return cached is not None and cached.token_version != self.token_version
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        user = self.user
+        if user is None:
+            raise AttributeError(name)
+        return getattr(user, name)
+
+    def __repr__(self):
+        return f"<Principal {self.id}>"
@@ -0,0 +1,155 @@
+# Archivo: app/batch.py
+"""Edición y borrado de transacciones por lotes con sentencias de conjunto.
+
+La selección se expresa con una lista de ids o con los mismos filtros del
+listado, y se traduce en un único `UPDATE`/`DELETE ... WHERE user_id = ...`,
+así que la propiedad de las filas se comprueba en la propia sentencia.
+
+Los rollups mensuales se ajustan con un solo SELECT agrupado previo: como
+los cambios de un lote son valores constantes, el grupo (mes, categoría,
+tipo) de cada fila después del UPDATE se deduce del grupo anterior sin
+volver a leer las filas.
+"""
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from app import db
+from app.models import Transaction
+from app.queries import FilterError, parse_transaction_filters, apply_transaction_filters
+from app.rollups import apply_rollup_delta, month_key, month_start, _month_expression
+from app.versioning import bump_data_version
+from app.sync import record_transaction_deletions
+
+
+def selection_query(user_id, data, max_ids):
+    """Consulta sobre las transacciones del usuario indicadas en el cuerpo.
+
+    `ids`: lista de identificadores; `filter`: dict con los filtros del
+    listado (start_date, type, category_ids, q...). Lanza FilterError si la
+    selección falta o no es válida.
+    """
+    ids = data.get('ids')
+    filters = data.get('filter')
+
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise FilterError('ids debe ser una lista no vacía')
+        if len(ids) > max_ids:
+            raise FilterError(f'Máximo {max_ids} ids por petición')
+        try:
+            ids = {int(value) for value in ids}
+        except (TypeError, ValueError):
+            raise FilterError('Identificador de transacción inválido')
+        return Transaction.query.filter(Transaction.user_id == user_id, Transaction.id.in_(sorted(ids)))
+
+    if isinstance(filters, dict):
+        parsed = parse_transaction_filters(filters)
+        if not parsed:
+            raise FilterError('El filtro no puede estar vacío')
+        return apply_transaction_filters(Transaction.query, user_id, parsed)
+
+    raise FilterError('Indica ids o filter')
+
+
+def parse_changes(data):
+    """Valida los campos a modificar (amount, type, category_id, description, date)."""
+    if not isinstance(data, dict) or not data:
+        raise FilterError('Indica los cambios a aplicar')
+
+    changes = {}
+    if 'amount' in data:
+        try:
+            amount = Decimal(str(data['amount']))
+        except (InvalidOperation, ValueError):
+            raise FilterError('Error de formato en los datos')
+        if amount <= 0:
+            raise FilterError('El monto debe ser positivo')
+        changes['amount'] = amount.quantize(Decimal('0.01'))
+
+    if 'type' in data:
+        trans_type = str(data['type']).upper()
+        if trans_type not in ['INCOME', 'EXPENSE']:
+            raise FilterError('Tipo de transacción inválido')
+        changes['type'] = trans_type
+
+    if 'category_id' in data:
+        try:
+            changes['category_id'] = int(data['category_id'])
+        except (TypeError, ValueError):
+            raise FilterError('Identificador de categoría inválido')
+
+    if 'description' in data:
+        changes['description'] = data['description']
+
+    if 'date' in data:
+        try:
+            changes['transaction_date'] = datetime.strptime(data['date'], '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            raise FilterError('Formato de fecha inválido')
+
+    if not changes:
+        raise FilterError('No hay campos válidos que modificar')
+    return changes
+
+
+def _rollup_groups(query):
+    """(mes, categoría, tipo, total, nº) de las filas seleccionadas."""
+    year_month = _month_expression(Transaction.transaction_date)
+    return query.with_entities(
+        year_month, Transaction.category_id, Transaction.type,
+        db.func.sum(Transaction.amount), db.func.count(Transaction.id)
+    ).group_by(
+        year_month, Transaction.category_id, Transaction.type
+    ).order_by(None).all()
+
+
+def _apply_deltas(user_id, deltas):
+    """Aplica los deltas netos {(mes, categoría, tipo): [importe, nº]} a los rollups."""
+    for (year_month, category_id, trans_type), (amount, count) in deltas.items():
+        if amount or count:
+            apply_rollup_delta(user_id, month_start(year_month), category_id, trans_type, amount, count)
+
+
+def batch_update(user_id, query, changes):
+    """Aplica `changes` a las filas de `query` con un único UPDATE. Devuelve el nº de filas."""
+    groups = _rollup_groups(query)
+    if not groups:
+        return 0
+
+    deltas = {}
+    for year_month, category_id, trans_type, total, count in groups:
+        total = Decimal(str(total))
+        before = deltas.setdefault((year_month, category_id, trans_type), [Decimal('0'), 0])
+        before[0] -= total
+        before[1] -= count
+
+        after_key = (
+            month_key(changes['transaction_date']) if 'transaction_date' in changes else year_month,
+            changes.get('category_id', category_id),
+            changes.get('type', trans_type),
+        )
+        after = deltas.setdefault(after_key, [Decimal('0'), 0])
+        after[0] += changes['amount'] * count if 'amount' in changes else total
+        after[1] += count
+
+    version = bump_data_version(user_id)
+    updated = query.update(dict(changes, change_version=version), synchronize_session=False)
+    _apply_deltas(user_id, deltas)
+    db.session.commit()
+    return updated
+
+
+def batch_delete(user_id, query):
+    """Borra las filas de `query` con un único DELETE. Devuelve el nº de filas."""
+    groups = _rollup_groups(query)
+    if not groups:
+        return 0
+
+    deltas = {}
+    for year_month, category_id, trans_type, total, count in groups:
+        deltas[(year_month, category_id, trans_type)] = [-Decimal(str(total)), -count]
+
+    record_transaction_deletions(user_id, query, bump_data_version(user_id))
+    deleted = query.delete(synchronize_session=False)
+    _apply_deltas(user_id, deltas)
+    db.session.commit()
+    return deleted
@@ -0,0 +1,168 @@
+# Archivo: app/cache.py
+"""Caché de aplicación para resultados de lectura (resumen y categorías).
+
+Por defecto es una caché LRU con TTL en memoria del proceso. Las claves
+llevan la versión de datos del usuario, así que no hace falta invalidar. Con
+`CACHE_BACKEND=redis` se comparte entre workers a través de Redis (requiere
+el paquete `redis`); `FakeRedis` implementa el subconjunto de la API que se
+usa aquí para poder probar ese backend sin un servidor.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class LocalCache:
+    """Caché LRU con TTL en memoria, segura entre hilos."""
+
+    def __init__(self, max_size=1024, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._items[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+class RedisCache:
+    """Caché sobre un cliente compatible con Redis (valores serializados en JSON)."""
+
+    def __init__(self, client, prefix='gestomoney:', ttl=60):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl or self.ttl)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class NullCache:
+    """Caché desactivada: nunca guarda nada."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def clear(self):
+        pass
+
+
+class FakeRedis:
+    """Cliente Redis en memoria con get/set(ex)/delete/scan_iter, para pruebas."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def scan_iter(self, match=None):
+        prefix = match[:-1] if match and match.endswith('*') else match
+        with self._lock:
+            keys = list(self._data)
+        return [key for key in keys if prefix is None or key.startswith(prefix)]
+
+
+class CacheProxy:
+    """Punto de acceso global; el backend real se elige en `init_cache`."""
+
+    def __init__(self):
+        self.backend = LocalCache()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+response_cache = CacheProxy()
+
+
+def init_cache(app):
+    """Configura el backend de la caché según CACHE_BACKEND ('local', 'redis' o 'null')."""
+    backend = app.config['CACHE_BACKEND']
+    ttl = app.config['CACHE_TTL']
+
+    if backend == 'redis':
+        import redis
+        client = redis.Redis.from_url(app.config['CACHE_REDIS_URL'])
+        response_cache.backend = RedisCache(client, ttl=ttl)
+    elif backend == 'null':
+        response_cache.backend = NullCache()
+    else:
+        response_cache.backend = LocalCache(max_size=app.config['CACHE_MAX_ENTRIES'], ttl=ttl)
+
+
+# --- CLAVES ---
+# Incluyen la `data_version` del usuario: cualquier escritura la incrementa y
+# deja inalcanzables las entradas anteriores en todos los workers, que
+# caducan solas por TTL/LRU. Así ningún worker sirve datos viejos bajo un
+# ETag nuevo aunque la caché sea local a cada proceso.
+
+def summary_key(user_id, year_month, version):
+    return f"summary:{user_id}:{version}:{year_month}"
+
+
+def categories_key(user_id, version):
+    return f"categories:{user_id}:{version}"
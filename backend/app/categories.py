@@ -0,0 +1,195 @@
+# Archivo: app/categories.py
+"""Lista de categorías por usuario y operaciones de gestión de categorías.
+
+La lista de categorías de cada usuario (la que sirve `GET /api/categories`
+y usa la importación para resolver categorías por nombre) se guarda en
+`response_cache` con la `data_version` del usuario en la clave, así que
+tras cualquier escritura (en este worker o en otro) la entrada anterior
+deja de usarse. La validación de una categoría concreta en las escrituras
+(`find_category`) consulta la base de datos por clave primaria: cada
+escritura cambia la versión, así que la caché casi nunca acertaría ahí.
+"""
+from app import db
+from app.models import Category, Transaction, ArchivedTransaction, MonthlyRollup, RecurringRule
+from app.cache import response_cache, categories_key
+from app.rollups import apply_rollup_delta, month_start
+from app.versioning import bump_data_version, cached_data_version
+from app.sync import ENTITY_CATEGORY, record_deletions
+
+VALID_TYPES = ('INCOME', 'EXPENSE')
+MAX_NAME_LENGTH = 50
+
+
+class CategoryError(ValueError):
+    """Operación sobre categorías no válida; lleva el código HTTP a devolver."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# --- MAPA CACHEADO ---
+
+def categories_statement(user_id):
+    """SELECT de las categorías del usuario en el formato de la API."""
+    return db.select(
+        Category.id, Category.name, Category.type, Category.is_default
+    ).where(Category.user_id == user_id).order_by(Category.id)
+
+
+def serialize_categories(rows):
+    return [
+        {'id': cid, 'name': name, 'type': cat_type, 'is_default': bool(is_default)}
+        for cid, name, cat_type, is_default in rows
+    ]
+
+
+def _load_categories(user_id):
+    return serialize_categories(db.session.execute(categories_statement(user_id)).all())
+
+
+def get_user_categories(user_id):
+    """Lista de categorías del usuario (dicts serializables), cacheada por versión de datos."""
+    version = cached_data_version(user_id)
+    if version is None:
+        return _load_categories(user_id)
+    key = categories_key(user_id, version)
+    categories = response_cache.get(key)
+    if categories is None:
+        categories = _load_categories(user_id)
+        response_cache.set(key, categories)
+    return categories
+
+
+def find_category(user_id, category_id):
+    """Categoría del usuario con ese id, o None si no existe o es de otro usuario."""
+    rows = db.session.execute(
+        categories_statement(user_id).where(Category.id == category_id)
+    ).all()
+    return serialize_categories(rows)[0] if rows else None
+
+
+# --- ESCRITURAS ---
+
+def _validate_name(name):
+    name = (name or '').strip()
+    if not name:
+        raise CategoryError('El nombre de la categoría es obligatorio')
+    if len(name) > MAX_NAME_LENGTH:
+        raise CategoryError(f'El nombre no puede superar {MAX_NAME_LENGTH} caracteres')
+    return name
+
+
+def _check_duplicate(user_id, name, cat_type, exclude_id=None):
+    for category in _load_categories(user_id):
+        if (category['id'] != exclude_id and category['type'] == cat_type
+                and category['name'].lower() == name.lower()):
+            raise CategoryError('Ya existe una categoría con ese nombre', 409)
+
+
+def _require(user_id, category_id):
+    category = find_category(user_id, category_id)
+    if category is None:
+        raise CategoryError('Categoría no encontrada', 404)
+    return category
+
+
+def create_category(user_id, name, cat_type):
+    """Crea una categoría y devuelve su dict."""
+    name = _validate_name(name)
+    cat_type = (cat_type or 'EXPENSE').upper()
+    if cat_type not in VALID_TYPES:
+        raise CategoryError('Tipo de categoría inválido')
+    _check_duplicate(user_id, name, cat_type)
+
+    category = Category(user_id=user_id, name=name, type=cat_type, is_default=False,
+                        change_version=bump_data_version(user_id))
+    db.session.add(category)
+    db.session.commit()
+    return {'id': category.id, 'name': name, 'type': cat_type, 'is_default': False}
+
+
+def rename_category(user_id, category_id, name):
+    """Cambia el nombre de una categoría."""
+    category = _require(user_id, category_id)
+    name = _validate_name(name)
+    _check_duplicate(user_id, name, category['type'], exclude_id=category_id)
+
+    db.session.execute(
+        Category.__table__.update()
+        .where(Category.__table__.c.id == category_id, Category.__table__.c.user_id == user_id)
+        .values(name=name, change_version=bump_data_version(user_id))
+    )
+    db.session.commit()
+    return dict(category, name=name)
+
+
+def merge_category(user_id, source_id, target_id):
+    """Pasa las transacciones (y reglas recurrentes) de `source_id` a `target_id` y borra la primera.
+
+    Las transacciones se reasignan con un único UPDATE y los rollups de la
+    categoría origen se suman a los de la destino. Devuelve el nº de
+    transacciones movidas.
+    """
+    if source_id == target_id:
+        raise CategoryError('No se puede fusionar una categoría consigo misma')
+    source = _require(user_id, source_id)
+    target = _require(user_id, target_id)
+    if source['type'] != target['type']:
+        raise CategoryError('Solo se pueden fusionar categorías del mismo tipo')
+
+    version = bump_data_version(user_id)
+    moved = 0
+    for table in (Transaction.__table__, ArchivedTransaction.__table__):
+        moved += db.session.execute(
+            table.update()
+            .where(table.c.user_id == user_id, table.c.category_id == source_id)
+            .values(category_id=target_id, change_version=version)
+        ).rowcount
+    rules = RecurringRule.__table__
+    db.session.execute(
+        rules.update()
+        .where(rules.c.user_id == user_id, rules.c.category_id == source_id)
+        .values(category_id=target_id)
+    )
+
+    rollups = MonthlyRollup.__table__
+    source_rows = db.session.execute(
+        db.select(rollups.c.year_month, rollups.c.type, rollups.c.total, rollups.c.count)
+        .where(rollups.c.user_id == user_id, rollups.c.category_id == source_id)
+    ).all()
+    for year_month, trans_type, total, count in source_rows:
+        apply_rollup_delta(user_id, month_start(year_month), target_id, trans_type, total, count)
+    db.session.execute(rollups.delete().where(rollups.c.user_id == user_id, rollups.c.category_id == source_id))
+
+    db.session.execute(Category.__table__.delete().where(Category.__table__.c.id == source_id))
+    record_deletions(user_id, ENTITY_CATEGORY, [source_id], version)
+    db.session.commit()
+    return moved
+
+
+def delete_category(user_id, category_id, reassign_to=None):
+    """Borra una categoría vacía, o la fusiona en `reassign_to` si se indica.
+
+    Sin `reassign_to` se rechaza si la categoría aún tiene transacciones o
+    reglas recurrentes, para no borrarlas en cascada por accidente.
+    """
+    if reassign_to is not None:
+        return merge_category(user_id, category_id, reassign_to)
+
+    _require(user_id, category_id)
+    in_use = any(
+        db.session.query(entity.id).filter(
+            entity.user_id == user_id, entity.category_id == category_id
+        ).first()
+        for entity in (Transaction, ArchivedTransaction, RecurringRule)
+    )
+    if in_use:
+        raise CategoryError(
+            'La categoría tiene transacciones o reglas recurrentes; indica reassign_to para moverlas', 409
+        )
+
+    db.session.execute(Category.__table__.delete().where(Category.__table__.c.id == category_id))
+    record_deletions(user_id, ENTITY_CATEGORY, [category_id], bump_data_version(user_id))
+    db.session.commit()
+    return 0
@@ -0,0 +1,222 @@
+# Archivo: app/commands.py
+"""Comandos de línea de comandos (`flask <comando>`) de Gestomoney."""
+import click
+from flask.cli import with_appcontext
+from app import db
+
+
+@click.command('rebuild-rollups')
+@click.option('--user-id', type=int, default=None, help='Reconstruir solo los rollups de este usuario.')
+@with_appcontext
+def rebuild_rollups_command(user_id):
+    """Reconstruye la tabla monthly_rollups desde las transacciones."""
+    from app.rollups import rebuild_rollups
+    from app.shards import shards_for
+
+    rows = 0
+    for _ in shards_for(user_id):
+        try:
+            rows += rebuild_rollups(user_id)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    print(f"✅ Rollups mensuales reconstruidos ({rows} filas)")
+
+
+@click.command('purge-reports')
+@click.option('--days', type=int, default=None, help='Antigüedad mínima en días (por defecto REPORT_RETENTION_DAYS).')
+@with_appcontext
+def purge_reports_command(days):
+    """Borra los informes generados hace más de N días."""
+    from flask import current_app
+    from app.reports import purge_report_jobs
+    from app.shards import each_shard
+
+    if days is None:
+        days = current_app.config['REPORT_RETENTION_DAYS']
+    rows = 0
+    for _ in each_shard():
+        try:
+            rows += purge_report_jobs(days)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    print(f"✅ Informes eliminados: {rows}")
+
+
+@click.command('purge-tombstones')
+@click.option('--days', type=int, default=None,
+              help='Antigüedad mínima en días (por defecto SYNC_TOMBSTONE_RETENTION_DAYS).')
+@with_appcontext
+def purge_tombstones_command(days):
+    """Borra las bajas de sincronización de hace más de N días."""
+    from flask import current_app
+    from app.sync import purge_tombstones
+    from app.shards import each_shard
+
+    if days is None:
+        days = current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS']
+    rows = 0
+    for _ in each_shard():
+        try:
+            rows += purge_tombstones(days)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    print(f"✅ Bajas eliminadas: {rows}")
+
+
+@click.command('provision-users')
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--output', type=click.File('w', encoding='utf-8'), default=None,
+              help='CSV donde escribir las contraseñas generadas (email,password).')
+@click.option('--chunk-size', type=int, default=1000, show_default=True, help='Usuarios por bloque/commit.')
+@click.option('--workers', type=int, default=None, help='Procesos para bcrypt (por defecto, uno por CPU).')
+@with_appcontext
+def provision_users_command(source, output, chunk_size, workers):
+    """Da de alta en bloque las cuentas de un CSV (email, full_name[, password]).
+
+    Las filas sin contraseña reciben una aleatoria, que se escribe en --output.
+    Los emails ya registrados se omiten.
+    """
+    import csv
+    import secrets
+    from flask import current_app
+    from app.hashing import hash_passwords
+    from app.provisioning import provision_users
+
+    accounts, generated = [], []
+    for line, row in enumerate(csv.DictReader(source), start=2):
+        email = (row.get('email') or '').strip().lower()
+        full_name = (row.get('full_name') or row.get('fullName') or '').strip()
+        if not email or not full_name:
+            raise click.BadParameter(f"Fila {line}: faltan email o full_name", param_hint='SOURCE')
+        password = row.get('password') or ''
+        if not password:
+            password = secrets.token_urlsafe(12)
+            generated.append(len(accounts))
+        accounts.append({'email': email, 'full_name': full_name, 'password': password})
+
+    if generated and output is None:
+        raise click.UsageError('Hay filas sin contraseña: indica --output para guardar las generadas')
+
+    passwords = [account.pop('password') for account in accounts]
+    hashes = hash_passwords(passwords, current_app.config['BCRYPT_LOG_ROUNDS'], workers)
+    for account, password_hash in zip(accounts, hashes):
+        account['password_hash'] = password_hash
+
+    created, skipped = provision_users(accounts, chunk_size)
+
+    if output is not None:
+        writer = csv.writer(output)
+        writer.writerow(['email', 'password'])
+        skipped_ids = {id(account) for account in skipped}
+        writer.writerows(
+            (accounts[index]['email'], passwords[index])
+            for index in generated if id(accounts[index]) not in skipped_ids
+        )
+    print(f"✅ Usuarios creados: {created} (omitidos por email existente: {len(skipped)})")
+
+
+@click.command('archive-transactions')
+@click.option('--months', type=int, default=None,
+              help='Archiva lo anterior a N meses (por defecto ARCHIVE_AFTER_MONTHS).')
+@click.option('--chunk-size', type=int, default=None, help='Filas por bloque/commit (por defecto ARCHIVE_CHUNK_SIZE).')
+@click.option('--user-id', type=int, default=None, help='Archivar solo las transacciones de este usuario.')
+@with_appcontext
+def archive_transactions_command(months, chunk_size, user_id):
+    """Mueve las transacciones antiguas a transactions_archive."""
+    from flask import current_app
+    from app.archive import archive_cutoff, archive_lock, archive_transactions
+    from app.shards import shards_for
+
+    config = current_app.config
+    cutoff = archive_cutoff(config['ARCHIVE_AFTER_MONTHS'] if months is None else months)
+    moved = 0
+    with archive_lock() as acquired:
+        if not acquired:
+            raise click.ClickException('Otro proceso está archivando; inténtalo más tarde')
+        for _ in shards_for(user_id):
+            moved += archive_transactions(cutoff, chunk_size or config['ARCHIVE_CHUNK_SIZE'], user_id)
+    print(f"✅ Transacciones archivadas (anteriores a {cutoff}): {moved}")
+
+
+@click.command('materialize-recurring')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Genera las ocurrencias hasta esta fecha YYYY-MM-DD (por defecto hoy).')
+@click.option('--chunk-size', type=int, default=None, help='Reglas por bloque/commit (por defecto RECURRING_CHUNK_SIZE).')
+@click.option('--user-id', type=int, default=None, help='Generar solo las reglas de este usuario.')
+@with_appcontext
+def materialize_recurring_command(until, chunk_size, user_id):
+    """Crea las transacciones vencidas de las reglas recurrentes."""
+    from datetime import date
+    from flask import current_app
+    from app.recurring import RECURRING_LOCK_NAME, materialize_recurring
+    from app.scheduling import named_lock
+    from app.shards import shards_for
+
+    until = until.date() if until else date.today()
+    created = 0
+    with named_lock(RECURRING_LOCK_NAME) as acquired:
+        if not acquired:
+            raise click.ClickException('Otro proceso está generando las recurrentes; inténtalo más tarde')
+        for _ in shards_for(user_id):
+            created += materialize_recurring(until, chunk_size or current_app.config['RECURRING_CHUNK_SIZE'], user_id)
+    print(f"✅ Transacciones recurrentes generadas (hasta {until}): {created}")
+
+
+@click.command('move-user')
+@click.argument('user_id', type=int)
+@click.argument('shard')
+@click.option('--chunk-size', type=int, default=None, help='Filas por bloque (por defecto SHARD_MOVE_CHUNK_SIZE).')
+@with_appcontext
+def move_user_command(user_id, shard, chunk_size):
+    """Mueve en caliente los datos de un usuario a SHARD ('primary' o 'shard_N')."""
+    from app.rebalance import move_user
+    from app.shards import ShardError, shard_router
+
+    try:
+        moved = move_user(user_id, shard_router.parse(shard), chunk_size)
+    except ShardError as e:
+        raise click.ClickException(str(e))
+    print(f"✅ Usuario {user_id} movido a {shard} ({moved} transacciones)")
+
+
+@click.command('rebalance-shards')
+@click.option('--max-moves', type=int, default=10, show_default=True, help='Máximo de usuarios a mover.')
+@click.option('--tolerance', type=float, default=0.1, show_default=True,
+              help='Diferencia admitida entre shards, como fracción de la media de transacciones.')
+@click.option('--dry-run', is_flag=True, help='Solo muestra los movimientos propuestos.')
+@with_appcontext
+def rebalance_shards_command(max_moves, tolerance, dry_run):
+    """Reparte los usuarios entre los shards según su número de transacciones."""
+    from app.rebalance import shard_loads, plan_rebalance, move_user
+    from app.shards import shard_name
+
+    loads = shard_loads()
+    for key, users in loads.items():
+        print(f"{shard_name(key)}: {len(users)} usuarios, {sum(users.values())} transacciones")
+
+    moves = plan_rebalance(loads, max_moves, tolerance)
+    for user_id, source, target, count in moves:
+        print(f"{'(simulado) ' if dry_run else ''}Usuario {user_id}: {shard_name(source)} → "
+              f"{shard_name(target)} ({count} transacciones)")
+        if not dry_run:
+            move_user(user_id, target)
+    print(f"✅ Movimientos: {len(moves)}")
+
+
+def register_commands(app):
+    """Registra los comandos CLI en la aplicación."""
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(purge_reports_command)
+    app.cli.add_command(purge_tombstones_command)
+    app.cli.add_command(provision_users_command)
+    app.cli.add_command(archive_transactions_command)
+    app.cli.add_command(materialize_recurring_command)
+    app.cli.add_command(move_user_command)
+    app.cli.add_command(rebalance_shards_command)
+
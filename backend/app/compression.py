@@ -0,0 +1,64 @@
+# Archivo: app/compression.py
+"""Compresión gzip/brotli de las respuestas que superan un tamaño mínimo.
+
+Brotli se usa solo si el cliente lo acepta y el paquete `brotli` está
+instalado. Las respuestas en streaming (NDJSON) no se comprimen aquí para no
+tener que materializarlas. Al comprimir, el ETag fuerte pasa a débil porque
+los bytes ya no son los de la representación original.
+"""
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/csv', 'text/plain', 'text/html')
+
+
+def _choose_encoding(accept_encoding):
+    if brotli is not None and 'br' in accept_encoding:
+        return 'br'
+    if 'gzip' in accept_encoding:
+        return 'gzip'
+    return None
+
+
+def init_compression(app):
+    """Registra el after_request que comprime las respuestas."""
+    if not app.config['COMPRESS_ENABLED']:
+        return
+
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    level = app.config['COMPRESS_LEVEL']
+
+    @app.after_request
+    def compress_response(response):
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+
+        encoding = _choose_encoding(request.accept_encodings)
+        response.vary.add('Accept-Encoding')
+        if encoding is None or response.content_length is None or response.content_length < min_size:
+            return response
+
+        data = response.get_data()
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=min(level, 11))
+        else:
+            compressed = gzip.compress(data, compresslevel=level)
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+
+        etag, is_weak = response.get_etag()
+        if etag and not is_weak:
+            response.set_etag(etag, weak=True)
+        return response
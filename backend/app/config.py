@@ -3,6 +3,13 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def env_bool(name, default):
+    """Lee una variable de entorno booleana ('true', '1', 't', 'yes')."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ['true', '1', 't', 'yes']
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
     
@@ -11,14 +18,131 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'root')
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     DB_NAME = os.getenv('DB_NAME', 'gestomoney_db')
+    # 'mysqlconnector' (por defecto) o 'mysqldb' para el driver en C (pip install mysqlclient)
+    DB_DRIVER = os.getenv('DB_DRIVER', 'mysqlconnector')
     
-    SQLALCHEMY_DATABASE_URI = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    SQLALCHEMY_DATABASE_URI = f"mysql+{DB_DRIVER}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Réplicas de lectura (URIs separadas por comas) para los GET marcados con
+    # @read_only; tras una escritura el usuario lee del primario unos segundos
+    DB_REPLICA_URIS = [uri.strip() for uri in os.getenv('DB_REPLICA_URIS', '').split(',') if uri.strip()]
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(os.getenv('REPLICA_READ_YOUR_WRITES_SECONDS', '5'))
+    REPLICA_HEALTH_CHECK_INTERVAL = int(os.getenv('REPLICA_HEALTH_CHECK_INTERVAL', '10'))
+    REPLICA_RETRY_SECONDS = int(os.getenv('REPLICA_RETRY_SECONDS', '30'))
+    
+    # Shards de datos por usuario (ver app/shards.py): URIs separadas por comas.
+    # SHARD_NEW_USERS limita los binds (shard_0, shard_1...) que reciben altas;
+    # vacío = todos los shards
+    DB_SHARD_URIS = [uri.strip() for uri in os.getenv('DB_SHARD_URIS', '').split(',') if uri.strip()]
+    SHARD_NEW_USERS = [key.strip() for key in os.getenv('SHARD_NEW_USERS', '').split(',') if key.strip()]
+    SHARD_MAP_CACHE_SECONDS = int(os.getenv('SHARD_MAP_CACHE_SECONDS', '5'))
+    SHARD_MAP_CACHE_SIZE = int(os.getenv('SHARD_MAP_CACHE_SIZE', '10000'))
+    SHARD_MOVE_CHUNK_SIZE = int(os.getenv('SHARD_MOVE_CHUNK_SIZE', '2000'))
+    # App ASGI de solo lectura (asgi.py): URL propia o la anterior con un driver
+    # async (aiomysql para MySQL por defecto; ASYNC_DB_DRIVER=asyncmy para cambiarlo)
+    ASYNC_DATABASE_URI = os.getenv('ASYNC_DATABASE_URI')
+    ASYNC_DB_DRIVER = os.getenv('ASYNC_DB_DRIVER')
+    
+    # Pool de conexiones. pool_recycle debe ser menor que el wait_timeout de
+    # MySQL para no reutilizar conexiones cerradas por el servidor.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '280')),
+        'pool_pre_ping': env_bool('DB_POOL_PRE_PING', True),
+    }
     
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = 3600
     
+    # Hash de contraseñas: coste de bcrypt y pool de procesos (0 = en el hilo de la petición)
+    BCRYPT_LOG_ROUNDS = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '16'))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+    
+    # Caché en memoria de usuarios para la autenticación sin estado
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '1024'))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '300'))
+    
     FLASK_DEBUG = os.getenv('FLASK_ENV') == 'development'
     
+    # Meses incluidos en la tendencia del dashboard (servida desde monthly_rollups)
+    DASHBOARD_TREND_MONTHS = int(os.getenv('DASHBOARD_TREND_MONTHS', '6'))
+    
+    # Caché de aplicación para resumen y categorías: 'local', 'redis' o 'null'
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local')
+    CACHE_TTL = int(os.getenv('CACHE_TTL', '60'))
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    
+    # Limitación de peticiones (token buckets '<n>/<second|minute|hour|day>').
+    # RATELIMIT_BACKEND 'local' (por proceso) o 'redis' (compartido entre workers).
+    RATELIMIT_ENABLED = env_bool('RATELIMIT_ENABLED', True)
+    RATELIMIT_BACKEND = os.getenv('RATELIMIT_BACKEND', 'local')
+    RATELIMIT_REDIS_URL = os.getenv('RATELIMIT_REDIS_URL', CACHE_REDIS_URL)
+    RATELIMIT_MAX_KEYS = int(os.getenv('RATELIMIT_MAX_KEYS', '100000'))
+    RATELIMIT_IP = os.getenv('RATELIMIT_IP', '600/minute')
+    RATELIMIT_USER = os.getenv('RATELIMIT_USER', '300/minute')
+    RATELIMIT_ENDPOINTS = {
+        'main.login': os.getenv('RATELIMIT_LOGIN', '10/minute'),
+        'main.register': os.getenv('RATELIMIT_REGISTER', '5/minute'),
+    }
+    # Nº de proxies de confianza delante de la app (la IP se toma de X-Forwarded-For).
+    # En Railway y Render la app siempre va detrás de su proxy: sin este valor
+    # todos los clientes compartirían el bucket de la IP del proxy
+    BEHIND_PLATFORM_PROXY = bool(os.getenv('RAILWAY_ENVIRONMENT') or os.getenv('RENDER'))
+    RATELIMIT_TRUSTED_PROXIES = int(os.getenv('RATELIMIT_TRUSTED_PROXIES', '1' if BEHIND_PLATFORM_PROXY else '0'))
+    
+    # Instrumentación por petición (Server-Timing, /metrics y log de peticiones lentas)
+    PROFILING_ENABLED = env_bool('PROFILING_ENABLED', True)
+    # La cabecera Server-Timing revela tiempos y número de consultas: solo en desarrollo
+    SERVER_TIMING_ENABLED = env_bool('SERVER_TIMING_ENABLED', FLASK_DEBUG)
+    # /metrics es opcional y, si se define METRICS_TOKEN, exige 'Authorization: Bearer <token>'
+    METRICS_ENABLED = env_bool('METRICS_ENABLED', False)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '500'))
+    SLOW_REQUEST_QUERIES = int(os.getenv('SLOW_REQUEST_QUERIES', '20'))
+    PROFILING_SLOWEST_STATEMENTS = int(os.getenv('PROFILING_SLOWEST_STATEMENTS', '3'))
+    
+    # Importación masiva de transacciones
+    BULK_IMPORT_MAX_ROWS = int(os.getenv('BULK_IMPORT_MAX_ROWS', '50000'))
+    BULK_INSERT_CHUNK_SIZE = int(os.getenv('BULK_INSERT_CHUNK_SIZE', '1000'))
+    # Máximo de ids en PATCH/DELETE /api/transactions
+    BATCH_MAX_IDS = int(os.getenv('BATCH_MAX_IDS', '5000'))
+    
+    # Informes en segundo plano (0 workers = se calculan en la propia petición)
+    REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '2'))
+    REPORT_MAX_PENDING = int(os.getenv('REPORT_MAX_PENDING', '8'))
+    REPORT_MAX_DAYS = int(os.getenv('REPORT_MAX_DAYS', '3660'))
+    REPORT_TOP_MERCHANTS = int(os.getenv('REPORT_TOP_MERCHANTS', '10'))
+    REPORT_JOB_TIMEOUT = int(os.getenv('REPORT_JOB_TIMEOUT', '600'))
+    REPORT_RETENTION_DAYS = int(os.getenv('REPORT_RETENTION_DAYS', '7'))
+    
+    # Días que se conservan las bajas para GET /api/sync (flask purge-tombstones)
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '90'))
+    
+    # Archivo de transacciones antiguas (flask archive-transactions); con
+    # ARCHIVE_CHECK_MINUTES > 0 cada worker lo lanza periódicamente
+    ARCHIVE_AFTER_MONTHS = int(os.getenv('ARCHIVE_AFTER_MONTHS', '24'))
+    ARCHIVE_CHUNK_SIZE = int(os.getenv('ARCHIVE_CHUNK_SIZE', '5000'))
+    ARCHIVE_CHECK_MINUTES = int(os.getenv('ARCHIVE_CHECK_MINUTES', '0'))
+    
+    # Transacciones recurrentes: lanzar `flask materialize-recurring` desde cron
+    # (un solo proceso). Con RECURRING_CHECK_MINUTES > 0 cada proceso que crea
+    # la app arranca además un hilo que genera periódicamente las vencidas;
+    # fuera de MySQL no hay bloqueo entre procesos, así que conviene activarlo
+    # solo en uno
+    RECURRING_CHECK_MINUTES = int(os.getenv('RECURRING_CHECK_MINUTES', '0'))
+    RECURRING_CHUNK_SIZE = int(os.getenv('RECURRING_CHUNK_SIZE', '1000'))
+    RECURRING_MAX_BACKFILL_DAYS = int(os.getenv('RECURRING_MAX_BACKFILL_DAYS', '366'))
+    
     JSON_SORT_KEYS = False
-    JSONIFY_PRETTYPRINT_REGULAR = True
\ No newline at end of file
+    # JSON compacto en producción; indentado solo si se pide o en desarrollo
+    JSON_PRETTYPRINT = env_bool('JSON_PRETTYPRINT', FLASK_DEBUG)
+    
+    # Compresión de respuestas (gzip, o brotli si está instalado)
+    COMPRESS_ENABLED = env_bool('COMPRESS_ENABLED', True)
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))
\ No newline at end of file
@@ -0,0 +1,162 @@
+# Archivo: app/exports.py
+"""Exportación en streaming del historial de transacciones (CSV, XLSX, Parquet).
+
+Las filas se leen por páginas keyset (`app.archive.iter_transactions`, con
+cualquier driver, también los que no tienen cursores de servidor) y se
+escriben por lotes en un búfer que el generador vacía tras cada lote, de
+modo que la memoria no crece con el tamaño del historial.
+
+CSV no necesita dependencias. XLSX requiere `openpyxl` (pip install
+openpyxl) y Parquet `pyarrow` (pip install pyarrow); si no están instalados
+ese formato no está disponible.
+
+XLSX y Parquet son formatos con índice al final: openpyxl en modo
+`write_only` vuelca las filas a un fichero temporal y el ZIP se transmite
+al terminar; Parquet escribe un row group por lote y se transmite a medida
+que se genera.
+"""
+import csv
+import io
+import tempfile
+from datetime import date
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - depende del entorno
+    openpyxl = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:  # pragma: no cover - depende del entorno
+    pyarrow = None
+
+EXPORT_HEADERS = ['id', 'fecha', 'tipo', 'monto', 'categoria', 'descripcion']
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+class ExportFormatUnavailable(Exception):
+    """El formato pedido necesita una dependencia que no está instalada."""
+
+
+def export_rows(rows):
+    """Filas (transacción, nombre de categoría) como tuplas de las columnas exportadas."""
+    for t, category_name in rows:
+        yield t.id, t.transaction_date, t.type, t.amount, category_name, t.description
+
+
+def _batches(rows, batch_size):
+    """Agrupa en listas de `batch_size` un iterable de filas."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Fichero de solo escritura que acumula bytes hasta que se vacía."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+# --- FORMATOS ---
+
+def stream_csv(rows, batch_size):
+    """CSV en UTF-8 con BOM para que Excel reconozca los acentos."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADERS)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+
+    for batch in _batches(rows, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        for transaction_id, transaction_date, trans_type, amount, category_name, description in batch:
+            writer.writerow([transaction_id, transaction_date.isoformat(), trans_type, amount,
+                             category_name or 'Desconocida', description or ''])
+        yield buffer.getvalue().encode('utf-8')
+
+
+def stream_xlsx(rows, batch_size):
+    if openpyxl is None:
+        raise ExportFormatUnavailable('El formato xlsx requiere el paquete openpyxl')
+
+    def generate():
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet('Transacciones')
+        sheet.append(EXPORT_HEADERS)
+        for batch in _batches(rows, batch_size):
+            for transaction_id, transaction_date, trans_type, amount, category_name, description in batch:
+                sheet.append([transaction_id, transaction_date, trans_type, amount,
+                              category_name or 'Desconocida', description or ''])
+
+        with tempfile.TemporaryFile() as output:
+            workbook.save(output)
+            output.seek(0)
+            while True:
+                chunk = output.read(EXPORT_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    return generate()
+
+
+def stream_parquet(rows, batch_size):
+    if pyarrow is None:
+        raise ExportFormatUnavailable('El formato parquet requiere el paquete pyarrow')
+
+    schema = pyarrow.schema([
+        ('id', pyarrow.int64()),
+        ('fecha', pyarrow.date32()),
+        ('tipo', pyarrow.string()),
+        ('monto', pyarrow.decimal128(10, 2)),
+        ('categoria', pyarrow.string()),
+        ('descripcion', pyarrow.string()),
+    ])
+
+    def generate():
+        sink = _ChunkBuffer()
+        with parquet.ParquetWriter(pyarrow.PythonFile(sink, mode='w'), schema) as writer:
+            for batch in _batches(rows, batch_size):
+                columns = list(zip(*batch))
+                writer.write_table(pyarrow.Table.from_arrays([
+                    pyarrow.array(columns[0], pyarrow.int64()),
+                    pyarrow.array(columns[1], pyarrow.date32()),
+                    pyarrow.array(columns[2], pyarrow.string()),
+                    pyarrow.array(columns[3], pyarrow.decimal128(10, 2)),
+                    pyarrow.array([name or 'Desconocida' for name in columns[4]], pyarrow.string()),
+                    pyarrow.array(columns[5], pyarrow.string()),
+                ], schema=schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        yield sink.drain()
+    return generate()
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv'),
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'parquet': (stream_parquet, 'application/vnd.apache.parquet'),
+}
+
+
+def export_filename(export_format):
+    return f"transacciones-{date.today().strftime('%Y%m%d')}.{export_format}"
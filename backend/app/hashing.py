@@ -0,0 +1,125 @@
+# Archivo: app/hashing.py
+"""Hash de contraseñas con bcrypt fuera del hilo de la petición.
+
+bcrypt consume ~250 ms de CPU por llamada con el coste por defecto, así que
+register y login delegan el trabajo en un pool de procesos acotado. Si el
+pool y su cola están llenos se lanza `HashingBusy` en lugar de encolar sin
+límite, y el handler responde 503 con `Retry-After`.
+"""
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+
+
+class HashingBusy(Exception):
+    """El pool de hashing está saturado."""
+
+
+# --- FUNCIONES EJECUTADAS EN LOS PROCESOS DEL POOL ---
+
+def _hash_password(password, rounds):
+    salt = bcrypt.gensalt(rounds=rounds)
+    return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+
+def _check_password(password_hash, password):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
+def hash_rounds(password_hash):
+    """Coste (log rounds) de un hash bcrypt '$2b$12$...'; None si no se reconoce."""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+
+def hash_passwords(passwords, rounds, workers=None):
+    """Hashea muchas contraseñas en paralelo (para procesos por lotes, no peticiones)."""
+    if workers == 0:
+        return [_hash_password(password, rounds) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_hash_password, passwords, [rounds] * len(passwords), chunksize=16))
+
+
+class PasswordHasher:
+    """Pool de procesos acotado para bcrypt.
+
+    Con `workers=0` el hash se calcula en el propio hilo (útil en desarrollo).
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.workers = 0
+        self.max_pending = 0
+        self.timeout = None
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def configure(self, rounds, workers, max_pending, timeout):
+        self.shutdown()
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + max_pending) if workers else None
+
+    def _get_executor(self):
+        # El pool se crea la primera vez que se usa, no al importar la app
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HashingBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # El hueco se libera cuando el trabajo termina de verdad, no al
+        # agotarse la espera: un bcrypt que excede el timeout sigue ocupando
+        # un proceso del pool
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HashingBusy()
+
+    def generate_password_hash(self, password):
+        return self._run(_hash_password, password, self.rounds)
+
+    def check_password_hash(self, password_hash, password):
+        return self._run(_check_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True si el hash se generó con un coste distinto al configurado."""
+        return hash_rounds(password_hash) != self.rounds
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
+atexit.register(password_hasher.shutdown)
+
+
+def init_hashing(app):
+    """Configura el pool de hashing según la configuración de la app."""
+    password_hasher.configure(
+        rounds=app.config['BCRYPT_LOG_ROUNDS'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT']
+    )
@@ -0,0 +1,188 @@
+# Archivo: app/imports.py
+"""Importación masiva de transacciones (JSON, CSV y OFX).
+
+La validación se hace en una sola pasada sobre todas las filas, las
+categorías se resuelven con una única consulta IN y las inserciones se
+agrupan en bloques (executemany) confirmados por separado.
+"""
+import csv
+import io
+import re
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from app import db
+from app.models import Transaction
+from app.categories import get_user_categories
+from app.rollups import apply_rollup_delta
+from app.versioning import bump_data_version
+
+MAX_AMOUNT = Decimal('99999999.99')
+VALID_TYPES = ('INCOME', 'EXPENSE')
+
+
+# --- LECTURA DE FORMATOS ---
+
+def parse_csv(text):
+    """Convierte un CSV con cabecera en una lista de dicts.
+
+    Columnas reconocidas: date, amount, type, category_id, category,
+    description (se ignoran mayúsculas y espacios en la cabecera).
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    rows = []
+    for raw in reader:
+        rows.append({(key or '').strip().lower(): (value or '').strip() for key, value in raw.items()})
+    return rows
+
+
+_OFX_TRANSACTION = re.compile(r'<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|(?=</BANKTRANLIST>))', re.S | re.I)
+_OFX_FIELD = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+def parse_ofx(text):
+    """Extrae las transacciones (<STMTTRN>) de un extracto OFX 1.x (SGML) o 2.x (XML).
+
+    El tipo se deduce del signo del importe; la categoría la asigna el
+    llamador (ver `assign_default_categories`).
+    """
+    rows = []
+    for block in _OFX_TRANSACTION.findall(text):
+        fields = {name.upper(): value.strip() for name, value in _OFX_FIELD.findall(block)}
+        amount = fields.get('TRNAMT', '')
+        posted = fields.get('DTPOSTED', '')
+        row = {
+            'amount': amount.lstrip('-+'),
+            'type': 'EXPENSE' if amount.startswith('-') else 'INCOME',
+            'date': f"{posted[0:4]}-{posted[4:6]}-{posted[6:8]}" if len(posted) >= 8 else posted,
+            'description': fields.get('NAME') or fields.get('MEMO'),
+        }
+        rows.append(row)
+    return rows
+
+
+def assign_default_categories(rows, income_category_id=None, expense_category_id=None):
+    """Asigna una categoría por tipo a las filas que no la traen."""
+    for row in rows:
+        if row.get('category_id') or row.get('category'):
+            continue
+        if row.get('type', '').upper() == 'INCOME':
+            row['category_id'] = income_category_id
+        else:
+            row['category_id'] = expense_category_id
+    return rows
+
+
+# --- VALIDACIÓN ---
+
+def load_category_map(user_id):
+    """Mapas id -> nombre y nombre -> id de las categorías del usuario.
+
+    Salen del mapa cacheado de app/categories.py, sin consultar la base de
+    datos en cada importación.
+    """
+    categories = get_user_categories(user_id)
+    by_id = {category['id']: category['name'] for category in categories}
+    by_name = {}
+    for category in categories:
+        by_name.setdefault(category['name'].lower(), category['id'])
+    return by_id, by_name
+
+
+def validate_rows(user_id, rows):
+    """Valida todas las filas en una pasada.
+
+    Devuelve (válidas, errores): las válidas son dicts listos para insertar
+    y cada error es {'row': posición (desde 1), 'message': ...}.
+    """
+    by_id, by_name = load_category_map(user_id)
+    valid, errors = [], []
+
+    for position, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': position, 'message': 'Formato de fila inválido'})
+            continue
+
+        try:
+            amount = Decimal(str(row.get('amount', '')).replace(',', '.')).quantize(Decimal('0.01'))
+        except (InvalidOperation, ValueError):
+            errors.append({'row': position, 'message': 'Monto inválido'})
+            continue
+        if amount <= 0 or amount > MAX_AMOUNT:
+            errors.append({'row': position, 'message': 'El monto debe ser positivo'})
+            continue
+
+        trans_type = str(row.get('type') or '').upper()
+        if trans_type not in VALID_TYPES:
+            errors.append({'row': position, 'message': 'Tipo de transacción inválido'})
+            continue
+
+        try:
+            transaction_date = datetime.strptime(str(row.get('date') or ''), '%Y-%m-%d').date()
+        except ValueError:
+            errors.append({'row': position, 'message': 'Formato de fecha inválido'})
+            continue
+
+        category_id = None
+        if row.get('category_id') not in (None, ''):
+            try:
+                category_id = int(row['category_id'])
+            except (TypeError, ValueError):
+                category_id = None
+            if category_id not in by_id:
+                category_id = None
+        elif row.get('category'):
+            category_id = by_name.get(str(row['category']).lower())
+        if category_id is None:
+            errors.append({'row': position, 'message': 'Categoría no encontrada'})
+            continue
+
+        valid.append({
+            'row': position,
+            'user_id': user_id,
+            'category_id': category_id,
+            'amount': amount,
+            'type': trans_type,
+            'description': row.get('description') or None,
+            'transaction_date': transaction_date,
+        })
+
+    return valid, errors
+
+
+# --- INSERCIÓN ---
+
+def insert_transactions(valid_rows, chunk_size):
+    """Inserta las filas validadas en bloques, cada uno en su propia transacción.
+
+    Los rollups mensuales se actualizan con un delta agregado por bloque.
+    Devuelve (insertadas, errores) con un error por fila de los bloques fallidos.
+    """
+    inserted, errors = 0, []
+    table = Transaction.__table__
+
+    for start in range(0, len(valid_rows), chunk_size):
+        chunk = valid_rows[start:start + chunk_size]
+        values = [{key: value for key, value in row.items() if key != 'row'} for row in chunk]
+
+        deltas = defaultdict(lambda: [Decimal('0'), 0])
+        for row in values:
+            key = (row['user_id'], row['transaction_date'].replace(day=1), row['category_id'], row['type'])
+            deltas[key][0] += row['amount']
+            deltas[key][1] += 1
+
+        try:
+            versions = {user_id: bump_data_version(user_id) for user_id in {row['user_id'] for row in values}}
+            for row in values:
+                row['change_version'] = versions[row['user_id']]
+            db.session.execute(table.insert(), values)
+            for (user_id, month, category_id, trans_type), (amount, count) in deltas.items():
+                apply_rollup_delta(user_id, month, category_id, trans_type, amount, count)
+            db.session.commit()
+            inserted += len(chunk)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error al insertar bloque de transacciones: {e}")
+            errors.extend({'row': row['row'], 'message': 'Error interno al guardar la fila'} for row in chunk)
+
+    return inserted, errors
@@ -0,0 +1,74 @@
+# Archivo: app/json_provider.py
+"""Proveedor JSON de Flask basado en orjson.
+
+Serializa de forma nativa `Decimal`, `date`/`datetime` y filas de SQLAlchemy
+(`Row`), así que los handlers pueden devolver los valores de las columnas
+sin convertirlos uno a uno. Si orjson no está instalado se usa el módulo
+`json` de la biblioteca estándar con el mismo tratamiento de tipos.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+from sqlalchemy.engine import Row
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def _default(value):
+    """Convierte los tipos que el codificador no conoce."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Row):
+        return value._asdict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    """JSONProvider compacto por defecto; `pretty` activa la indentación."""
+
+    mimetype = 'application/json'
+    sort_keys = False
+    pretty = False
+
+    def dumps_bytes(self, obj):
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            if self.pretty:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, default=_default, option=option)
+
+        if self.pretty:
+            text = json.dumps(obj, default=_default, sort_keys=self.sort_keys, ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(obj, default=_default, sort_keys=self.sort_keys, ensure_ascii=False, separators=(',', ':'))
+        return text.encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None:
+            return orjson.loads(s)
+        return json.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Instala el proveedor JSON en la aplicación."""
+    provider = FastJSONProvider(app)
+    provider.sort_keys = app.config['JSON_SORT_KEYS']
+    provider.pretty = app.config['JSON_PRETTYPRINT']
+    app.json = provider
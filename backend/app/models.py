@@ -9,11 +9,25 @@ class User(db.Model):
     full_name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(100), unique=True, nullable=False, index=True)
     password_hash = db.Column(db.String(255), nullable=False)
+    # Se incrementa para invalidar los tokens emitidos anteriormente
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Se incrementa con cada escritura de transacciones o categorías (ETags)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Versión hasta la que se purgaron las bajas de sincronización (ver app/sync.py)
+    sync_floor = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Fecha de su transacción archivada más reciente (ver app/archive.py); NULL si no tiene
+    archived_until = db.Column(db.Date, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relaciones
     categories = db.relationship('Category', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
     transactions = db.relationship('Transaction', backref='user_transactions', lazy='dynamic', cascade='all, delete-orphan')
+    monthly_rollups = db.relationship('MonthlyRollup', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
+    report_jobs = db.relationship('ReportJob', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
+    deleted_records = db.relationship('DeletedRecord', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
+    archived_transactions = db.relationship('ArchivedTransaction', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
+    shard_assignment = db.relationship('UserShard', backref='owner', uselist=False, cascade='all, delete-orphan')
+    recurring_rules = db.relationship('RecurringRule', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
 
     def __repr__(self):
         return f"<User {self.email}>"
@@ -26,6 +40,13 @@ class Category(db.Model):
     name = db.Column(db.String(50), nullable=False)
     type = db.Column(db.String(10), nullable=False, default='EXPENSE')
     is_default = db.Column(db.Boolean, default=False)
+    # data_version del usuario en la última escritura (sincronización delta)
+    change_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_categories_user_change_version', 'user_id', 'change_version'),
+    )
 
     # Relación
     transactions = db.relationship('Transaction', backref='category_ref', lazy='dynamic', cascade='all, delete-orphan')
@@ -33,6 +54,19 @@ class Category(db.Model):
     def __repr__(self):
         return f"<Category {self.name} ({self.type})>"
 
+class CategoryTemplate(db.Model):
+    """Categorías que se crean para cada usuario nuevo (ver app/provisioning.py)."""
+    __tablename__ = 'category_templates'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    type = db.Column(db.String(10), nullable=False, default='EXPENSE')
+    position = db.Column(db.Integer, nullable=False, default=0)
+    is_active = db.Column(db.Boolean, nullable=False, default=True, server_default='1')
+
+    def __repr__(self):
+        return f"<CategoryTemplate {self.name} ({self.type})>"
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'
 
@@ -44,6 +78,206 @@ class Transaction(db.Model):
     description = db.Column(db.Text, nullable=True)
     transaction_date = db.Column(db.Date, nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # data_version del usuario en la última escritura (sincronización delta)
+    change_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Regla que generó la transacción (ver app/recurring.py)
+    recurring_rule_id = db.Column(db.Integer, db.ForeignKey('recurring_rules.id'), nullable=True)
+
+    # Índices compuestos para las consultas reales: listados por usuario
+    # ordenados por fecha (keyset sobre fecha, id), sumas por usuario/tipo
+    # en un rango de fechas resueltas solo con el índice y cambios desde
+    # una versión para `GET /api/sync`. La clave única de regla y fecha hace
+    # idempotente la generación de transacciones recurrentes.
+    __table_args__ = (
+        db.UniqueConstraint('recurring_rule_id', 'transaction_date', name='uq_transactions_recurring_rule_date'),
+        db.Index('ix_transactions_user_date_id', 'user_id', 'transaction_date', 'id'),
+        db.Index('ix_transactions_user_type_date_amount', 'user_id', 'type', 'transaction_date', 'amount'),
+        db.Index('ix_transactions_user_change_version', 'user_id', 'change_version'),
+        # Búsqueda de texto en MySQL; en SQLite se usa la tabla FTS5 de app/queries.py
+        db.Index('ix_transactions_description_ft', 'description', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
+    def __repr__(self):
+        return f"<Transaction {self.type} {self.amount}>"
+
+class ArchivedTransaction(db.Model):
+    """Transacción antigua movida fuera de `transactions` (ver app/archive.py).
+
+    Conserva el id y las columnas de la transacción original; solo tiene el
+    índice por usuario y fecha y el FULLTEXT de la búsqueda (para que `q`
+    encuentre lo mismo que en `transactions`), sin los índices de sumas
+    (los totales mensuales siguen en `monthly_rollups`). Es de solo lectura.
+    """
+    __tablename__ = 'transactions_archive'
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False, index=True)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    type = db.Column(db.String(10), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    transaction_date = db.Column(db.Date, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=True)
+    change_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    updated_at = db.Column(db.DateTime, nullable=True, onupdate=datetime.utcnow)
+    recurring_rule_id = db.Column(db.Integer, db.ForeignKey('recurring_rules.id'), nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_transactions_archive_user_date_id', 'user_id', 'transaction_date', 'id'),
+        db.Index('ix_transactions_archive_description_ft', 'description', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
+
+    def __repr__(self):
+        return f"<ArchivedTransaction {self.type} {self.amount}>"
+
+class RecurringRule(db.Model):
+    """Transacción que se repite cada `every` días, semanas, meses o años (ver app/recurring.py).
+
+    El día lo marca `start_date`: `weekday` (semanal), `day_of_month`
+    (mensual y anual) y `month` (anual) se guardan aparte para cruzarlos con
+    `calendar_days`, igual que `anchor`, el índice del periodo de
+    `start_date`. `next_date` es la primera fecha aún no generada.
+    """
+    __tablename__ = 'recurring_rules'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False, index=True)
+    amount = db.Column(db.Numeric(10, 2), nullable=False)
+    type = db.Column(db.String(10), nullable=False)
+    description = db.Column(db.Text, nullable=True)
+    frequency = db.Column(db.String(10), nullable=False)  # DAILY, WEEKLY, MONTHLY, YEARLY
+    every = db.Column(db.Integer, nullable=False, default=1)
+    anchor = db.Column(db.Integer, nullable=False)
+    weekday = db.Column(db.Integer, nullable=True)  # 0 = lunes
+    day_of_month = db.Column(db.Integer, nullable=True)
+    month = db.Column(db.Integer, nullable=True)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=True)
+    next_date = db.Column(db.Date, nullable=False)
+    active = db.Column(db.Boolean, nullable=False, default=True, server_default='1')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_recurring_rules_active_next_date', 'active', 'next_date'),
+    )
+
+    def __repr__(self):
+        return f"<RecurringRule {self.id} {self.frequency}/{self.every}>"
+
+class CalendarDay(db.Model):
+    """Tabla calendario: un día por fila con sus índices de periodo (ver app/recurring.py).
+
+    `day_index` es el ordinal del día, `week_index` las semanas (de lunes a
+    domingo) desde el 1-1-1 y `month_index` = año * 12 + mes - 1.
+    """
+    __tablename__ = 'calendar_days'
+
+    day = db.Column(db.Date, primary_key=True)
+    day_index = db.Column(db.Integer, nullable=False)
+    week_index = db.Column(db.Integer, nullable=False)
+    month_index = db.Column(db.Integer, nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    day_of_month = db.Column(db.Integer, nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = lunes
+    is_month_end = db.Column(db.Boolean, nullable=False)
+
+    def __repr__(self):
+        return f"<CalendarDay {self.day}>"
+
+class UserShard(db.Model):
+    """Shard (bind de base de datos) en el que viven los datos de un usuario.
+
+    Solo se usa en la base principal, que hace de directorio (ver
+    app/shards.py); los usuarios sin fila (o con `shard` NULL) viven en la
+    principal. `moving` congela sus escrituras mientras `flask move-user`
+    los cambia de shard.
+    """
+    __tablename__ = 'user_shards'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    shard = db.Column(db.String(32), nullable=True, index=True)
+    moving = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<UserShard {self.user_id} {self.shard}>"
+
+class DeletedRecord(db.Model):
+    """Baja de una transacción o categoría para la sincronización delta.
+
+    Las filas se borran físicamente de sus tablas (así los listados, índices
+    y rollups no cargan con filas muertas) y aquí queda su id con la versión
+    del borrado. `flask purge-tombstones` elimina las antiguas.
+    """
+    __tablename__ = 'deleted_records'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # 'transaction' o 'category'
+    entity_id = db.Column(db.Integer, nullable=False)
+    change_version = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_deleted_records_user_change_version', 'user_id', 'change_version'),
+        db.Index('ix_deleted_records_deleted_at', 'deleted_at'),
+    )
+
+    def __repr__(self):
+        return f"<DeletedRecord {self.entity} {self.entity_id}>"
+
+class MonthlyRollup(db.Model):
+    """Totales pre-agregados por usuario, mes, categoría y tipo.
+
+    Se mantienen de forma incremental desde el CRUD de transacciones
+    (ver app/rollups.py) y se pueden reconstruir con `flask rebuild-rollups`.
+    """
+    __tablename__ = 'monthly_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    year_month = db.Column(db.String(7), nullable=False)  # 'YYYY-MM'
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    type = db.Column(db.String(10), nullable=False)
+    total = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'year_month', 'category_id', 'type', name='uq_monthly_rollups_key'),
+    )
+
+    def __repr__(self):
+        return f"<MonthlyRollup {self.user_id} {self.year_month} {self.type} {self.total}>"
+
+class ReportJob(db.Model):
+    """Informe de un rango de fechas calculado en segundo plano (ver app/reports.py).
+
+    El resultado se guarda como JSON y se reutiliza mientras no cambie la
+    `data_version` del usuario, así que repetir la misma petición no vuelve
+    a recorrer el historial.
+    """
+    __tablename__ = 'report_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    data_version = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='PENDING')  # PENDING, RUNNING, DONE, FAILED
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_report_jobs_user_range', 'user_id', 'start_date', 'end_date', 'data_version'),
+    )
 
     def __repr__(self):
-        return f"<Transaction {self.type} {self.amount}>"
\ No newline at end of file
+        return f"<ReportJob {self.id} {self.status}>"
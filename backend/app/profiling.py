@@ -0,0 +1,178 @@
+# Archivo: app/profiling.py
+"""Instrumentación por petición: consultas SQL, tiempo de BD y latencias.
+
+Escucha los eventos de ejecución de todos los engines de SQLAlchemy y
+acumula, para la petición en curso, el número de consultas, el tiempo total
+en la base de datos y las sentencias más lentas. Con esos datos:
+
+* con SERVER_TIMING_ENABLED (por defecto solo en desarrollo) añade la
+  cabecera `Server-Timing`, visible en las DevTools del navegador,
+* registra en el log las peticiones que superan los umbrales configurados,
+* alimenta los histogramas que se exponen en `/metrics` en formato Prometheus.
+
+Las métricas son por proceso: con varios workers de gunicorn cada uno
+expone las suyas. `/metrics` solo se registra con METRICS_ENABLED y, si hay
+METRICS_TOKEN, responde 401 a las peticiones sin ese token Bearer.
+"""
+import bisect
+import hmac
+import threading
+import time
+from flask import g, request, has_request_context, Response, current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Límites de los buckets de latencia (segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    """Histogramas y contadores por (endpoint, método), seguros entre hilos."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._requests = {}
+        self._queries = {}
+        self._db_seconds = {}
+
+    def observe(self, endpoint, method, status, seconds, queries, db_seconds):
+        key = (endpoint, method)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                histogram['counts'][index] += 1
+            histogram['sum'] += seconds
+            histogram['count'] += 1
+
+            request_key = (endpoint, method, str(status))
+            self._requests[request_key] = self._requests.get(request_key, 0) + 1
+            self._queries[key] = self._queries.get(key, 0) + queries
+            self._db_seconds[key] = self._db_seconds.get(key, 0.0) + db_seconds
+
+    def render(self):
+        """Devuelve las métricas en el formato de texto de Prometheus."""
+        lines = [
+            '# HELP gestomoney_request_duration_seconds Latencia de las peticiones HTTP.',
+            '# TYPE gestomoney_request_duration_seconds histogram',
+        ]
+        with self._lock:
+            for (endpoint, method), histogram in sorted(self._histograms.items()):
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram['counts']):
+                    cumulative += count
+                    lines.append(f'gestomoney_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'gestomoney_request_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+                lines.append(f'gestomoney_request_duration_seconds_sum{{{labels}}} {histogram["sum"]:.6f}')
+                lines.append(f'gestomoney_request_duration_seconds_count{{{labels}}} {histogram["count"]}')
+
+            lines.append('# HELP gestomoney_requests_total Peticiones HTTP atendidas.')
+            lines.append('# TYPE gestomoney_requests_total counter')
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'gestomoney_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            lines.append('# HELP gestomoney_db_queries_total Consultas SQL ejecutadas por las peticiones.')
+            lines.append('# TYPE gestomoney_db_queries_total counter')
+            for (endpoint, method), count in sorted(self._queries.items()):
+                lines.append(f'gestomoney_db_queries_total{{endpoint="{endpoint}",method="{method}"}} {count}')
+
+            lines.append('# HELP gestomoney_db_seconds_total Tiempo total en la base de datos.')
+            lines.append('# TYPE gestomoney_db_seconds_total counter')
+            for (endpoint, method), seconds in sorted(self._db_seconds.items()):
+                lines.append(f'gestomoney_db_seconds_total{{endpoint="{endpoint}",method="{method}"}} {seconds:.6f}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+            self._queries.clear()
+            self._db_seconds.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+# --- EVENTOS DE SQLALCHEMY ---
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'db_profile' in g:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not (has_request_context() and 'db_profile' in g):
+        return
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    profile = g.db_profile
+    profile['queries'] += 1
+    profile['seconds'] += elapsed
+    slowest = profile['slowest']
+    slowest.append((elapsed, statement))
+    slowest.sort(key=lambda item: item[0], reverse=True)
+    del slowest[profile['keep']:]
+
+
+def init_profiling(app):
+    """Registra los hooks de instrumentación y el endpoint /metrics."""
+    if not app.config['PROFILING_ENABLED']:
+        return
+
+    slow_ms = app.config['SLOW_REQUEST_MS']
+    slow_queries = app.config['SLOW_REQUEST_QUERIES']
+    keep = app.config['PROFILING_SLOWEST_STATEMENTS']
+    server_timing = app.config['SERVER_TIMING_ENABLED']
+
+    @app.before_request
+    def start_profile():
+        g.request_started = time.perf_counter()
+        g.db_profile = {'queries': 0, 'seconds': 0.0, 'slowest': [], 'keep': keep}
+
+    @app.after_request
+    def finish_profile(response):
+        if 'db_profile' not in g:
+            return response
+        total = time.perf_counter() - g.request_started
+        profile = g.db_profile
+
+        if server_timing:
+            response.headers['Server-Timing'] = (
+                f'db;dur={profile["seconds"] * 1000:.2f};desc="{profile["queries"]} queries", '
+                f'app;dur={total * 1000:.2f}'
+            )
+
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        if endpoint != '/metrics':
+            request_metrics.observe(endpoint, request.method, response.status_code,
+                                    total, profile['queries'], profile['seconds'])
+
+        if total * 1000 >= slow_ms or profile['queries'] >= slow_queries:
+            statements = '; '.join(
+                f"{seconds * 1000:.1f} ms: {' '.join(statement.split())[:200]}"
+                for seconds, statement in profile['slowest']
+            )
+            current_app.logger.warning(
+                "Petición lenta %s %s: %.1f ms, %d consultas (%.1f ms en BD). Más lentas: %s",
+                request.method, request.path, total * 1000, profile['queries'],
+                profile['seconds'] * 1000, statements
+            )
+        return response
+
+    if app.config['METRICS_ENABLED']:
+        @app.route('/metrics')
+        def metrics():
+            token = current_app.config['METRICS_TOKEN']
+            if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+                return Response('Unauthorized\n', status=401, mimetype='text/plain')
+            return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
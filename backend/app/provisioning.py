@@ -0,0 +1,130 @@
+# Archivo: app/provisioning.py
+"""Alta de usuarios y de sus categorías iniciales.
+
+Las categorías por defecto salen de la tabla `category_templates` y se
+copian con un único INSERT ... SELECT para cualquier número de usuarios, de
+modo que registrar una cuenta o provisionar miles cuesta las mismas
+sentencias por bloque.
+
+El email duplicado lo detecta el índice único de `users.email`: el alta
+captura el IntegrityError en lugar de consultar antes si el email existe.
+
+Con shards (app/shards.py) la cuenta se crea en la base principal y las
+categorías en el shard asignado, junto a la copia de la fila del usuario;
+todo se confirma en el mismo commit de la sesión.
+"""
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import User, Category, CategoryTemplate
+from app.shards import shard_router, shard_context, assign_users, copy_user_rows
+
+# Plantillas iniciales; la migración siembra las mismas en las bases existentes
+DEFAULT_CATEGORY_TEMPLATES = [
+    {'name': 'Salario', 'type': 'INCOME', 'position': 1},
+    {'name': 'Regalo', 'type': 'INCOME', 'position': 2},
+    {'name': 'Comida y Bebidas', 'type': 'EXPENSE', 'position': 3},
+    {'name': 'Vivienda', 'type': 'EXPENSE', 'position': 4},
+    {'name': 'Transporte', 'type': 'EXPENSE', 'position': 5},
+    {'name': 'Ocio y Viajes', 'type': 'EXPENSE', 'position': 6},
+]
+
+
+@event.listens_for(CategoryTemplate.__table__, 'after_create')
+def _seed_templates(table, connection, **kwargs):
+    # db.create_all() (pruebas, benchmarks) deja la tabla con las plantillas
+    connection.execute(table.insert(), DEFAULT_CATEGORY_TEMPLATES)
+
+
+class EmailAlreadyRegistered(Exception):
+    """Ya existe un usuario con ese email."""
+
+
+def provision_default_categories(user_ids):
+    """Crea las categorías de las plantillas activas para `user_ids` en una sentencia.
+
+    No hace commit. Devuelve el número de categorías creadas.
+    """
+    if not user_ids:
+        return 0
+    templates = CategoryTemplate.__table__
+    select_stmt = db.select(
+        User.__table__.c.id, templates.c.name, templates.c.type, db.literal(True)
+    ).select_from(
+        User.__table__.join(templates, db.true())
+    ).where(
+        User.__table__.c.id.in_(user_ids), templates.c.is_active.is_(True)
+    ).order_by(User.__table__.c.id, templates.c.position, templates.c.id)
+
+    result = db.session.execute(
+        Category.__table__.insert().from_select(['user_id', 'name', 'type', 'is_default'], select_stmt)
+    )
+    return result.rowcount
+
+
+def place_new_users(user_ids):
+    """Asigna shard a usuarios recién creados y crea allí sus categorías. No hace commit.
+
+    Devuelve el número de categorías creadas.
+    """
+    created = 0
+    for key, ids in shard_router.place(user_ids).items():
+        if key is not None:
+            assign_users(ids, key)
+            copy_user_rows(ids, None, key)
+        with shard_context(key):
+            created += provision_default_categories(ids)
+    return created
+
+
+def register_user(email, full_name, password_hash):
+    """Crea el usuario y sus categorías. Lanza EmailAlreadyRegistered. No hace commit."""
+    user = User(full_name=full_name, email=email, password_hash=password_hash)
+    db.session.add(user)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        raise EmailAlreadyRegistered()
+    place_new_users([user.id])
+    return user
+
+
+def provision_users(accounts, chunk_size):
+    """Alta masiva: `accounts` es una lista de dicts con email, full_name y password_hash.
+
+    Por bloque: un SELECT de los emails ya existentes (que se omiten), un
+    INSERT multi-fila de usuarios, un SELECT de sus ids y un INSERT ... SELECT
+    de categorías. Cada bloque se confirma por separado. Devuelve el nº de
+    usuarios creados y la lista de cuentas omitidas.
+    """
+    created, skipped = 0, []
+    for start in range(0, len(accounts), chunk_size):
+        chunk = accounts[start:start + chunk_size]
+        emails = [account['email'] for account in chunk]
+        try:
+            existing = {email for (email,) in db.session.query(User.email).filter(User.email.in_(emails))}
+            new_accounts, seen = [], set(existing)
+            for account in chunk:
+                if account['email'] in seen:
+                    skipped.append(account)
+                    continue
+                seen.add(account['email'])
+                new_accounts.append(account)
+
+            if new_accounts:
+                db.session.execute(User.__table__.insert(), [
+                    {'email': account['email'], 'full_name': account['full_name'],
+                     'password_hash': account['password_hash']}
+                    for account in new_accounts
+                ])
+                user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(
+                    User.email.in_([account['email'] for account in new_accounts])
+                )]
+                place_new_users(user_ids)
+            db.session.commit()
+            created += len(new_accounts)
+        except Exception:
+            db.session.rollback()
+            raise
+    return created, skipped
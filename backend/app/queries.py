@@ -0,0 +1,304 @@
+# Archivo: app/queries.py
+"""Construcción de las consultas de transacciones a partir de los parámetros.
+
+Centraliza los filtros (fechas, tipo, categorías, importes y búsqueda de
+texto), el orden y la paginación por keyset para que el listado, la
+exportación y las operaciones por lotes interpreten los parámetros igual.
+
+La búsqueda de texto usa el índice FULLTEXT de MySQL, la tabla FTS5
+`<tabla>_fts` en SQLite y un LIKE en cualquier otro motor.
+
+Las funciones que construyen consultas aceptan `entity` para aplicarse
+igual al archivo de transacciones antiguas (`ArchivedTransaction`, ver
+app/archive.py). El archivo tiene su propio índice de texto, así que una
+búsqueda encuentra las mismas filas a ambos lados, y el texto se ordena
+por código de carácter en todos los motores para que los listados que
+mezclan las dos tablas puedan intercalarlas en Python.
+"""
+import base64
+import json
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import event, DDL
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from app import db
+from app.models import Transaction, ArchivedTransaction, Category
+
+MAX_PAGE_SIZE = 500
+
+
+class binary_text(FunctionElement):
+    """Texto comparado por código de carácter, como `str` en Python.
+
+    En MySQL la collation de las tablas (utf8mb4_0900_ai_ci) no distingue
+    mayúsculas ni acentos y no hay forma exacta de reproducirla en Python;
+    SQLite ya compara en binario.
+    """
+    type = db.String()
+    inherit_cache = True
+
+
+@compiles(binary_text)
+def _compile_binary_text(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(binary_text, 'mysql')
+def _compile_binary_text_mysql(element, compiler, **kw):
+    return f"({compiler.process(element.clauses, **kw)} COLLATE utf8mb4_0900_bin)"
+
+
+# Claves de orden admitidas (columna según la entidad consultada). Las
+# columnas que admiten NULL se ordenan con COALESCE para que la comparación
+# del cursor sea total, y el texto libre en binario (`binary_text`).
+SORT_KEYS = {
+    'date': lambda entity: entity.transaction_date,
+    'amount': lambda entity: entity.amount,
+    'type': lambda entity: entity.type,
+    'description': lambda entity: binary_text(db.func.coalesce(entity.description, '')),
+    'category': lambda entity: binary_text(db.func.coalesce(Category.name, '')),
+}
+DEFAULT_SORT = 'date'
+
+_SEARCH_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+class FilterError(ValueError):
+    """Parámetro de filtro, orden o paginación inválido (respuesta 400)."""
+
+
+# --- TABLAS FTS5 PARA SQLITE ---
+# En MySQL los índices FULLTEXT los crea la migración; en SQLite (pruebas y
+# benchmarks) mantenemos una tabla FTS5 de contenido externo con triggers
+# por cada tabla de transacciones (la caliente y el archivo).
+
+def sqlite_fts_ddl(table):
+    """Sentencias que crean `<table>_fts` y los triggers que la mantienen."""
+    fts = f'{table}_fts'
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"description, content='{table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF description ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description); "
+        f"INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description); END",
+    ]
+
+
+for _table in (Transaction.__table__, ArchivedTransaction.__table__):
+    for _statement in sqlite_fts_ddl(_table.name):
+        event.listen(_table, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+
+# --- CURSORES ---
+
+def encode_cursor(sort_key, value, transaction_id):
+    """Codifica la posición de la última fila devuelta para el orden `sort_key`."""
+    if isinstance(value, Decimal):
+        value = str(value)
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = json.dumps({'k': sort_key, 'v': value, 'id': transaction_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort_key):
+    """Decodifica un cursor generado con el mismo orden. Lanza FilterError si no es válido."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        if data['k'] != sort_key:
+            raise ValueError('El cursor corresponde a otro orden')
+        value = data['v']
+        if sort_key == 'date':
+            value = datetime.strptime(value, '%Y-%m-%d').date()
+        elif sort_key == 'amount':
+            value = Decimal(value)
+        return value, int(data['id'])
+    except Exception as e:
+        raise FilterError('Cursor de paginación inválido') from e
+
+
+# --- FILTROS ---
+
+def _parse_date(value, message):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise FilterError(message)
+
+
+def _parse_amount(value, message):
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise FilterError(message)
+
+
+def parse_transaction_filters(args):
+    """Lee y valida los filtros de `request.args` o de un dict JSON.
+
+    En un dict JSON `category_ids` puede ser también una lista.
+    """
+    filters = {}
+
+    if args.get('start_date'):
+        filters['start_date'] = _parse_date(args['start_date'], 'Formato de fecha de inicio inválido')
+    if args.get('end_date'):
+        filters['end_date'] = _parse_date(args['end_date'], 'Formato de fecha de fin inválido')
+
+    transaction_type = args.get('type')
+    if transaction_type and transaction_type in ['INCOME', 'EXPENSE']:
+        filters['type'] = transaction_type
+
+    category_ids = set()
+    raw_ids = args.get('category_ids') or ''
+    if isinstance(raw_ids, str):
+        raw_ids = raw_ids.split(',')
+    raw_ids = [args.get('category_id')] + list(raw_ids)
+    for raw in raw_ids:
+        if raw not in (None, ''):
+            try:
+                category_ids.add(int(raw))
+            except (TypeError, ValueError):
+                raise FilterError('Identificador de categoría inválido')
+    if category_ids:
+        filters['category_ids'] = sorted(category_ids)
+
+    if args.get('min_amount'):
+        filters['min_amount'] = _parse_amount(args['min_amount'], 'Monto mínimo inválido')
+    if args.get('max_amount'):
+        filters['max_amount'] = _parse_amount(args['max_amount'], 'Monto máximo inválido')
+
+    search = (args.get('q') or '').strip()
+    if search:
+        filters['q'] = search
+
+    return filters
+
+
+def parse_sort(args):
+    """Devuelve (clave, descendente) a partir de `sort` ('-amount', 'date'...) y `order`."""
+    sort = args.get('sort') or DEFAULT_SORT
+    descending = True
+    if sort.startswith('-'):
+        sort = sort[1:]
+    elif sort.startswith('+'):
+        sort, descending = sort[1:], False
+    elif args.get('sort'):
+        descending = False
+
+    order = args.get('order')
+    if order in ('asc', 'desc'):
+        descending = order == 'desc'
+
+    if sort not in SORT_KEYS:
+        raise FilterError(f"Orden no soportado (usa {', '.join(SORT_KEYS)})")
+    return sort, descending
+
+
+def search_condition(search, dialect=None, entity=Transaction):
+    """Condición de búsqueda de texto sobre la descripción según el motor."""
+    terms = _SEARCH_TERM.findall(search)
+    dialect = dialect or db.engine.dialect.name
+    # `transactions` y `transactions_archive` tienen cada una su índice de texto
+    table = entity.__tablename__
+
+    if terms and dialect == 'mysql':
+        boolean_query = ' '.join(f'+{term}*' for term in terms)
+        condition = db.text(f'MATCH ({table}.description) AGAINST (:ft_query IN BOOLEAN MODE)').bindparams(
+            ft_query=boolean_query
+        )
+    elif terms and dialect == 'sqlite':
+        fts_query = ' '.join(f'"{term}"*' for term in terms)
+        condition = entity.id.in_(
+            db.select(db.literal_column('rowid')).select_from(db.table(f'{table}_fts')).where(
+                db.text(f'{table}_fts MATCH :fts_query').bindparams(fts_query=fts_query)
+            )
+        )
+    else:
+        condition = entity.description.ilike(f'%{search}%')
+
+    # Como en el buscador del frontend, un número también busca por importe
+    try:
+        amount = Decimal(search.replace(',', '.'))
+        condition = db.or_(condition, entity.amount == amount)
+    except (InvalidOperation, ValueError):
+        pass
+    return condition
+
+
+def apply_transaction_filters(query, user_id, filters, dialect=None, entity=Transaction):
+    """Aplica los filtros ya validados a una consulta (Query o select) sobre `entity`."""
+    query = query.filter(entity.user_id == user_id)
+    if 'start_date' in filters:
+        query = query.filter(entity.transaction_date >= filters['start_date'])
+    if 'end_date' in filters:
+        query = query.filter(entity.transaction_date <= filters['end_date'])
+    if 'type' in filters:
+        query = query.filter(entity.type == filters['type'])
+    if 'category_ids' in filters:
+        query = query.filter(entity.category_id.in_(filters['category_ids']))
+    if 'min_amount' in filters:
+        query = query.filter(entity.amount >= filters['min_amount'])
+    if 'max_amount' in filters:
+        query = query.filter(entity.amount <= filters['max_amount'])
+    if 'q' in filters:
+        query = query.filter(search_condition(filters['q'], dialect, entity))
+    return query
+
+
+def transaction_list_query(user_id, filters, sort_key=DEFAULT_SORT, descending=True, entity=Transaction):
+    """Consulta (transacción, nombre de categoría) filtrada y ordenada, con un solo JOIN."""
+    query = db.session.query(entity, Category.name).outerjoin(
+        Category, Category.id == entity.category_id
+    )
+    query = apply_transaction_filters(query, user_id, filters, entity=entity)
+    return _order(query, sort_key, descending, entity)
+
+
+def transaction_list_statement(user_id, filters, sort_key, descending, dialect):
+    """Equivalente a `transaction_list_query` como `select()` (para sesiones asíncronas)."""
+    statement = db.select(Transaction, Category.name).outerjoin(
+        Category, Category.id == Transaction.category_id
+    )
+    statement = apply_transaction_filters(statement, user_id, filters, dialect)
+    return _order(statement, sort_key, descending)
+
+
+def _order(query, sort_key, descending, entity=Transaction):
+    sort_column = SORT_KEYS[sort_key](entity)
+    if descending:
+        return query.order_by(sort_column.desc(), entity.id.desc())
+    return query.order_by(sort_column.asc(), entity.id.asc())
+
+
+def keyset_condition(sort_key, descending, value, last_id, entity=Transaction):
+    """Condición para las filas posteriores a (value, last_id) en el orden dado."""
+    sort_column = SORT_KEYS[sort_key](entity)
+    if descending:
+        return db.or_(sort_column < value, db.and_(sort_column == value, entity.id < last_id))
+    return db.or_(sort_column > value, db.and_(sort_column == value, entity.id > last_id))
+
+
+def apply_cursor(query, cursor, sort_key, descending, entity=Transaction):
+    """Añade la condición keyset para continuar después de `cursor`."""
+    value, last_id = decode_cursor(cursor, sort_key)
+    return query.filter(keyset_condition(sort_key, descending, value, last_id, entity))
+
+
+def cursor_value(transaction, category_name, sort_key):
+    """Valor de la clave de orden para una fila devuelta."""
+    if sort_key == 'date':
+        return transaction.transaction_date
+    if sort_key == 'amount':
+        return transaction.amount
+    if sort_key == 'type':
+        return transaction.type
+    if sort_key == 'description':
+        return transaction.description or ''
+    return category_name or ''
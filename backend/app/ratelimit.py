@@ -0,0 +1,231 @@
+# Archivo: app/ratelimit.py
+"""Limitación de peticiones con token buckets por IP, usuario y endpoint.
+
+Cada petición consume de hasta tres cubos:
+
+* `ip:<dirección>` en todas las rutas `/api` (before_request),
+* `endpoint:<endpoint>:<dirección>` en las rutas con límite propio
+  (RATELIMIT_ENDPOINTS; p. ej. login y registro, que hacen bcrypt),
+* `user:<id>` en las rutas autenticadas (desde `token_required`).
+
+Los cubos por IP y por usuario se gastan según el coste de la ruta
+(`rate_cost`), de modo que una exportación o un listado sin paginar gastan
+más que un GET paginado; los límites por endpoint cuentan peticiones.
+Al agotarse un cubo se responde 429 con `Retry-After`.
+
+Los cubos viven en memoria del proceso por defecto. Con
+`RATELIMIT_BACKEND=redis` se comparten entre workers (requiere el paquete
+`redis`): el cubo se actualiza con un script Lua atómico y, si Redis no
+responde, la petición se deja pasar.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from flask import request, jsonify, current_app
+
+# Hijo del logger de la app Flask; también se usa fuera de su contexto (ASGI)
+logger = logging.getLogger(__name__)
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class RateLimit:
+    """Cubo de `capacity` fichas que se rellena a `rate` fichas por segundo."""
+
+    def __init__(self, capacity, rate):
+        self.capacity = capacity
+        self.rate = rate
+
+    @classmethod
+    def parse(cls, spec):
+        """Lee un límite con el formato '<n>/<second|minute|hour|day>'."""
+        try:
+            amount, period = spec.split('/')
+            amount = int(amount)
+            seconds = PERIODS[period.strip().rstrip('s')]
+        except (AttributeError, ValueError, KeyError):
+            raise ValueError(f"Límite inválido: {spec!r} (usa p. ej. '60/minute')")
+        if amount <= 0:
+            raise ValueError(f"Límite inválido: {spec!r}")
+        return cls(amount, amount / seconds)
+
+    def __repr__(self):
+        return f"<RateLimit {self.capacity} @ {self.rate:.3f}/s>"
+
+
+class LocalBuckets:
+    """Cubos en memoria (LRU acotada), seguros entre hilos.
+
+    Un cubo expulsado equivale a uno lleno, así que la expulsión solo puede
+    hacer el límite más permisivo, nunca bloquear de más.
+    """
+
+    def __init__(self, max_size=100000, clock=time.monotonic):
+        self.max_size = max_size
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, limit, cost):
+        """Gasta `cost` fichas. Devuelve (permitido, segundos hasta poder reintentar)."""
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.capacity, now))
+            tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+            if tokens >= cost:
+                allowed, wait = True, 0.0
+                tokens -= cost
+            else:
+                allowed, wait = False, (cost - tokens) / limit.rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Fichas y marca de tiempo en un hash; la hora la pone el servidor Redis
+# para que todos los workers usen el mismo reloj.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(wait)}
+"""
+
+
+class RedisBuckets:
+    """Cubos compartidos en Redis (o cualquier cliente con `register_script`)."""
+
+    def __init__(self, client, prefix='gestomoney:rl:'):
+        self.client = client
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, key, limit, cost):
+        try:
+            allowed, wait = self._script(keys=[self.prefix + key], args=[limit.capacity, limit.rate, cost])
+        except Exception as e:
+            # Sin Redis no se limita: mejor servir de más que rechazar a todos
+            logger.warning("Rate limiting desactivado temporalmente: %s", e)
+            return True, 0.0
+        return bool(allowed), float(wait)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class RateLimiter:
+    """Punto de acceso global; backend y límites se fijan en `init_rate_limit`."""
+
+    def __init__(self):
+        self.enabled = False
+        self.backend = LocalBuckets()
+        self.ip_limit = None
+        self.user_limit = None
+        self.endpoint_limits = {}
+
+    def hit(self, key, limit, cost=1):
+        """Consume del cubo `key`. Devuelve None si se permite o los segundos a esperar."""
+        if not self.enabled or limit is None:
+            return None
+        # Un coste mayor que el cubo nunca pasaría: se limita a su capacidad
+        allowed, wait = self.backend.consume(key, limit, min(cost, limit.capacity))
+        return None if allowed else wait
+
+    def check_user(self, user_id, cost=1):
+        return self.hit(f"user:{user_id}", self.user_limit, cost)
+
+
+rate_limiter = RateLimiter()
+
+
+def rate_cost(weight):
+    """Fija el coste de una ruta en fichas: un entero o una función de la petición."""
+    def decorator(f):
+        f.rate_cost = weight
+        return f
+    return decorator
+
+
+def request_cost():
+    """Coste de la petición en curso según el `rate_cost` de su vista (1 por defecto)."""
+    view = current_app.view_functions.get(request.endpoint)
+    weight = getattr(view, 'rate_cost', 1)
+    return weight(request) if callable(weight) else weight
+
+
+def client_address():
+    """IP del cliente; con RATELIMIT_TRUSTED_PROXIES > 0 se toma de X-Forwarded-For."""
+    proxies = current_app.config['RATELIMIT_TRUSTED_PROXIES']
+    route = request.access_route
+    if proxies and len(route) >= proxies:
+        return route[-proxies]
+    return request.remote_addr or 'unknown'
+
+
+def too_many_requests(wait):
+    """Respuesta 429 con el tiempo de espera redondeado hacia arriba."""
+    response = jsonify({'message': 'Demasiadas peticiones, inténtalo de nuevo más tarde'})
+    response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+    return response, 429
+
+
+def init_rate_limit(app):
+    """Configura el limitador y registra la comprobación por IP y endpoint."""
+    rate_limiter.enabled = app.config['RATELIMIT_ENABLED']
+    rate_limiter.ip_limit = RateLimit.parse(app.config['RATELIMIT_IP'])
+    rate_limiter.user_limit = RateLimit.parse(app.config['RATELIMIT_USER'])
+    rate_limiter.endpoint_limits = {
+        endpoint: RateLimit.parse(spec) for endpoint, spec in app.config['RATELIMIT_ENDPOINTS'].items()
+    }
+
+    if app.config['RATELIMIT_BACKEND'] == 'redis':
+        import redis
+        client = redis.Redis.from_url(app.config['RATELIMIT_REDIS_URL'])
+        rate_limiter.backend = RedisBuckets(client)
+    else:
+        rate_limiter.backend = LocalBuckets(max_size=app.config['RATELIMIT_MAX_KEYS'])
+
+    if not rate_limiter.enabled:
+        return
+
+    @app.before_request
+    def limit_by_address():
+        if not request.path.startswith('/api/') or request.method == 'OPTIONS':
+            return None
+        address = client_address()
+
+        # El límite propio del endpoint cuenta peticiones; el de la IP, fichas
+        endpoint_limit = rate_limiter.endpoint_limits.get(request.endpoint)
+        wait = rate_limiter.hit(f"endpoint:{request.endpoint}:{address}", endpoint_limit)
+        if wait is None:
+            wait = rate_limiter.hit(f"ip:{address}", rate_limiter.ip_limit, request_cost())
+        if wait is not None:
+            return too_many_requests(wait)
+        return None
+
@@ -0,0 +1,264 @@
+# Archivo: app/rebalance.py
+"""Mudanza de usuarios entre shards en caliente (ver app/shards.py).
+
+`move_user` traslada los datos de un usuario en cuatro pasos:
+
+1. Marca la mudanza en el mapa y espera SHARD_MAP_CACHE_SECONDS para que
+   todos los workers la vean. Desde ese momento sus lecturas siguen en el
+   origen y sus escrituras reciben un 503 con Retry-After.
+2. Copia sus filas al destino por bloques de SHARD_MOVE_CHUNK_SIZE. Los ids
+   de categorías, reglas recurrentes y transacciones son propios de cada
+   base, así que el destino asigna otros nuevos; las transacciones archivadas entran en la
+   tabla caliente y se vuelven a archivar allí. Los informes y las bajas de
+   sincronización no se copian.
+3. Sube `data_version` y `sync_floor` en el destino: como los ids cambian,
+   los clientes reciben el estado completo en su siguiente `GET /api/sync`.
+4. Apunta el mapa al destino, espera otra vez a que caduquen las cachés y
+   borra los datos del origen.
+
+Si la copia falla se borra lo copiado y se libera la marca.
+
+`plan_rebalance` propone movimientos del shard con más transacciones al que
+tiene menos hasta que la diferencia queda dentro de la tolerancia; es lo que
+ejecuta `flask rebalance-shards` tras añadir un shard a DB_SHARD_URIS.
+"""
+import time
+from flask import current_app
+from app import db
+from app.archive import archive_cutoff, archive_transactions
+from app.models import (
+    User, UserShard, Category, Transaction, ArchivedTransaction, MonthlyRollup, ReportJob, DeletedRecord,
+    RecurringRule,
+)
+from app.shards import (
+    ShardError, shard_router, shard_context, each_shard, directory_execute, assign_users, copy_user_rows
+)
+
+# Tablas con datos del usuario, en orden de borrado (las dependientes primero)
+USER_TABLES = (
+    MonthlyRollup, ReportJob, DeletedRecord, ArchivedTransaction, Transaction, RecurringRule, Category
+)
+# Columnas de transacción que se copian; el id (y el de su regla) lo asigna el destino
+TRANSACTION_COLUMNS = (
+    'amount', 'type', 'description', 'transaction_date', 'created_at', 'change_version', 'updated_at'
+)
+
+
+# --- MUDANZA ---
+
+def purge_user_data(user_id, chunk_size, keep_account):
+    """Borra por bloques los datos del usuario en la base del contexto.
+
+    Con `keep_account` se conserva su fila `users` (la cuenta del directorio).
+    Confirma cada bloque.
+    """
+    for entity in USER_TABLES:
+        table = entity.__table__
+        while True:
+            ids = db.session.execute(
+                db.select(table.c.id).where(table.c.user_id == user_id).limit(chunk_size)
+            ).scalars().all()
+            if not ids:
+                break
+            db.session.execute(table.delete().where(table.c.id.in_(ids)))
+            db.session.commit()
+    if not keep_account:
+        db.session.execute(User.__table__.delete().where(User.__table__.c.id == user_id))
+        db.session.commit()
+
+
+def _chunk(entity, user_id, after_id, chunk_size):
+    table = entity.__table__
+    return db.session.execute(
+        db.select(table).where(table.c.user_id == user_id, table.c.id > after_id)
+        .order_by(table.c.id).limit(chunk_size)
+    ).mappings().all()
+
+
+def copy_user_data(user_id, source, target, chunk_size):
+    """Copia categorías, reglas recurrentes, transacciones y rollups del usuario de `source` a `target`.
+
+    Confirma por bloques. Devuelve el número de transacciones copiadas.
+    """
+    categories = Category.__table__
+    with shard_context(source):
+        source_categories = db.session.execute(
+            db.select(categories).where(categories.c.user_id == user_id).order_by(categories.c.id)
+        ).mappings().all()
+    category_ids = {}
+    with shard_context(target):
+        for row in source_categories:
+            values = {name: value for name, value in row.items() if name != 'id'}
+            category_ids[row['id']] = db.session.execute(
+                categories.insert().values(**values)
+            ).inserted_primary_key[0]
+        db.session.commit()
+
+    rules = RecurringRule.__table__
+    with shard_context(source):
+        source_rules = db.session.execute(
+            db.select(rules).where(rules.c.user_id == user_id).order_by(rules.c.id)
+        ).mappings().all()
+    rule_ids = {}
+    with shard_context(target):
+        for row in source_rules:
+            values = {name: value for name, value in row.items() if name != 'id'}
+            values['category_id'] = category_ids[row['category_id']]
+            rule_ids[row['id']] = db.session.execute(
+                rules.insert().values(**values)
+            ).inserted_primary_key[0]
+        db.session.commit()
+
+    copied = archived = 0
+    for entity in (Transaction, ArchivedTransaction):
+        last_id = 0
+        while True:
+            with shard_context(source):
+                rows = _chunk(entity, user_id, last_id, chunk_size)
+            if not rows:
+                break
+            with shard_context(target):
+                db.session.execute(Transaction.__table__.insert(), [
+                    {**{name: row[name] for name in TRANSACTION_COLUMNS},
+                     'user_id': user_id, 'category_id': category_ids[row['category_id']],
+                     'recurring_rule_id': rule_ids.get(row['recurring_rule_id'])}
+                    for row in rows
+                ])
+                db.session.commit()
+            last_id = rows[-1]['id']
+            copied += len(rows)
+            if entity is ArchivedTransaction:
+                archived += len(rows)
+
+    rollups = MonthlyRollup.__table__
+    with shard_context(source):
+        source_rollups = db.session.execute(
+            db.select(rollups).where(rollups.c.user_id == user_id)
+        ).mappings().all()
+    with shard_context(target):
+        if source_rollups:
+            db.session.execute(rollups.insert(), [
+                {**{name: value for name, value in row.items() if name != 'id'},
+                 'category_id': category_ids[row['category_id']]}
+                for row in source_rollups
+            ])
+            db.session.commit()
+        if archived:
+            archive_transactions(
+                archive_cutoff(current_app.config['ARCHIVE_AFTER_MONTHS']), chunk_size, user_id,
+                include_moving=True
+            )
+    return copied
+
+
+def _restart_sync(user_id, source, target):
+    # Ids nuevos en el destino: una versión por encima del origen y suelo de
+    # sincronización en ella, así los clientes piden el estado completo
+    users = User.__table__
+    with shard_context(source):
+        version = db.session.execute(
+            db.select(users.c.data_version).where(users.c.id == user_id)
+        ).scalar() or 0
+    with shard_context(target):
+        db.session.execute(
+            users.update().where(users.c.id == user_id)
+            .values(data_version=version + 1, sync_floor=version + 1)
+        )
+        db.session.commit()
+
+
+def move_user(user_id, target, chunk_size=None, wait=None):
+    """Mueve los datos de `user_id` al shard `target` (None = principal).
+
+    `wait` (por defecto SHARD_MAP_CACHE_SECONDS) es la espera para que los
+    workers vean cada cambio del mapa. Lanza ShardError. Devuelve el número
+    de transacciones movidas.
+    """
+    config = current_app.config
+    chunk_size = chunk_size or config['SHARD_MOVE_CHUNK_SIZE']
+    wait = config['SHARD_MAP_CACHE_SECONDS'] if wait is None else wait
+
+    if directory_execute(db.select(User.id).where(User.id == user_id)).scalar() is None:
+        raise ShardError(f"Usuario no encontrado: {user_id}")
+    shard_router.cache.delete(user_id)
+    source, moving = shard_router.lookup(user_id)
+    if moving:
+        raise ShardError(f"El usuario {user_id} ya se está moviendo")
+    if source == target:
+        return 0
+
+    assign_users([user_id], source, moving=True)
+    db.session.commit()
+    time.sleep(wait)
+
+    try:
+        # Restos de una mudanza anterior interrumpida
+        with shard_context(target):
+            purge_user_data(user_id, chunk_size, keep_account=target is None)
+        if target is not None:
+            copy_user_rows([user_id], source, target)
+            db.session.commit()
+        copied = copy_user_data(user_id, source, target, chunk_size)
+        _restart_sync(user_id, source, target)
+    except Exception:
+        db.session.rollback()
+        with shard_context(target):
+            purge_user_data(user_id, chunk_size, keep_account=target is None)
+        assign_users([user_id], source)
+        db.session.commit()
+        raise
+
+    assign_users([user_id], target)
+    db.session.commit()
+
+    time.sleep(wait)
+    with shard_context(source):
+        purge_user_data(user_id, chunk_size, keep_account=source is None)
+    return copied
+
+
+# --- REPARTO ---
+
+def shard_loads():
+    """{bind o None: {user_id: nº de transacciones}} de todos los shards según el mapa."""
+    assigned = dict(directory_execute(db.select(UserShard.user_id, UserShard.shard)).all())
+    loads = {}
+    for key in each_shard():
+        users = loads[key] = {}
+        for entity in (Transaction, ArchivedTransaction):
+            rows = db.session.execute(db.select(entity.user_id, db.func.count()).group_by(entity.user_id))
+            for user_id, count in rows:
+                # Las filas que quedan de una mudanza interrumpida no cuentan
+                if assigned.get(user_id) == key:
+                    users[user_id] = users.get(user_id, 0) + count
+    return loads
+
+
+def plan_rebalance(loads, max_moves, tolerance):
+    """Movimientos [(user_id, origen, destino, nº de transacciones)] que igualan los shards.
+
+    En cada paso mueve, del shard con más transacciones al que tiene menos,
+    el usuario que deja la diferencia entre ambos más cerca de cero. Para
+    cuando la diferencia no supera `tolerance` veces la media.
+    """
+    loads = {key: dict(users) for key, users in loads.items()}
+    totals = {key: sum(users.values()) for key, users in loads.items()}
+    if len(totals) < 2:
+        return []
+    mean = sum(totals.values()) / len(totals)
+    moves = []
+    while len(moves) < max_moves:
+        heavy = max(totals, key=totals.get)
+        light = min(totals, key=totals.get)
+        gap = totals[heavy] - totals[light]
+        if gap <= tolerance * mean:
+            break
+        candidates = [(count, user_id) for user_id, count in loads[heavy].items() if 0 < count < gap]
+        if not candidates:
+            break
+        count, user_id = min(candidates, key=lambda candidate: abs(gap - 2 * candidate[0]))
+        loads[light][user_id] = loads[heavy].pop(user_id)
+        totals[heavy] -= count
+        totals[light] += count
+        moves.append((user_id, heavy, light, count))
+    return moves
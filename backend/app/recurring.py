@@ -0,0 +1,428 @@
+# Archivo: app/recurring.py
+"""Transacciones recurrentes (`recurring_rules`) y su generación por lotes.
+
+Una regla repite una transacción cada `every` días, semanas, meses o años
+desde `start_date` y hasta `end_date`, si la tiene. El día lo marca
+`start_date`: el mismo día de la semana, del mes (el último en los meses más
+cortos) o del año.
+
+Las ocurrencias vencidas se crean por conjuntos, sin recorrer reglas ni
+fechas en Python. Cada bloque de reglas se cruza con la tabla calendario
+`calendar_days` entre su `next_date` y la fecha límite, y los días que
+encajan con la periodicidad se insertan con un INSERT ... SELECT. Los
+rollups se suman con otro INSERT ... SELECT y la `data_version` de los
+usuarios afectados sube en el mismo commit.
+
+La clave única (recurring_rule_id, transaction_date) de `transactions` hace
+la generación idempotente. `next_date` marca hasta dónde se generó cada
+regla, así que una ocurrencia que el usuario borra no vuelve a aparecer, y
+los cambios de una regla solo afectan a las fechas aún no generadas.
+
+La generación se lanza con `flask materialize-recurring` (desde cron) o,
+con RECURRING_CHECK_MINUTES > 0, la ejecuta un hilo en cada proceso que crea
+la app. En MySQL un bloqueo con nombre hace que solo la haga uno a la vez;
+en otros motores solo la clave única evita los duplicados. Al crear o
+editar una regla se generan en el momento las ocurrencias ya vencidas de
+ese usuario.
+"""
+import atexit
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.categories import find_category
+from app.models import User, Transaction, ArchivedTransaction, RecurringRule, CalendarDay
+from app.replicas import replica_router
+from app.rollups import apply_rollup_deltas, _month_expression
+from app.scheduling import named_lock, PeriodicTask
+from app.shards import each_shard, moving_users
+from app.versioning import bump_data_version
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+VALID_TYPES = ('INCOME', 'EXPENSE')
+MAX_EVERY = 999
+REQUIRED_FIELDS = ('amount', 'type', 'category_id', 'frequency', 'start_date')
+# Campos que cambian los días en que se repite la regla
+SCHEDULE_FIELDS = ('frequency', 'every', 'start_date')
+CALENDAR_CHUNK_SIZE = 1000
+RECURRING_LOCK_NAME = 'gestomoney_recurring'
+
+
+class RecurringRuleError(ValueError):
+    """Operación sobre reglas recurrentes no válida; lleva el código HTTP a devolver."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# --- CALENDARIO ---
+
+def period_index(frequency, value):
+    """Índice del periodo de `value` para la frecuencia (columnas de `calendar_days`)."""
+    if frequency == 'DAILY':
+        return value.toordinal()
+    if frequency == 'WEEKLY':
+        return (value.toordinal() - 1) // 7
+    if frequency == 'MONTHLY':
+        return value.year * 12 + value.month - 1
+    return value.year
+
+
+def calendar_row(day):
+    return {
+        'day': day,
+        'day_index': period_index('DAILY', day),
+        'week_index': period_index('WEEKLY', day),
+        'month_index': period_index('MONTHLY', day),
+        'year': day.year,
+        'month': day.month,
+        'day_of_month': day.day,
+        'weekday': day.weekday(),
+        'is_month_end': (day + timedelta(days=1)).month != day.month,
+    }
+
+
+def ensure_calendar(first, last):
+    """Completa `calendar_days` para que cubra de `first` a `last` sin huecos. Confirma."""
+    table = CalendarDay.__table__
+    low, high = db.session.execute(db.select(db.func.min(table.c.day), db.func.max(table.c.day))).one()
+    if low is None:
+        ranges = [(first, last)]
+    else:
+        ranges = [(first, low - timedelta(days=1)), (high + timedelta(days=1), last)]
+
+    for start, end in ranges:
+        days = [calendar_row(start + timedelta(days=offset)) for offset in range((end - start).days + 1)]
+        for index in range(0, len(days), CALENDAR_CHUNK_SIZE):
+            try:
+                db.session.execute(table.insert(), days[index:index + CALENDAR_CHUNK_SIZE])
+                db.session.commit()
+            except IntegrityError:
+                # Otro proceso ha completado los mismos días a la vez
+                db.session.rollback()
+
+
+# --- GENERACIÓN ---
+
+def _schedule_condition(rules, days):
+    # Días del calendario en los que toca la regla: su periodo está a un
+    # múltiplo de `every` del de `start_date` y coincide el día de la semana,
+    # el mes o el día del mes (o es fin de mes y el mes es más corto)
+    period = db.case(
+        (rules.c.frequency == 'DAILY', days.c.day_index),
+        (rules.c.frequency == 'WEEKLY', days.c.week_index),
+        (rules.c.frequency == 'MONTHLY', days.c.month_index),
+        else_=days.c.year,
+    )
+    return db.and_(
+        (period - rules.c.anchor) % rules.c.every == 0,
+        db.or_(rules.c.weekday.is_(None), days.c.weekday == rules.c.weekday),
+        db.or_(rules.c.month.is_(None), days.c.month == rules.c.month),
+        db.or_(
+            rules.c.day_of_month.is_(None),
+            days.c.day_of_month == rules.c.day_of_month,
+            db.and_(days.c.is_month_end.is_(True), days.c.day_of_month < rules.c.day_of_month),
+        ),
+    )
+
+
+def occurrences_statement(until, conditions):
+    """SELECT de las ocurrencias pendientes hasta `until` de las reglas que cumplen `conditions`."""
+    rules = RecurringRule.__table__
+    days = CalendarDay.__table__
+    hot = Transaction.__table__
+    return db.select(
+        rules.c.id.label('rule_id'), rules.c.user_id, rules.c.category_id, rules.c.amount,
+        rules.c.type, rules.c.description, days.c.day,
+    ).join_from(rules, days, db.and_(
+        days.c.day >= rules.c.next_date,
+        days.c.day <= until,
+        db.or_(rules.c.end_date.is_(None), days.c.day <= rules.c.end_date),
+    )).where(
+        *conditions,
+        _schedule_condition(rules, days),
+        ~db.exists().where(hot.c.recurring_rule_id == rules.c.id, hot.c.transaction_date == days.c.day),
+    )
+
+
+def _materialize(conditions, until):
+    """Crea las ocurrencias pendientes de las reglas que cumplen `conditions`. No hace commit.
+
+    Devuelve el nº de transacciones creadas y {user_id: (primera fecha, última fecha)}.
+    """
+    rules = RecurringRule.__table__
+    users = User.__table__
+    occurrences = occurrences_statement(until, conditions).subquery()
+    spans = {
+        user_id: (first, last) for user_id, first, last in db.session.execute(
+            db.select(occurrences.c.user_id, db.func.min(occurrences.c.day), db.func.max(occurrences.c.day))
+            .group_by(occurrences.c.user_id)
+        )
+    }
+
+    created = 0
+    if spans:
+        db.session.execute(
+            users.update().where(users.c.id.in_(list(spans)))
+            .values(data_version=users.c.data_version + 1)
+        )
+        # Los rollups se suman antes del INSERT: después las ocurrencias ya
+        # no estarían pendientes
+        year_month = _month_expression(occurrences.c.day)
+        apply_rollup_deltas(
+            db.select(
+                occurrences.c.user_id, year_month, occurrences.c.category_id, occurrences.c.type,
+                db.func.sum(occurrences.c.amount), db.func.count(),
+            ).group_by(occurrences.c.user_id, year_month, occurrences.c.category_id, occurrences.c.type)
+        )
+        now = datetime.utcnow()
+        created = db.session.execute(Transaction.__table__.insert().from_select(
+            ['user_id', 'category_id', 'amount', 'type', 'description', 'transaction_date',
+             'created_at', 'change_version', 'updated_at', 'recurring_rule_id'],
+            db.select(
+                occurrences.c.user_id, occurrences.c.category_id, occurrences.c.amount, occurrences.c.type,
+                occurrences.c.description, occurrences.c.day, db.literal(now), users.c.data_version,
+                db.literal(now), occurrences.c.rule_id,
+            ).join_from(occurrences, users, users.c.id == occurrences.c.user_id)
+        )).rowcount
+
+    # Las reglas cuyo fin ya pasó se desactivan para no volver a revisarlas
+    next_date = until + timedelta(days=1)
+    db.session.execute(
+        rules.update().where(*conditions).values(
+            next_date=next_date,
+            active=db.or_(rules.c.end_date.is_(None), rules.c.end_date >= next_date),
+        )
+    )
+    return created, spans
+
+
+def materialize_recurring(until, chunk_size, user_id=None):
+    """Genera las ocurrencias vencidas hasta `until` en la base del contexto.
+
+    Recorre las reglas por bloques de `chunk_size` ids y confirma cada
+    bloque. Con `user_id` solo las de ese usuario. Las reglas de usuarios
+    que se están cambiando de shard se dejan para la siguiente pasada.
+    Devuelve el número de transacciones creadas.
+    """
+    rules = RecurringRule.__table__
+    due = [rules.c.active.is_(True), rules.c.next_date <= until]
+    if user_id is not None:
+        due.append(rules.c.user_id == user_id)
+    first = db.session.execute(db.select(db.func.min(rules.c.next_date)).where(*due)).scalar()
+    if first is None:
+        return 0
+    ensure_calendar(first, until)
+
+    moving = moving_users()
+    if moving:
+        due.append(rules.c.user_id.notin_(moving))
+    created = last_id = 0
+    while True:
+        ids = db.session.execute(
+            db.select(rules.c.id).where(*due, rules.c.id > last_id).order_by(rules.c.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return created
+
+        try:
+            count, spans = _materialize([*due, rules.c.id >= ids[0], rules.c.id <= ids[-1]], until)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        created += count
+        last_id = ids[-1]
+        for changed_user_id in spans:
+            replica_router.note_write(changed_user_id)
+
+
+def run_scheduled_recurring():
+    """Genera en cada shard las ocurrencias vencidas si nadie más lo está haciendo.
+
+    Requiere contexto de app.
+    """
+    until = date.today()
+    created = 0
+    with named_lock(RECURRING_LOCK_NAME) as acquired:
+        if not acquired:
+            return 0
+        for _ in each_shard():
+            created += materialize_recurring(until, current_app.config['RECURRING_CHUNK_SIZE'])
+    if created:
+        current_app.logger.info("Recurrentes: %s transacciones generadas hasta %s", created, until)
+    return created
+
+
+recurring_scheduler = PeriodicTask(
+    run_scheduled_recurring, 'recurring-scheduler', "Error al generar las transacciones recurrentes"
+)
+atexit.register(recurring_scheduler.stop)
+
+
+def init_recurring(app):
+    """Arranca la generación periódica si RECURRING_CHECK_MINUTES > 0."""
+    minutes = app.config['RECURRING_CHECK_MINUTES']
+    if minutes > 0 and not app.config.get('TESTING'):
+        recurring_scheduler.start(app, minutes * 60)
+    else:
+        recurring_scheduler.stop()
+
+
+# --- REGLAS ---
+
+def serialize_rule(rule):
+    return {
+        'id': rule.id,
+        'amount': rule.amount,
+        'type': rule.type,
+        'description': rule.description,
+        'category_id': rule.category_id,
+        'frequency': rule.frequency,
+        'every': rule.every,
+        'start_date': rule.start_date,
+        'end_date': rule.end_date,
+        'next_date': rule.next_date,
+        'active': rule.active,
+    }
+
+
+def list_rules(user_id):
+    rules = RecurringRule.query.filter_by(user_id=user_id).order_by(RecurringRule.id).all()
+    return [serialize_rule(rule) for rule in rules]
+
+
+def _require(user_id, rule_id):
+    rule = RecurringRule.query.filter_by(id=rule_id, user_id=user_id).first()
+    if rule is None:
+        raise RecurringRuleError('Regla recurrente no encontrada', 404)
+    return rule
+
+
+def _parse_date(value, field):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise RecurringRuleError(f'Fecha inválida en {field} (formato YYYY-MM-DD)')
+
+
+def _apply(rule, user_id, data):
+    """Valida los campos de `data` y los aplica a `rule` (nueva o existente)."""
+    if 'amount' in data:
+        try:
+            amount = Decimal(str(data['amount']))
+        except InvalidOperation:
+            raise RecurringRuleError('El monto debe ser un número')
+        if amount <= 0:
+            raise RecurringRuleError('El monto debe ser positivo')
+        rule.amount = amount
+
+    if 'type' in data:
+        trans_type = str(data['type']).upper()
+        if trans_type not in VALID_TYPES:
+            raise RecurringRuleError('Tipo de transacción inválido')
+        rule.type = trans_type
+
+    if 'category_id' in data:
+        try:
+            category_id = int(data['category_id'])
+        except (TypeError, ValueError):
+            raise RecurringRuleError('Categoría inválida')
+        if find_category(user_id, category_id) is None:
+            raise RecurringRuleError('Categoría no encontrada', 404)
+        rule.category_id = category_id
+
+    if 'description' in data:
+        rule.description = data['description']
+
+    if 'frequency' in data:
+        frequency = str(data['frequency']).upper()
+        if frequency not in FREQUENCIES:
+            raise RecurringRuleError(f"Frecuencia inválida; usa {', '.join(FREQUENCIES)}")
+        rule.frequency = frequency
+
+    if 'every' in data:
+        try:
+            every = int(data['every'])
+        except (TypeError, ValueError):
+            raise RecurringRuleError('El intervalo (every) debe ser un entero')
+        if not 1 <= every <= MAX_EVERY:
+            raise RecurringRuleError(f'El intervalo (every) debe estar entre 1 y {MAX_EVERY}')
+        rule.every = every
+
+    if 'start_date' in data:
+        start_date = _parse_date(data['start_date'], 'start_date')
+        max_days = current_app.config['RECURRING_MAX_BACKFILL_DAYS']
+        if start_date < date.today() - timedelta(days=max_days):
+            raise RecurringRuleError(f'La fecha de inicio no puede ser anterior a {max_days} días')
+        rule.start_date = start_date
+
+    if 'end_date' in data:
+        rule.end_date = _parse_date(data['end_date'], 'end_date') if data['end_date'] else None
+    if rule.end_date is not None and rule.end_date < rule.start_date:
+        raise RecurringRuleError('La fecha de fin no puede ser anterior a la de inicio')
+
+    if any(field in data for field in SCHEDULE_FIELDS):
+        rule.anchor = period_index(rule.frequency, rule.start_date)
+        rule.weekday = rule.start_date.weekday() if rule.frequency == 'WEEKLY' else None
+        rule.day_of_month = rule.start_date.day if rule.frequency in ('MONTHLY', 'YEARLY') else None
+        rule.month = rule.start_date.month if rule.frequency == 'YEARLY' else None
+        # Lo ya generado no se vuelve a generar
+        rule.next_date = max(rule.next_date or rule.start_date, rule.start_date)
+
+    if 'active' in data:
+        active = bool(data['active'])
+        if active and not rule.active:
+            # Al reanudar no se generan las fechas del tiempo en pausa
+            rule.next_date = max(rule.next_date, date.today())
+        rule.active = active
+
+
+def _materialize_user(user_id):
+    # Las ocurrencias ya vencidas se crean en el momento; si falla, las
+    # generará la siguiente pasada programada
+    try:
+        return materialize_recurring(date.today(), current_app.config['RECURRING_CHUNK_SIZE'], user_id)
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Error al generar las transacciones recurrentes del usuario %s", user_id)
+        return 0
+
+
+def create_rule(user_id, data):
+    """Crea una regla y genera sus ocurrencias vencidas. Devuelve (dict de la regla, nº creadas)."""
+    if any(data.get(field) in (None, '') for field in REQUIRED_FIELDS):
+        raise RecurringRuleError(f"Faltan campos esenciales: {', '.join(REQUIRED_FIELDS)}")
+    rule = RecurringRule(user_id=user_id, every=1, active=True)
+    _apply(rule, user_id, data)
+    db.session.add(rule)
+    bump_data_version(user_id)
+    db.session.commit()
+    created = _materialize_user(user_id)
+    return serialize_rule(rule), created
+
+
+def update_rule(user_id, rule_id, data):
+    """Modifica una regla; vale para las fechas aún no generadas. Devuelve (dict, nº creadas)."""
+    rule = _require(user_id, rule_id)
+    _apply(rule, user_id, data)
+    bump_data_version(user_id)
+    db.session.commit()
+    created = _materialize_user(user_id)
+    return serialize_rule(rule), created
+
+
+def delete_rule(user_id, rule_id):
+    """Borra una regla. Las transacciones que generó se conservan, sin la referencia."""
+    rule = _require(user_id, rule_id)
+    version = bump_data_version(user_id)
+    for table in (Transaction.__table__, ArchivedTransaction.__table__):
+        db.session.execute(
+            table.update()
+            .where(table.c.user_id == user_id, table.c.recurring_rule_id == rule_id)
+            .values(recurring_rule_id=None, change_version=version)
+        )
+    db.session.delete(rule)
+    db.session.commit()
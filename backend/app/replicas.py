@@ -0,0 +1,235 @@
+# Archivo: app/replicas.py
+"""Enrutado de lecturas a réplicas de MySQL.
+
+Las réplicas se declaran en `DB_REPLICA_URIS` (URIs separadas por comas) y
+se registran como binds `replica_0`, `replica_1`... de Flask-SQLAlchemy. La
+sesión (`RoutingSession`) envía a una réplica las consultas de los handlers
+marcados con `@read_only` y todo lo demás al primario:
+
+* las escrituras (flush, INSERT/UPDATE/DELETE) nunca salen del primario;
+* tras una escritura, las lecturas del mismo usuario van al primario
+  durante REPLICA_READ_YOUR_WRITES_SECONDS, para que vea sus cambios aunque
+  la réplica vaya con retraso. La marca viaja con el cliente: la respuesta
+  de la escritura lleva la cabecera `X-Read-Primary-Until` y el frontend la
+  reenvía en las peticiones siguientes, así que no depende de qué worker
+  atienda ni del backend de caché. Además se guarda en `response_cache`
+  (con Redis cubre también los otros dispositivos del usuario y las
+  escrituras hechas fuera de una petición, como las recurrentes);
+* una réplica que no responde al ping periódico o que da un error de
+  conexión se aparta durante REPLICA_RETRY_SECONDS; sin réplicas sanas se
+  lee del primario;
+* si una consulta falla en la réplica a mitad de petición, el handler se
+  repite entero en el primario (salvo en las respuestas en streaming, que
+  ya han empezado a enviarse);
+* si la petición trabaja sobre un shard (`g.shard`, ver app/shards.py) todo
+  va a ese bind: las réplicas son solo del primario.
+
+Para probarlo en local basta con apuntar las réplicas al mismo archivo
+SQLite o a otra base MySQL con los mismos datos.
+"""
+import itertools
+import threading
+import time
+from functools import wraps
+from flask import g, has_app_context, request, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+
+REPLICA_BIND_PREFIX = 'replica_'
+READ_PRIMARY_HEADER = 'X-Read-Primary-Until'
+
+
+def replica_binds(uris):
+    """Binds de Flask-SQLAlchemy para las URIs de réplica configuradas."""
+    return {f"{REPLICA_BIND_PREFIX}{index}": uri for index, uri in enumerate(uris)}
+
+
+class ReplicaRouter:
+    """Elige réplica por turnos entre las sanas y recuerda las escrituras recientes."""
+
+    def __init__(self):
+        self.keys = []
+        self.read_your_writes = 5
+        self.check_interval = 10
+        self.retry_after = 30
+        self._cycle = itertools.cycle([])
+        self._down_until = {}
+        self._checked_at = {}
+        self._lock = threading.Lock()
+
+    def configure(self, keys, read_your_writes, check_interval, retry_after):
+        with self._lock:
+            self.keys = list(keys)
+            self.read_your_writes = read_your_writes
+            self.check_interval = check_interval
+            self.retry_after = retry_after
+            self._cycle = itertools.cycle(self.keys)
+            self._down_until = {}
+            self._checked_at = {}
+
+    @property
+    def enabled(self):
+        return bool(self.keys)
+
+    def mark_down(self, key):
+        with self._lock:
+            self._down_until[key] = time.monotonic() + self.retry_after
+
+    def is_up(self, key):
+        return self._down_until.get(key, 0) <= time.monotonic()
+
+    def _needs_check(self, key):
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at.get(key, float('-inf')) < self.check_interval:
+                return False
+            self._checked_at[key] = now
+            return True
+
+    def _ping(self, key, engine):
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            return True
+        except Exception:
+            self.mark_down(key)
+            return False
+
+    def pick(self, engines):
+        """Engine de una réplica sana, o None si no hay ninguna."""
+        for _ in range(len(self.keys)):
+            with self._lock:
+                key = next(self._cycle)
+            engine = engines.get(key)
+            if engine is None or not self.is_up(key):
+                continue
+            if self._needs_check(key) and not self._ping(key, engine):
+                continue
+            return engine
+        return None
+
+    # --- LEE TUS ESCRITURAS ---
+
+    def note_write(self, user_id):
+        """Envía al primario las lecturas de `user_id` durante la ventana configurada."""
+        if not self.enabled or not self.read_your_writes:
+            return
+        if has_app_context():
+            # Hora de reloj (no monotónica): el cliente la reenvía a cualquier worker
+            g.read_primary_until = time.time() + self.read_your_writes
+        from app.cache import response_cache
+        response_cache.set(_recent_write_key(user_id), True, ttl=self.read_your_writes)
+
+    def wrote_recently(self, user_id):
+        from app.cache import response_cache
+        return client_wrote_recently() or response_cache.get(_recent_write_key(user_id)) is not None
+
+
+def client_wrote_recently():
+    """True si la petición trae una marca `X-Read-Primary-Until` aún vigente."""
+    try:
+        until = float(request.headers.get(READ_PRIMARY_HEADER, ''))
+    except ValueError:
+        return False
+    now = time.time()
+    # Una marca más lejana que la ventana no la emitimos nosotros: se ignora
+    return now < until <= now + replica_router.read_your_writes
+
+
+def _recent_write_key(user_id):
+    return f"recent-write:{user_id}"
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Sesión de Flask-SQLAlchemy que manda cada consulta a su shard o a una réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('shard') is not None:
+            return self._db.engines[g.shard]
+        if bind is None and self._use_replica(clause):
+            engine = replica_router.pick(self._db.engines)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if not replica_router.enabled or not has_app_context() or not g.get('use_replica'):
+            return False
+        # Todo lo que escribe (o está a punto de hacerlo) va al primario
+        if self._flushing or self.new or self.dirty or self.deleted:
+            return False
+        return not getattr(clause, 'is_dml', False)
+
+
+def read_only(f):
+    """Decorador para handlers GET bajo `token_required` cuyas lecturas admiten réplica.
+
+    No se aplica si el usuario escribió hace menos de REPLICA_READ_YOUR_WRITES_SECONDS.
+    Si la réplica falla durante el handler (aunque el handler capture el
+    error), se repite en el primario.
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        if not replica_router.enabled or replica_router.wrote_recently(current_user.id):
+            return f(current_user, *args, **kwargs)
+
+        g.use_replica = True
+        g.replica_failed = False
+        try:
+            response = f(current_user, *args, **kwargs)
+        except DBAPIError:
+            if not g.replica_failed:
+                raise
+        else:
+            if not g.replica_failed:
+                return response
+
+        current_app.logger.warning('Lectura fallida en réplica; se repite en el primario')
+        from app import db
+        db.session.rollback()
+        g.use_replica = False
+        # Lo leído de la réplica no vale para la respuesta del primario
+        g.pop('data_version', None)
+        g.pop('archived_until', None)
+        return f(current_user, *args, **kwargs)
+    return decorated
+
+
+def init_replicas(app, db):
+    """Configura el enrutado según DB_REPLICA_URIS y vigila los errores de las réplicas."""
+    keys = sorted(replica_binds(app.config['DB_REPLICA_URIS']))
+    replica_router.configure(
+        keys,
+        read_your_writes=app.config['REPLICA_READ_YOUR_WRITES_SECONDS'],
+        check_interval=app.config['REPLICA_HEALTH_CHECK_INTERVAL'],
+        retry_after=app.config['REPLICA_RETRY_SECONDS'],
+    )
+    if not keys:
+        return
+
+    @app.after_request
+    def send_read_primary_marker(response):
+        until = g.get('read_primary_until')
+        if until is not None and response.status_code < 400:
+            response.headers[READ_PRIMARY_HEADER] = f"{until:.3f}"
+        return response
+
+    with app.app_context():
+        engines = db.engines
+        for key in keys:
+            event.listen(engines[key], 'handle_error', _make_error_handler(key))
+
+
+def _make_error_handler(key):
+    def handle_error(context):
+        # Cualquier error: `read_only` repite la petición en el primario
+        if has_app_context() and g.get('use_replica'):
+            g.replica_failed = True
+        # Errores de conexión: la réplica se aparta hasta REPLICA_RETRY_SECONDS
+        if context.is_disconnect or context.connection is None:
+            replica_router.mark_down(key)
+    return handle_error
@@ -0,0 +1,281 @@
+# Archivo: app/reports.py
+"""Informes de rangos largos (años completos o fechas a medida) en segundo plano.
+
+`POST /api/reports` crea un `ReportJob` y lo encola en un pool de hilos
+acotado; el cliente consulta `GET /api/reports/<id>` hasta que el estado es
+DONE. Así las agregaciones de varios años no ocupan un worker de la API.
+
+El cálculo lee los meses completos de `monthly_rollups` y solo recorre
+`transactions` (y su archivo, `transactions_archive`) para los meses
+parciales de los extremos del rango y para los comercios con más gasto. El resultado se guarda en la propia fila y se
+reutiliza mientras la `data_version` del usuario no cambie.
+"""
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models import ReportJob, MonthlyRollup, Transaction, ArchivedTransaction, Category
+from app.rollups import month_key, month_start, shift_month, month_range, _month_expression
+from app.shards import current_shard, shard_context
+from app.versioning import get_data_version
+
+PENDING_STATUSES = ('PENDING', 'RUNNING')
+
+
+class ReportQueueFull(Exception):
+    """El pool de informes y su cola están llenos."""
+
+
+# --- CÁLCULO DEL INFORME ---
+
+def _full_months(start_date, end_date):
+    """Primer y último mes completamente contenidos en el rango ('YYYY-MM')."""
+    first = month_key(start_date)
+    if start_date.day != 1:
+        first = shift_month(first, 1)
+    last = month_key(end_date)
+    if (end_date + timedelta(days=1)).day != 1:
+        last = shift_month(last, -1)
+    return first, last
+
+
+def _category_month_totals(user_id, start_date, end_date):
+    """Filas (mes, categoría, nombre, tipo, total, nº) del rango.
+
+    Los meses completos salen de los rollups; los días sueltos de los
+    extremos se agregan desde `transactions` y su archivo con un GROUP BY
+    (el mismo mes puede salir de las dos tablas; `build_report` suma).
+    """
+    first_full, last_full = _full_months(start_date, end_date)
+    rows = []
+
+    if first_full <= last_full:
+        rows.extend(db.session.query(
+            MonthlyRollup.year_month, MonthlyRollup.category_id, Category.name,
+            MonthlyRollup.type, MonthlyRollup.total, MonthlyRollup.count
+        ).outerjoin(
+            Category, Category.id == MonthlyRollup.category_id
+        ).filter(
+            MonthlyRollup.user_id == user_id,
+            MonthlyRollup.year_month >= first_full,
+            MonthlyRollup.year_month <= last_full,
+        ).all())
+
+    for entity in (Transaction, ArchivedTransaction):
+        transaction_range = [
+            entity.user_id == user_id,
+            entity.transaction_date >= start_date,
+            entity.transaction_date <= end_date,
+        ]
+        if first_full <= last_full:
+            transaction_range.append(db.or_(
+                entity.transaction_date < month_start(first_full),
+                entity.transaction_date >= month_start(shift_month(last_full, 1)),
+            ))
+
+        year_month = _month_expression(entity.transaction_date)
+        rows.extend(db.session.query(
+            year_month, entity.category_id, Category.name, entity.type,
+            db.func.sum(entity.amount), db.func.count(entity.id)
+        ).outerjoin(
+            Category, Category.id == entity.category_id
+        ).filter(
+            *transaction_range
+        ).group_by(
+            year_month, entity.category_id, Category.name, entity.type
+        ).all())
+    return rows
+
+
+def _top_merchants(user_id, start_date, end_date, limit):
+    """Descripciones con más gasto en el rango (tabla caliente y archivo)."""
+    expenses = db.union_all(*(
+        db.select(entity.description, entity.amount).where(
+            entity.user_id == user_id,
+            entity.type == 'EXPENSE',
+            entity.transaction_date >= start_date,
+            entity.transaction_date <= end_date,
+            entity.description.isnot(None),
+            entity.description != '',
+        )
+        for entity in (Transaction, ArchivedTransaction)
+    )).subquery()
+
+    total = db.func.sum(expenses.c.amount)
+    rows = db.session.query(
+        expenses.c.description, total, db.func.count()
+    ).group_by(
+        expenses.c.description
+    ).order_by(
+        total.desc()
+    ).limit(limit).all()
+    return [
+        {'description': description, 'total': float(amount), 'count': count}
+        for description, amount, count in rows
+    ]
+
+
+def build_report(user_id, start_date, end_date, top_merchants=10):
+    """Calcula el informe de `start_date` a `end_date` (ambos incluidos)."""
+    monthly = {month: {'income': 0.0, 'expense': 0.0}
+               for month in month_range(month_key(start_date), month_key(end_date))}
+    categories = {}
+    totals = {'income': 0.0, 'expense': 0.0, 'count': 0}
+
+    for year_month, category_id, name, trans_type, amount, count in _category_month_totals(user_id, start_date, end_date):
+        amount = float(amount)
+        field = 'income' if trans_type == 'INCOME' else 'expense'
+        monthly[year_month][field] += amount
+        totals[field] += amount
+        totals['count'] += count
+
+        entry = categories.get((category_id, trans_type))
+        if entry is None:
+            entry = categories[(category_id, trans_type)] = {
+                'category_id': category_id, 'name': name or 'Desconocida',
+                'type': trans_type, 'total': 0.0, 'count': 0,
+            }
+        entry['total'] += amount
+        entry['count'] += count
+
+    return {
+        'start_date': start_date,
+        'end_date': end_date,
+        'totals': {
+            'income': totals['income'],
+            'expense': totals['expense'],
+            'balance': totals['income'] - totals['expense'],
+            'count': totals['count'],
+        },
+        'categories': sorted(categories.values(), key=lambda entry: entry['total'], reverse=True),
+        'monthly': [
+            {'month': month, 'income': values['income'], 'expense': values['expense']}
+            for month, values in monthly.items()
+        ],
+        'top_merchants': _top_merchants(user_id, start_date, end_date, top_merchants),
+    }
+
+
+# --- EJECUCIÓN EN SEGUNDO PLANO ---
+
+def run_report_job(job_id):
+    """Calcula un job pendiente y guarda su resultado. Requiere contexto de app."""
+    job = db.session.get(ReportJob, job_id)
+    if job is None or job.status != 'PENDING':
+        return
+
+    job.status = 'RUNNING'
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    try:
+        report = build_report(job.user_id, job.start_date, job.end_date,
+                              current_app.config['REPORT_TOP_MERCHANTS'])
+        job.result = current_app.json.dumps(report)
+        job.status = 'DONE'
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("Error al generar el informe %s", job_id)
+        job = db.session.get(ReportJob, job_id)
+        job.status = 'FAILED'
+        job.error = str(e)[:255]
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+
+class ReportQueue:
+    """Pool de hilos acotado para los informes.
+
+    Con `workers=0` el informe se calcula en el hilo de la petición (útil en
+    desarrollo y en pruebas).
+    """
+
+    def __init__(self):
+        self.workers = 0
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def configure(self, workers, max_pending):
+        self.shutdown()
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(workers + max_pending) if workers else None
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='reports')
+            return self._executor
+
+    def submit(self, job_id):
+        """Encola el job (en el shard de la petición). Lanza ReportQueueFull si no hay hueco."""
+        app = current_app._get_current_object()
+        if not self.workers:
+            run_report_job(job_id)
+            return
+
+        if not self._slots.acquire(blocking=False):
+            raise ReportQueueFull()
+        try:
+            future = self._get_executor().submit(self._run, app, job_id, current_shard())
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+    @staticmethod
+    def _run(app, job_id, shard):
+        with app.app_context(), shard_context(shard):
+            run_report_job(job_id)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+report_queue = ReportQueue()
+atexit.register(report_queue.shutdown)
+
+
+def init_reports(app):
+    """Configura el pool de informes según la configuración de la app."""
+    report_queue.configure(
+        workers=app.config['REPORT_WORKERS'],
+        max_pending=app.config['REPORT_MAX_PENDING']
+    )
+
+
+# --- JOBS ---
+
+def find_reusable_job(user_id, start_date, end_date):
+    """Job del mismo rango sobre los datos actuales (hecho o aún en curso).
+
+    Los jobs en curso más antiguos que REPORT_JOB_TIMEOUT se consideran
+    perdidos (p. ej. por un reinicio del proceso) y no se reutilizan.
+    """
+    version = get_data_version(user_id)
+    stale_before = datetime.utcnow() - timedelta(seconds=current_app.config['REPORT_JOB_TIMEOUT'])
+    job = ReportJob.query.filter(
+        ReportJob.user_id == user_id,
+        ReportJob.start_date == start_date,
+        ReportJob.end_date == end_date,
+        ReportJob.data_version == version,
+        db.or_(
+            ReportJob.status == 'DONE',
+            db.and_(ReportJob.status.in_(PENDING_STATUSES), ReportJob.created_at >= stale_before),
+        ),
+    ).order_by(ReportJob.id.desc()).first()
+    return job, version
+
+
+def purge_report_jobs(days):
+    """Borra los jobs creados hace más de `days` días. No hace commit."""
+    threshold = datetime.utcnow() - timedelta(days=days)
+    result = db.session.execute(
+        ReportJob.__table__.delete().where(ReportJob.__table__.c.created_at < threshold)
+    )
+    return result.rowcount
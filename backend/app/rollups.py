@@ -0,0 +1,266 @@
+# Archivo: app/rollups.py
+"""Mantenimiento de los totales mensuales pre-agregados (monthly_rollups).
+
+Cada alta, edición o borrado de una transacción aplica un delta sobre la
+fila (usuario, mes, categoría, tipo) correspondiente dentro de la misma
+transacción de base de datos, de modo que el dashboard se sirve leyendo
+unas pocas filas en lugar de recorrer todo el historial.
+"""
+from datetime import date
+from decimal import Decimal
+from app import db
+from app.models import MonthlyRollup, Transaction, ArchivedTransaction, Category
+
+
+def month_key(value):
+    """Devuelve la clave 'YYYY-MM' de una fecha."""
+    return value.strftime('%Y-%m')
+
+
+def shift_month(year_month, offset):
+    """Desplaza una clave 'YYYY-MM' `offset` meses (puede ser negativo)."""
+    year, month = (int(part) for part in year_month.split('-'))
+    index = year * 12 + (month - 1) + offset
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def month_start(year_month):
+    """Primer día del mes de una clave 'YYYY-MM'."""
+    year, month = (int(part) for part in year_month.split('-'))
+    return date(year, month, 1)
+
+
+def month_range(first, last):
+    """Lista de claves 'YYYY-MM' entre `first` y `last` (ambos incluidos)."""
+    months = []
+    current = first
+    while current <= last:
+        months.append(current)
+        current = shift_month(current, 1)
+    return months
+
+
+def _month_expression(column):
+    """Expresión SQL que convierte una columna DATE en 'YYYY-MM' según el motor."""
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        return db.func.date_format(column, '%Y-%m')
+    if dialect == 'sqlite':
+        return db.func.strftime('%Y-%m', column)
+    return db.func.to_char(column, 'YYYY-MM')
+
+
+def _upsert(user_id, year_month, category_id, trans_type, amount, count):
+    """Suma `amount` y `count` a la fila del rollup, creándola si no existe."""
+    values = {
+        'user_id': user_id,
+        'year_month': year_month,
+        'category_id': category_id,
+        'type': trans_type,
+        'total': amount,
+        'count': count,
+    }
+    dialect = db.engine.dialect.name
+    table = MonthlyRollup.__table__
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table).values(**values)
+        stmt = stmt.on_duplicate_key_update(
+            total=table.c.total + stmt.inserted.total,
+            count=table.c.count + stmt.inserted.count,
+        )
+        db.session.execute(stmt)
+        return
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'year_month', 'category_id', 'type'],
+            set_={
+                'total': table.c.total + stmt.excluded.total,
+                'count': table.c.count + stmt.excluded.count,
+            },
+        )
+        db.session.execute(stmt)
+        return
+
+    # Motor sin upsert nativo: UPDATE y, si no había fila, INSERT
+    result = db.session.execute(
+        table.update()
+        .where(table.c.user_id == user_id, table.c.year_month == year_month,
+               table.c.category_id == category_id, table.c.type == trans_type)
+        .values(total=table.c.total + amount, count=table.c.count + count)
+    )
+    if result.rowcount == 0:
+        db.session.execute(table.insert().values(**values))
+
+
+def apply_rollup_delta(user_id, transaction_date, category_id, trans_type, amount, count=1):
+    """Aplica un delta al rollup del mes de `transaction_date`.
+
+    Usar `amount`/`count` negativos para descontar una transacción. Las filas
+    que quedan sin transacciones se eliminan para mantener la tabla compacta.
+    No hace commit: el llamador decide cuándo confirmar.
+    """
+    year_month = month_key(transaction_date)
+    _upsert(user_id, year_month, category_id, trans_type, Decimal(str(amount)), count)
+
+    if count < 0:
+        table = MonthlyRollup.__table__
+        db.session.execute(
+            table.delete().where(
+                table.c.user_id == user_id, table.c.year_month == year_month,
+                table.c.category_id == category_id, table.c.type == trans_type,
+                table.c.count <= 0,
+            )
+        )
+
+
+def apply_rollup_deltas(select_stmt):
+    """Suma a los rollups las filas (user_id, year_month, category_id, type, total, count) de `select_stmt`.
+
+    Es un único INSERT ... SELECT con upsert, sin traer las filas a Python
+    (salvo en motores sin upsert nativo). Solo para deltas positivos. No
+    hace commit.
+    """
+    columns = ['user_id', 'year_month', 'category_id', 'type', 'total', 'count']
+    dialect = db.engine.dialect.name
+    table = MonthlyRollup.__table__
+
+    if dialect == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table).from_select(columns, select_stmt)
+        stmt = stmt.on_duplicate_key_update(
+            total=table.c.total + stmt.inserted.total,
+            count=table.c.count + stmt.inserted.count,
+        )
+        db.session.execute(stmt)
+        return
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table).from_select(columns, select_stmt)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['user_id', 'year_month', 'category_id', 'type'],
+            set_={
+                'total': table.c.total + stmt.excluded.total,
+                'count': table.c.count + stmt.excluded.count,
+            },
+        )
+        db.session.execute(stmt)
+        return
+
+    for user_id, year_month, category_id, trans_type, total, count in db.session.execute(select_stmt).all():
+        _upsert(user_id, year_month, category_id, trans_type, total, count)
+
+
+def add_transaction_to_rollup(transaction):
+    """Suma una transacción (objeto ORM) a su rollup."""
+    apply_rollup_delta(transaction.user_id, transaction.transaction_date,
+                       transaction.category_id, transaction.type, transaction.amount, 1)
+
+
+def remove_transaction_from_rollup(transaction):
+    """Descuenta una transacción (objeto ORM) de su rollup."""
+    apply_rollup_delta(transaction.user_id, transaction.transaction_date,
+                       transaction.category_id, transaction.type, -Decimal(str(transaction.amount)), -1)
+
+
+def rebuild_rollups(user_id=None):
+    """Reconstruye los rollups desde `transactions` con un INSERT ... SELECT.
+
+    Incluye las transacciones archivadas (`transactions_archive`). Si se indica `user_id` solo se reconstruyen los de ese usuario.
+    Devuelve el número de filas de rollup generadas. No hace commit.
+    """
+    table = MonthlyRollup.__table__
+    delete_stmt = table.delete()
+    if user_id is not None:
+        delete_stmt = delete_stmt.where(table.c.user_id == user_id)
+    db.session.execute(delete_stmt)
+
+    sources = []
+    for entity in (Transaction, ArchivedTransaction):
+        source = db.select(
+            entity.user_id, entity.transaction_date, entity.category_id, entity.type, entity.amount
+        )
+        if user_id is not None:
+            source = source.where(entity.user_id == user_id)
+        sources.append(source)
+    rows = db.union_all(*sources).subquery()
+
+    year_month = _month_expression(rows.c.transaction_date)
+    select_stmt = db.select(
+        rows.c.user_id,
+        year_month,
+        rows.c.category_id,
+        rows.c.type,
+        db.func.sum(rows.c.amount),
+        db.func.count(),
+    ).group_by(
+        rows.c.user_id, year_month, rows.c.category_id, rows.c.type
+    )
+
+    result = db.session.execute(
+        table.insert().from_select(
+            ['user_id', 'year_month', 'category_id', 'type', 'total', 'count'], select_stmt
+        )
+    )
+    return result.rowcount
+
+
+def monthly_overview_statement(user_id, first_month, last_month):
+    """SELECT de los rollups (mes, tipo, total, nombre de categoría) entre dos meses."""
+    return db.select(
+        MonthlyRollup.year_month, MonthlyRollup.type, MonthlyRollup.total, Category.name
+    ).outerjoin(
+        Category, Category.id == MonthlyRollup.category_id
+    ).where(
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.year_month >= first_month,
+        MonthlyRollup.year_month <= last_month,
+    )
+
+
+def summarize_overview(rows, first_month, current_month):
+    """Agrega las filas de `monthly_overview_statement` en el resumen del dashboard."""
+    trend = {month: {'income': 0.0, 'expense': 0.0} for month in month_range(first_month, current_month)}
+    categories_spending = {}
+
+    for year_month, trans_type, total, category_name in rows:
+        total = float(total)
+        if trans_type == 'INCOME':
+            trend[year_month]['income'] += total
+        else:
+            trend[year_month]['expense'] += total
+            if year_month == current_month:
+                name = category_name or 'Desconocida'
+                categories_spending[name] = categories_spending.get(name, 0.0) + total
+
+    return {
+        'monthly_income': trend[current_month]['income'],
+        'monthly_expenses': trend[current_month]['expense'],
+        'categories_spending': [{'name': name, 'total': total} for name, total in categories_spending.items()],
+        'monthly_trend': [
+            {'month': month, 'income': values['income'], 'expense': values['expense']}
+            for month, values in trend.items()
+        ],
+    }
+
+
+def get_monthly_overview(user_id, current_month, months):
+    """Lee los rollups de los últimos `months` meses hasta `current_month`.
+
+    Devuelve un dict con los totales del mes actual, el gasto por categoría
+    del mes actual y la serie mensual de ingresos/gastos.
+    """
+    first_month = shift_month(current_month, -(months - 1))
+    rows = db.session.execute(monthly_overview_statement(user_id, first_month, current_month)).all()
+    return summarize_overview(rows, first_month, current_month)
@@ -1,16 +1,49 @@
-from flask import Blueprint, request, jsonify
-from app import db, bcrypt
-from app.models import User, Category, Transaction
-from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
+from app import db
+from app.models import User, Transaction, ReportJob
+from app.auth import Principal, create_access_token, decode_access_token, revoke_tokens, invalidate_user, get_cached_user
+from app.hashing import password_hasher, HashingBusy
+from app.ratelimit import rate_limiter, rate_cost, request_cost, too_many_requests
+from app.replicas import read_only
+from app.shards import bind_user_shard
+from app.versioning import conditional_get, bump_data_version, cached_data_version
+from app.queries import (
+    FilterError, MAX_PAGE_SIZE, parse_transaction_filters, parse_sort,
+    encode_cursor, cursor_value
+)
+from app.cache import response_cache, summary_key
+from app.imports import parse_csv, parse_ofx, assign_default_categories, validate_rows, insert_transactions
+from app.categories import (
+    CategoryError, get_user_categories, find_category, create_category, rename_category,
+    merge_category, delete_category
+)
+from app.provisioning import register_user, EmailAlreadyRegistered
+from app.archive import transaction_sources, fetch_transactions, iter_transactions, count_transactions, is_archived
+from app.batch import selection_query, parse_changes, batch_update, batch_delete
+from app.sync import ENTITY_TRANSACTION, ENTITY_CATEGORY, record_deletions, get_changes
+from app.exports import EXPORT_FORMATS, ExportFormatUnavailable, export_rows, export_filename
+from app.reports import report_queue, ReportQueueFull, find_reusable_job
+from app.recurring import RecurringRuleError, list_rules, create_rule, update_rule, delete_rule
+from app.rollups import (
+    add_transaction_to_rollup, remove_transaction_from_rollup, apply_rollup_delta,
+    get_monthly_overview, month_key
+)
+from datetime import datetime, date
 from functools import wraps
 import jwt
-import os
 
 # Blueprint
 main = Blueprint('main', __name__)
 
 # --- DECORADOR DE AUTENTICACIÓN ---
 def token_required(f):
+    """Valida el JWT y pasa al handler un `Principal` construido desde los claims.
+
+    No consulta la base de datos: el usuario se carga de forma perezosa (y
+    cacheada) solo si el handler accede a atributos que no están en el token.
+    También aplica el límite de peticiones por usuario y fija su shard (con
+    shards configurados, el mapa se lee de una caché de pocos segundos).
+    """
     @wraps(f)
     def decorated(*args, **kwargs):
         token = None
@@ -23,14 +56,10 @@ def token_required(f):
             return jsonify({'message': 'Token de autenticación requerido'}), 401
 
         try:
-            data = jwt.decode(
-                token,
-                os.environ.get('JWT_SECRET_KEY', 'dev-jwt-secret-key'),
-                algorithms=['HS256']
-            )
-            current_user = User.query.filter_by(id=data['user_id']).first()
-            if not current_user:
-                return jsonify({'message': 'Usuario no encontrado'}), 401
+            data = decode_access_token(token)
+            current_user = Principal.from_claims(data)
+            if current_user.is_revoked():
+                return jsonify({'message': 'Token inválido'}), 401
         
         except jwt.ExpiredSignatureError:
             return jsonify({'message': 'Token expirado. Inicia sesión nuevamente'}), 401
@@ -38,22 +67,46 @@ def token_required(f):
             print(f"Error al decodificar token: {e}")
             return jsonify({'message': 'Token inválido'}), 401
 
+        wait = rate_limiter.check_user(current_user.id, request_cost())
+        if wait is not None:
+            return too_many_requests(wait)
+
+        if not bind_user_shard(current_user.id, writing=request.method not in ('GET', 'HEAD')):
+            return moving_response()
+
         return f(current_user, *args, **kwargs)
     return decorated
 
-# --- FUNCIÓN PARA CREAR CATEGORÍAS POR DEFECTO ---
-def create_default_categories(user_id):
-    """Crea categorías iniciales para un nuevo usuario."""
-    default_categories = [
-        {'name': 'Salario', 'type': 'INCOME', 'is_default': True},
-        {'name': 'Regalo', 'type': 'INCOME', 'is_default': True},
-        {'name': 'Comida y Bebidas', 'type': 'EXPENSE', 'is_default': True},
-        {'name': 'Vivienda', 'type': 'EXPENSE', 'is_default': True},
-        {'name': 'Transporte', 'type': 'EXPENSE', 'is_default': True},
-        {'name': 'Ocio y Viajes', 'type': 'EXPENSE', 'is_default': True},
-    ]
-    for cat in default_categories:
-        db.session.add(Category(user_id=user_id, **cat))
+# --- SERIALIZACIÓN DE TRANSACCIONES ---
+STREAM_BATCH_SIZE = 1000
+
+def serialize_transaction(t, category_name):
+    """Convierte una transacción (y el nombre de su categoría) en un dict JSON.
+
+    `amount` (Decimal) y `date` los serializa directamente el proveedor JSON.
+    """
+    return {
+        'id': t.id,
+        'amount': t.amount,
+        'type': t.type,
+        'description': t.description,
+        'date': t.transaction_date,
+        'category_id': t.category_id,
+        'category_name': category_name if category_name else 'Desconocida',
+        'recurring_rule_id': t.recurring_rule_id
+    }
+
+def busy_response():
+    """Respuesta 503 cuando un pool de trabajo (hashing, informes) está saturado."""
+    response = jsonify({'message': 'Servidor ocupado, inténtalo de nuevo en unos segundos'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+def moving_response():
+    """Respuesta 503 a las escrituras de un usuario que se está cambiando de shard."""
+    response = jsonify({'message': 'Tus datos se están trasladando, inténtalo de nuevo en unos segundos'})
+    response.headers['Retry-After'] = '5'
+    return response, 503
 
 # --- RUTA DE INICIO (ESTA ES LA NUEVA) ---
 @main.route('/')
@@ -63,6 +116,7 @@ def index():
 # --- RUTAS DE AUTENTICACIÓN ---
 
 @main.route('/api/register', methods=['POST'])
+@rate_cost(5)
 def register():
     """Registra un nuevo usuario."""
     data = request.get_json()
@@ -72,25 +126,25 @@ def register():
     
     if not email or not password or not full_name:
         return jsonify({'message': 'Faltan datos requeridos'}), 400
-          
-    if User.query.filter_by(email=email).first():
-        return jsonify({'message': 'El email ya está registrado'}), 409
 
     try:
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
-        new_user = User(full_name=full_name, email=email, password_hash=hashed_password)
-        db.session.add(new_user)
-        db.session.flush()
-        create_default_categories(new_user.id)
+        hashed_password = password_hasher.generate_password_hash(password)
+        # El índice único de users.email detecta el duplicado (sin SELECT previo)
+        register_user(email, full_name, hashed_password)
         db.session.commit()
         return jsonify({'message': 'Usuario registrado con éxito'}), 201
 
+    except EmailAlreadyRegistered:
+        return jsonify({'message': 'El email ya está registrado'}), 409
+    except HashingBusy:
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         print(f"Error al registrar usuario: {e}")
         return jsonify({'message': 'Error interno al registrar el usuario'}), 500
 
 @main.route('/api/login', methods=['POST'])
+@rate_cost(5)
 def login():
     """Autentica un usuario y devuelve un Token JWT."""
     data = request.get_json()
@@ -99,17 +153,22 @@ def login():
 
     user = User.query.filter_by(email=data['email']).first()
 
-    if user and bcrypt.check_password_hash(user.password_hash, data['password']):
-        token_payload = {
-            'user_id': user.id,
-            'exp': datetime.utcnow() + timedelta(hours=24)
-        }
-        
-        token = jwt.encode(
-            token_payload,
-            os.environ.get('JWT_SECRET_KEY', 'dev-jwt-secret-key'),
-            algorithm='HS256'
-        )
+    try:
+        valid_password = user is not None and password_hasher.check_password_hash(user.password_hash, data['password'])
+    except HashingBusy:
+        return busy_response()
+
+    if valid_password:
+        # Rehash transparente si el coste configurado cambió
+        if password_hasher.needs_rehash(user.password_hash):
+            try:
+                user.password_hash = password_hasher.generate_password_hash(data['password'])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error al actualizar el hash de la contraseña: {e}")
+
+        token = create_access_token(user)
         
         return jsonify({
             'message': 'Login exitoso',
@@ -119,74 +178,145 @@ def login():
     else:
         return jsonify({'message': 'Email o contraseña incorrectos'}), 401
 
+@main.route('/api/logout-all', methods=['POST'])
+@token_required
+def logout_all(current_user):
+    """Cierra todas las sesiones del usuario invalidando sus tokens."""
+    try:
+        revoke_tokens(current_user.id)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al cerrar las sesiones: {e}")
+        return jsonify({'message': 'Error interno al cerrar las sesiones'}), 500
+
+    # Recargar la caché de este worker para rechazar ya los tokens anteriores
+    invalidate_user(current_user.id)
+    get_cached_user(current_user.id)
+    return jsonify({'message': 'Sesiones cerradas'}), 200
+
 # --- RUTAS DE CATEGORÍAS ---
 
 @main.route('/api/categories', methods=['GET'])
 @token_required
+@read_only
+@conditional_get
 def get_categories(current_user):
     """Devuelve la lista de categorías del usuario."""
     try:
-        categories = Category.query.filter_by(user_id=current_user.id).all()
-        categories_list = [{
-            'id': c.id,
-            'name': c.name,
-            'type': c.type,
-            'is_default': c.is_default
-        } for c in categories]
-        return jsonify(categories_list), 200
+        return jsonify(get_user_categories(current_user.id)), 200
     except Exception as e:
         print(f"Error al obtener categorías: {e}")
         return jsonify({'message': 'Error interno al cargar categorías'}), 500
 
+@main.route('/api/categories', methods=['POST'])
+@token_required
+def create_category_route(current_user):
+    """Crea una categoría (`name`, `type`)."""
+    data = request.get_json(silent=True) or {}
+    try:
+        category = create_category(current_user.id, data.get('name'), data.get('type'))
+        return jsonify(dict(category, message='Categoría creada con éxito')), 201
+    except CategoryError as e:
+        return jsonify({'message': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al crear categoría: {e}")
+        return jsonify({'message': 'Error interno al crear la categoría'}), 500
+
+@main.route('/api/categories/<int:category_id>', methods=['PUT'])
+@token_required
+def rename_category_route(current_user, category_id):
+    """Renombra una categoría (`name`)."""
+    data = request.get_json(silent=True) or {}
+    try:
+        category = rename_category(current_user.id, category_id, data.get('name'))
+        return jsonify(dict(category, message='Categoría actualizada con éxito')), 200
+    except CategoryError as e:
+        return jsonify({'message': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al renombrar categoría: {e}")
+        return jsonify({'message': 'Error interno al actualizar la categoría'}), 500
+
+@main.route('/api/categories/<int:category_id>/merge', methods=['POST'])
+@token_required
+def merge_category_route(current_user, category_id):
+    """Fusiona la categoría en `target_id`: mueve sus transacciones y la elimina."""
+    data = request.get_json(silent=True) or {}
+    try:
+        target_id = int(data.get('target_id'))
+    except (TypeError, ValueError):
+        return jsonify({'message': 'Indica la categoría destino (target_id)'}), 400
+
+    try:
+        moved = merge_category(current_user.id, category_id, target_id)
+        return jsonify({'message': 'Categorías fusionadas con éxito', 'moved': moved}), 200
+    except CategoryError as e:
+        return jsonify({'message': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al fusionar categorías: {e}")
+        return jsonify({'message': 'Error interno al fusionar las categorías'}), 500
+
+@main.route('/api/categories/<int:category_id>', methods=['DELETE'])
+@token_required
+def delete_category_route(current_user, category_id):
+    """Elimina una categoría sin transacciones, o las mueve antes a `reassign_to`."""
+    reassign_to = request.args.get('reassign_to', type=int)
+    try:
+        moved = delete_category(current_user.id, category_id, reassign_to)
+        return jsonify({'message': 'Categoría eliminada con éxito', 'moved': moved}), 200
+    except CategoryError as e:
+        return jsonify({'message': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al eliminar categoría: {e}")
+        return jsonify({'message': 'Error interno al eliminar la categoría'}), 500
+
 # --- RUTAS DE DASHBOARD ---
 
 @main.route('/api/data/summary', methods=['GET'])
 @token_required
+@read_only
+@conditional_get
 def get_dashboard_summary(current_user):
-    """Obtiene datos de resumen financiero del mes en curso."""
-    user_id = current_user.id
-    today = datetime.now()
-    start_of_month = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    # Calcular Ingresos Totales
-    total_income_raw = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id, Transaction.type == 'INCOME',
-        Transaction.transaction_date >= start_of_month
-    ).scalar()
-    total_income = float(total_income_raw) if total_income_raw else 0.0
-
-    # Calcular Gastos Totales
-    total_expenses_raw = db.session.query(db.func.sum(Transaction.amount)).filter(
-        Transaction.user_id == user_id, Transaction.type == 'EXPENSE',
-        Transaction.transaction_date >= start_of_month
-    ).scalar()
-    total_expenses = float(total_expenses_raw) if total_expenses_raw else 0.0
+    """Obtiene datos de resumen financiero del mes en curso y la tendencia mensual.
+
+    Se sirve desde la tabla `monthly_rollups` en una sola consulta.
+    """
+    current_month = month_key(datetime.now())
+    # Clave con la versión que ya leyó `conditional_get`
+    cache_key = summary_key(current_user.id, current_month, cached_data_version(current_user.id))
+    overview = response_cache.get(cache_key)
+    if overview is None:
+        overview = get_monthly_overview(
+            current_user.id, current_month, current_app.config['DASHBOARD_TREND_MONTHS']
+        )
+        response_cache.set(cache_key, overview)
+
+    return jsonify(summary_payload(current_user.full_name, overview)), 200
+
+def summary_payload(user_name, overview):
+    """Cuerpo de la respuesta del resumen a partir del overview de los rollups."""
+    total_income = overview['monthly_income']
+    total_expenses = overview['monthly_expenses']
     
     # Balance
     current_balance = total_income - total_expenses
-    
-    # Desglose de gastos por categoría
-    category_spending = db.session.query(
-        Category.name, db.func.sum(Transaction.amount).label('total')
-    ).join(Transaction).filter(
-        Transaction.user_id == user_id, Transaction.type == 'EXPENSE',
-        Transaction.transaction_date >= start_of_month
-    ).group_by(Category.name).all()
-    
-    categories_list = [{'name': name, 'total': float(total)} for name, total in category_spending]
 
-    # Respuesta JSON
-    return jsonify({
-        'user_name': current_user.full_name,
+    return {
+        'user_name': user_name,
         'summary': {
             'total_balance': float(current_balance),
             'monthly_income': float(total_income),
             'monthly_expenses': float(total_expenses),
-            'balance_change': 0.025  # Placeholder
+            'balance_change': 0.025,  # Placeholder
+            'monthly_trend': overview['monthly_trend']
         },
-        'categories_spending': categories_list,
+        'categories_spending': overview['categories_spending'],
         'message': 'Dashboard data loaded successfully'
-    }), 200
+    }
 
 # --- RUTAS DE TRANSACCIONES (CRUD) ---
 
@@ -212,8 +342,7 @@ def create_transaction(current_user):
         category_id = int(data['category_id'])
         transaction_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
         
-        category = Category.query.filter_by(id=category_id, user_id=user_id).first()
-        if not category:
+        if find_category(user_id, category_id) is None:
             return jsonify({'message': 'Categoría no encontrada'}), 404
         
         new_transaction = Transaction(
@@ -222,10 +351,12 @@ def create_transaction(current_user):
             amount=amount,
             type=trans_type,
             description=data.get('description'),
-            transaction_date=transaction_date
+            transaction_date=transaction_date,
+            change_version=bump_data_version(user_id)
         )
         
         db.session.add(new_transaction)
+        add_transaction_to_rollup(new_transaction)
         db.session.commit()
         
         return jsonify({
@@ -240,58 +371,267 @@ def create_transaction(current_user):
         print(f"Error al crear transacción: {e}")
         return jsonify({'message': 'Error interno al procesar la transacción'}), 500
 
+def _import_response(user_id, rows):
+    """Valida e inserta filas importadas y construye la respuesta con errores por fila."""
+    max_rows = current_app.config['BULK_IMPORT_MAX_ROWS']
+    if len(rows) > max_rows:
+        return jsonify({'message': f'Se admiten como máximo {max_rows} transacciones por petición'}), 413
+
+    valid_rows, errors = validate_rows(user_id, rows)
+    inserted, insert_errors = insert_transactions(
+        valid_rows, current_app.config['BULK_INSERT_CHUNK_SIZE']
+    )
+    errors.extend(insert_errors)
+    errors.sort(key=lambda error: error['row'])
+
+    return jsonify({
+        'message': f'{inserted} transacciones importadas',
+        'inserted': inserted,
+        'failed': len(errors),
+        'errors': errors
+    }), 201 if inserted else 400
+
+@main.route('/api/transactions/bulk', methods=['POST'])
+@rate_cost(5)
+@token_required
+def bulk_create_transactions(current_user):
+    """Crea muchas transacciones en una sola petición.
+
+    Acepta una lista JSON o {'transactions': [...]} con los mismos campos que
+    `create_transaction` (también `category` por nombre en lugar de `category_id`).
+    """
+    data = request.get_json(silent=True)
+    rows = data.get('transactions') if isinstance(data, dict) else data
+
+    if not isinstance(rows, list) or not rows:
+        return jsonify({'message': 'Se esperaba una lista de transacciones'}), 400
+
+    return _import_response(current_user.id, rows)
+
+@main.route('/api/transactions/import', methods=['POST'])
+@rate_cost(5)
+@token_required
+def import_transactions(current_user):
+    """Importa un archivo CSV u OFX subido como multipart (campo `file`).
+
+    Las filas sin categoría usan `income_category_id` / `expense_category_id`
+    del formulario.
+    """
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'message': 'Falta el archivo a importar'}), 400
+
+    file_format = (request.form.get('format') or upload.filename.rsplit('.', 1)[-1]).lower()
+    try:
+        text = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return jsonify({'message': 'El archivo debe estar codificado en UTF-8'}), 400
+
+    if file_format == 'csv':
+        rows = parse_csv(text)
+    elif file_format in ('ofx', 'qfx'):
+        rows = parse_ofx(text)
+    else:
+        return jsonify({'message': 'Formato no soportado (usa csv u ofx)'}), 400
+
+    if not rows:
+        return jsonify({'message': 'El archivo no contiene transacciones'}), 400
+
+    assign_default_categories(
+        rows,
+        income_category_id=request.form.get('income_category_id'),
+        expense_category_id=request.form.get('expense_category_id')
+    )
+    return _import_response(current_user.id, rows)
+
+def _list_cost(req):
+    # Sin `limit` (o en NDJSON) el listado recorre todo el historial
+    paginated = req.args.get('limit') and req.args.get('format', 'json') != 'ndjson'
+    return 1 if paginated else 5
+
 @main.route('/api/transactions', methods=['GET'])
+@rate_cost(_list_cost)
 @token_required
+@read_only
+@conditional_get
 def list_transactions(current_user):
-    """Lista las transacciones del usuario con filtros opcionales."""
-    user_id = current_user.id
-    start_date = request.args.get('start_date')
-    end_date = request.args.get('end_date')
-    transaction_type = request.args.get('type')
-    category_id = request.args.get('category_id', type=int)
-    
-    query = Transaction.query.filter_by(user_id=user_id)
-    
-    if start_date:
-        try:
-            query = query.filter(Transaction.transaction_date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-        except ValueError:
-            return jsonify({'message': 'Formato de fecha de inicio inválido'}), 400
+    """Lista las transacciones del usuario con filtros, búsqueda y orden.
+
+    Filtros: start_date, end_date, type, category_id / category_ids (lista
+    separada por comas), min_amount, max_amount y q (texto en la descripción).
+    Orden: sort=date|amount|type|description|category (prefijo '-' o
+    order=desc para descendente; por defecto fecha descendente).
+
+    Sin `limit` devuelve todas las transacciones (comportamiento original).
+    Con `limit` (y opcionalmente `cursor`) pagina por keyset sobre la clave
+    de orden y el id; `include_total=1` añade el total de resultados. Con
+    `format=ndjson` transmite el resultado completo línea a línea.
 
-    if end_date:
+    Las transacciones archivadas se incluyen solo si el rango de fechas las
+    alcanza (ver app/archive.py).
+    """
+    try:
+        filters = parse_transaction_filters(request.args)
+        sort_key, descending = parse_sort(request.args)
+        sources = transaction_sources(current_user.id, filters, sort_key, descending)
+    except FilterError as e:
+        return jsonify({'message': str(e)}), 400
+
+    # Exportación completa en streaming (NDJSON)
+    if request.args.get('format', 'json') == 'ndjson':
+        def generate():
+            rows = iter_transactions(sources, sort_key, descending, STREAM_BATCH_SIZE)
+            for t, category_name in rows:
+                yield current_app.json.dumps(serialize_transaction(t, category_name)) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    limit = request.args.get('limit', type=int)
+    cursor = request.args.get('cursor')
+    next_cursor = None
+    total = None
+
+    if request.args.get('include_total') in ('1', 'true'):
+        total = count_transactions(current_user.id, filters, include_archive=len(sources) > 1)
+
+    if limit is not None:
+        if limit <= 0:
+            return jsonify({'message': 'El parámetro limit debe ser positivo'}), 400
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        # Pedimos una fila extra para saber si hay más páginas
         try:
-            query = query.filter(Transaction.transaction_date <= datetime.strptime(end_date, '%Y-%m-%d').date())
-        except ValueError:
-            return jsonify({'message': 'Formato de fecha de fin inválido'}), 400
+            rows = fetch_transactions(sources, sort_key, descending, limit + 1, cursor)
+        except FilterError as e:
+            return jsonify({'message': str(e)}), 400
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last, last_category_name = rows[-1]
+            next_cursor = encode_cursor(sort_key, cursor_value(last, last_category_name, sort_key), last.id)
+    else:
+        rows = fetch_transactions(sources, sort_key, descending)
 
-    if transaction_type and transaction_type in ['INCOME', 'EXPENSE']:
-        query = query.filter_by(type=transaction_type)
-        
-    if category_id:
-        query = query.filter_by(category_id=category_id)
+    transaction_list = [serialize_transaction(t, category_name) for t, category_name in rows]
 
-    transactions = query.order_by(Transaction.transaction_date.desc()).all()
-    
-    transaction_list = []
-    for t in transactions:
-        category = Category.query.get(t.category_id)
-        
-        transaction_list.append({
-            'id': t.id,
-            'amount': float(t.amount),
-            'type': t.type,
-            'description': t.description,
-            'date': t.transaction_date.strftime('%Y-%m-%d'),
-            'category_id': t.category_id,
-            'category_name': category.name if category else 'Desconocida'
-        })
-        
-    return jsonify({
+    response = {
         'transactions': transaction_list,
         'count': len(transaction_list),
+        'next_cursor': next_cursor,
         'message': 'Lista de transacciones cargada con éxito'
+    }
+    if total is not None:
+        response['total'] = total
+    return jsonify(response), 200
+
+@main.route('/api/transactions/export', methods=['GET'])
+@rate_cost(10)
+@token_required
+@read_only
+def export_transactions(current_user):
+    """Descarga el historial en CSV, XLSX o Parquet (`format`, por defecto csv).
+
+    Admite los mismos filtros y orden que el listado y transmite las filas
+    por lotes, sin cargar el historial completo en memoria.
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'message': f"Formato no soportado (usa {', '.join(EXPORT_FORMATS)})"}), 400
+
+    try:
+        filters = parse_transaction_filters(request.args)
+        sort_key, descending = parse_sort(request.args)
+        sources = transaction_sources(current_user.id, filters, sort_key, descending)
+    except FilterError as e:
+        return jsonify({'message': str(e)}), 400
+
+    rows = export_rows(iter_transactions(sources, sort_key, descending, STREAM_BATCH_SIZE))
+
+    stream, mimetype = EXPORT_FORMATS[export_format]
+    try:
+        body = stream(rows, STREAM_BATCH_SIZE)
+    except ExportFormatUnavailable as e:
+        return jsonify({'message': str(e)}), 400
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(export_format)}"'
+    return response
+
+@main.route('/api/sync', methods=['GET'])
+@token_required
+@read_only
+@conditional_get
+def sync_changes(current_user):
+    """Transacciones y categorías creadas, modificadas o borradas desde `since`.
+
+    `since` es la `version` devuelta por la sincronización anterior (0 o
+    ausente para el estado completo). Si `full` es true el cliente debe
+    sustituir su copia en lugar de aplicar los cambios.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'message': 'El parámetro since debe ser un entero'}), 400
+
+    version, full, rows, categories, deleted = get_changes(current_user.id, since)
+    return jsonify({
+        'version': version,
+        'full': full,
+        'transactions': [serialize_transaction(t, category_name) for t, category_name in rows],
+        'categories': categories,
+        'deleted': {'transactions': deleted[ENTITY_TRANSACTION], 'categories': deleted[ENTITY_CATEGORY]},
+        'message': 'Cambios cargados con éxito'
     }), 200
 
+@main.route('/api/transactions', methods=['PATCH'])
+@rate_cost(3)
+@token_required
+def batch_update_transactions(current_user):
+    """Modifica varias transacciones en una sola sentencia.
+
+    Cuerpo: `ids` (lista) o `filter` (filtros del listado) y `changes` con
+    amount, type, category_id, description y/o date.
+    """
+    data = request.get_json(silent=True) or {}
+    user_id = current_user.id
+
+    try:
+        query = selection_query(user_id, data, current_app.config['BATCH_MAX_IDS'])
+        changes = parse_changes(data.get('changes'))
+    except FilterError as e:
+        return jsonify({'message': str(e)}), 400
+
+    if 'category_id' in changes:
+        if find_category(user_id, changes['category_id']) is None:
+            return jsonify({'message': 'Categoría no encontrada'}), 404
+
+    try:
+        updated = batch_update(user_id, query, changes)
+        return jsonify({'message': 'Transacciones actualizadas con éxito', 'updated': updated}), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al actualizar transacciones: {e}")
+        return jsonify({'message': 'Error interno al actualizar las transacciones'}), 500
+
+@main.route('/api/transactions', methods=['DELETE'])
+@rate_cost(3)
+@token_required
+def batch_delete_transactions(current_user):
+    """Elimina varias transacciones (`ids` o `filter`) en una sola sentencia."""
+    data = request.get_json(silent=True) or {}
+    user_id = current_user.id
+
+    try:
+        query = selection_query(user_id, data, current_app.config['BATCH_MAX_IDS'])
+    except FilterError as e:
+        return jsonify({'message': str(e)}), 400
+
+    try:
+        deleted = batch_delete(user_id, query)
+        return jsonify({'message': 'Transacciones eliminadas con éxito', 'deleted': deleted}), 200
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al eliminar transacciones: {e}")
+        return jsonify({'message': 'Error interno al eliminar las transacciones'}), 500
+
 @main.route('/api/transactions/<int:transaction_id>', methods=['PUT'])
 @token_required
 def update_transaction(current_user, transaction_id):
@@ -302,34 +642,48 @@ def update_transaction(current_user, transaction_id):
     transaction = Transaction.query.filter_by(id=transaction_id, user_id=user_id).first()
     
     if not transaction:
+        if is_archived(user_id, transaction_id):
+            return jsonify({'message': 'La transacción está archivada y no se puede modificar'}), 409
         return jsonify({'message': 'Transacción no encontrada'}), 404
 
+    # Valores previos para ajustar el rollup mensual tras la edición
+    previous = (transaction.transaction_date, transaction.category_id, transaction.type, transaction.amount)
+
     try:
+        changes = {}
         if 'amount' in data:
             amount = float(data['amount'])
             if amount <= 0:
                 return jsonify({'message': 'El monto debe ser positivo'}), 400
-            transaction.amount = amount
+            changes['amount'] = amount
             
         if 'type' in data:
             transaction_type = data['type'].upper()
             if transaction_type not in ['INCOME', 'EXPENSE']:
                 return jsonify({'message': 'Tipo de transacción inválido'}), 400
-            transaction.type = transaction_type
+            changes['type'] = transaction_type
             
         if 'category_id' in data:
             category_id = int(data['category_id'])
-            category = Category.query.filter_by(id=category_id, user_id=user_id).first()
-            if not category:
+            if find_category(user_id, category_id) is None:
                 return jsonify({'message': 'Categoría no encontrada'}), 404
-            transaction.category_id = category_id
+            changes['category_id'] = category_id
             
         if 'description' in data:
-            transaction.description = data['description']
+            changes['description'] = data['description']
             
         if 'date' in data:
-            transaction.transaction_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+            changes['transaction_date'] = datetime.strptime(data['date'], '%Y-%m-%d').date()
 
+        # La versión se sube antes de tocar la fila: así el autoflush de los
+        # rollups emite un único UPDATE de la transacción con todo
+        changes['change_version'] = bump_data_version(user_id)
+        for name, value in changes.items():
+            setattr(transaction, name, value)
+
+        previous_date, previous_category_id, previous_type, previous_amount = previous
+        apply_rollup_delta(user_id, previous_date, previous_category_id, previous_type, -previous_amount, -1)
+        add_transaction_to_rollup(transaction)
         db.session.commit()
         
         return jsonify({'message': 'Transacción actualizada con éxito'}), 200
@@ -350,10 +704,14 @@ def delete_transaction(current_user, transaction_id):
     transaction = Transaction.query.filter_by(id=transaction_id, user_id=user_id).first()
     
     if not transaction:
+        if is_archived(user_id, transaction_id):
+            return jsonify({'message': 'La transacción está archivada y no se puede modificar'}), 409
         return jsonify({'message': 'Transacción no encontrada'}), 404
 
     try:
+        remove_transaction_from_rollup(transaction)
         db.session.delete(transaction)
+        record_deletions(user_id, ENTITY_TRANSACTION, [transaction_id], bump_data_version(user_id))
         db.session.commit()
         
         return jsonify({'message': 'Transacción eliminada con éxito'}), 200
@@ -362,3 +720,155 @@ def delete_transaction(current_user, transaction_id):
         db.session.rollback()
         print(f"Error al eliminar transacción: {e}")
         return jsonify({'message': 'Error interno al eliminar la transacción'}), 500
+
+# --- RUTAS DE TRANSACCIONES RECURRENTES ---
+
+@main.route('/api/recurring', methods=['GET'])
+@token_required
+@read_only
+def get_recurring_rules(current_user):
+    """Devuelve las reglas de transacciones recurrentes del usuario.
+
+    Sin ETag: la generación programada avanza `next_date` sin cambiar la
+    versión de datos del usuario.
+    """
+    return jsonify(list_rules(current_user.id)), 200
+
+@main.route('/api/recurring', methods=['POST'])
+@token_required
+def create_recurring_rule(current_user):
+    """Crea una regla recurrente y genera sus transacciones ya vencidas.
+
+    Campos: `amount`, `type`, `category_id`, `frequency` (DAILY, WEEKLY,
+    MONTHLY, YEARLY), `start_date` y, opcionales, `every` (cada N periodos),
+    `end_date` y `description`.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        rule, created = create_rule(current_user.id, data)
+        return jsonify(dict(rule, created=created, message='Regla recurrente creada con éxito')), 201
+    except RecurringRuleError as e:
+        return jsonify({'message': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al crear regla recurrente: {e}")
+        return jsonify({'message': 'Error interno al crear la regla recurrente'}), 500
+
+@main.route('/api/recurring/<int:rule_id>', methods=['PUT'])
+@token_required
+def update_recurring_rule(current_user, rule_id):
+    """Modifica una regla recurrente (también `active`); no cambia lo ya generado."""
+    data = request.get_json(silent=True) or {}
+    try:
+        rule, created = update_rule(current_user.id, rule_id, data)
+        return jsonify(dict(rule, created=created, message='Regla recurrente actualizada con éxito')), 200
+    except RecurringRuleError as e:
+        db.session.rollback()
+        return jsonify({'message': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al actualizar regla recurrente: {e}")
+        return jsonify({'message': 'Error interno al actualizar la regla recurrente'}), 500
+
+@main.route('/api/recurring/<int:rule_id>', methods=['DELETE'])
+@token_required
+def delete_recurring_rule(current_user, rule_id):
+    """Elimina una regla recurrente; las transacciones que generó se conservan."""
+    try:
+        delete_rule(current_user.id, rule_id)
+        return jsonify({'message': 'Regla recurrente eliminada con éxito'}), 200
+    except RecurringRuleError as e:
+        return jsonify({'message': str(e)}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al eliminar regla recurrente: {e}")
+        return jsonify({'message': 'Error interno al eliminar la regla recurrente'}), 500
+
+# --- RUTAS DE INFORMES (EN SEGUNDO PLANO) ---
+
+def serialize_report_job(job):
+    """Estado de un job de informe; incluye el resultado cuando está listo."""
+    data = {
+        'id': job.id,
+        'status': job.status,
+        'start_date': job.start_date,
+        'end_date': job.end_date,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+    }
+    if job.status == 'DONE':
+        data['result'] = current_app.json.loads(job.result)
+    elif job.status == 'FAILED':
+        data['error'] = 'No se pudo generar el informe'
+    return data
+
+def _report_job_response(job, status_code):
+    response = jsonify(serialize_report_job(job))
+    response.status_code = status_code
+    response.headers['Location'] = f"/api/reports/{job.id}"
+    if job.status == 'DONE':
+        # El resultado de un job terminado no cambia nunca
+        response.headers['Cache-Control'] = 'private, max-age=3600'
+    elif job.status != 'FAILED':
+        response.headers['Retry-After'] = '1'
+    return response
+
+@main.route('/api/reports', methods=['POST'])
+@rate_cost(5)
+@token_required
+def create_report(current_user):
+    """Encola un informe anual (`year`) o de un rango (`start_date`, `end_date`).
+
+    Devuelve 202 con el job a consultar, o 200 si ya existe un informe del
+    mismo rango sobre los datos actuales.
+    """
+    data = request.get_json(silent=True) or {}
+
+    try:
+        if data.get('year'):
+            year = int(data['year'])
+            start_date, end_date = date(year, 1, 1), date(year, 12, 31)
+        else:
+            start_date = datetime.strptime(data.get('start_date', ''), '%Y-%m-%d').date()
+            end_date = datetime.strptime(data.get('end_date', ''), '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return jsonify({'message': 'Indica un año o un rango de fechas válido (YYYY-MM-DD)'}), 400
+
+    if start_date > end_date:
+        return jsonify({'message': 'La fecha de inicio es posterior a la de fin'}), 400
+    if (end_date - start_date).days > current_app.config['REPORT_MAX_DAYS']:
+        return jsonify({'message': 'El rango del informe es demasiado amplio'}), 400
+
+    try:
+        job, version = find_reusable_job(current_user.id, start_date, end_date)
+        if job is not None:
+            return _report_job_response(job, 200)
+
+        job = ReportJob(user_id=current_user.id, start_date=start_date, end_date=end_date, data_version=version)
+        db.session.add(job)
+        db.session.commit()
+        job_id = job.id
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error al crear informe: {e}")
+        return jsonify({'message': 'Error interno al crear el informe'}), 500
+
+    try:
+        report_queue.submit(job_id)
+    except ReportQueueFull:
+        ReportJob.query.filter_by(id=job_id).delete()
+        db.session.commit()
+        return busy_response()
+
+    job = db.session.get(ReportJob, job_id)
+    db.session.refresh(job)
+    return _report_job_response(job, 200 if job.status == 'DONE' else 202)
+
+@main.route('/api/reports/<int:report_id>', methods=['GET'])
+@token_required
+def get_report(current_user, report_id):
+    """Estado y, si está terminado, resultado de un informe."""
+    job = ReportJob.query.filter_by(id=report_id, user_id=current_user.id).first()
+    if not job:
+        return jsonify({'message': 'Informe no encontrado'}), 404
+    return _report_job_response(job, 200)
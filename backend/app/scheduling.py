@@ -0,0 +1,59 @@
+# Archivo: app/scheduling.py
+"""Tareas periódicas en segundo plano (archivado, transacciones recurrentes).
+
+Cada worker arranca un hilo por tarea que la ejecuta cada N segundos en un
+contexto de app. En MySQL un bloqueo con nombre (GET_LOCK) impide que dos
+procesos ejecuten la misma tarea a la vez.
+"""
+import threading
+from contextlib import contextmanager
+from app import db
+
+
+@contextmanager
+def named_lock(name):
+    """Bloqueo entre procesos; cede False si otro proceso lo tiene."""
+    if db.engine.dialect.name != 'mysql':
+        yield True
+        return
+    with db.engine.connect() as connection:
+        acquired = connection.execute(db.text('SELECT GET_LOCK(:name, 0)'), {'name': name}).scalar()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                connection.execute(db.text('SELECT RELEASE_LOCK(:name)'), {'name': name})
+
+
+class PeriodicTask:
+    """Hilo que lanza `function` cada `interval` segundos."""
+
+    def __init__(self, function, name, error_message):
+        self.function = function
+        self.name = name
+        self.error_message = error_message
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self, app, interval):
+        self.stop()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._loop, args=(app, interval, self._stop), name=self.name, daemon=True
+        )
+        self._thread.start()
+
+    def _loop(self, app, interval, stop):
+        while not stop.wait(interval):
+            with app.app_context():
+                try:
+                    self.function()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception(self.error_message)
+                finally:
+                    db.session.remove()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
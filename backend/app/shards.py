@@ -0,0 +1,218 @@
+# Archivo: app/shards.py
+"""Reparto de los datos de los usuarios entre varias bases (shards) por `User.id`.
+
+La base principal hace de directorio: guarda las cuentas (`users`, con el
+email único y la contraseña) y el mapa `user_shards` (usuario → bind). Los
+shards se declaran en `DB_SHARD_URIS` y se registran como binds `shard_0`,
+`shard_1`... de Flask-SQLAlchemy. Cada shard tiene el esquema completo (las
+migraciones se aplican a todas las bases, ver migrations/env.py) y una copia
+de la fila `users` de sus usuarios, que es la que lleva `data_version` y
+`sync_floor`.
+
+`token_required` busca el shard del usuario (con una caché en memoria de
+SHARD_MAP_CACHE_SECONDS) y lo deja en `g.shard`; `RoutingSession` manda
+entonces todas las consultas de la petición a ese bind. Los usuarios sin
+fila en el mapa viven en la base principal, así que sin shards configurados
+nada cambia. Las réplicas de lectura (app/replicas.py) son solo de la
+principal.
+
+Las altas se reparten por turnos entre SHARD_NEW_USERS. `flask move-user` y
+`flask rebalance-shards` (app/rebalance.py) mueven usuarios en caliente para
+repartir la carga al añadir un shard.
+"""
+from contextlib import contextmanager
+from flask import g, has_app_context
+from app import db
+from app.cache import LocalCache
+from app.models import User, UserShard
+
+# Nombre de la base principal en la CLI y en los logs (en `g.shard` es None)
+PRIMARY_SHARD = 'primary'
+SHARD_BIND_PREFIX = 'shard_'
+
+
+class ShardError(Exception):
+    """Shard desconocido o mudanza imposible."""
+
+
+def shard_name(key):
+    """Nombre para la CLI de un bind de shard (None = principal)."""
+    return key or PRIMARY_SHARD
+
+
+def shard_binds(uris):
+    """Binds de Flask-SQLAlchemy para las URIs de shard configuradas."""
+    return {f"{SHARD_BIND_PREFIX}{index}": uri for index, uri in enumerate(uris)}
+
+
+class ShardRouter:
+    """Mapa usuario → shard con una caché local de pocos segundos."""
+
+    def __init__(self):
+        self.keys = []
+        self.new_user_keys = []
+        self.cache = LocalCache(max_size=10000, ttl=5)
+
+    def configure(self, keys, new_user_keys, cache_size, cache_ttl):
+        unknown = set(new_user_keys) - set(keys)
+        if unknown:
+            raise ShardError(f"SHARD_NEW_USERS incluye binds desconocidos: {', '.join(sorted(unknown))}")
+        self.keys = list(keys)
+        self.new_user_keys = list(new_user_keys or keys)
+        self.cache.max_size = cache_size
+        self.cache.ttl = cache_ttl
+        self.cache.clear()
+
+    @property
+    def enabled(self):
+        return bool(self.keys)
+
+    def all_shards(self):
+        """Todas las bases con datos de usuario: la principal (None) y los shards."""
+        return [None, *self.keys]
+
+    def parse(self, name):
+        """Bind de un nombre de la CLI ('primary' o 'shard_N'). Lanza ShardError."""
+        if name == PRIMARY_SHARD:
+            return None
+        if name not in self.keys:
+            raise ShardError(f"Shard desconocido: {name}")
+        return name
+
+    # --- MAPA ---
+
+    def cached(self, user_id):
+        return self.cache.get(user_id)
+
+    def remember(self, user_id, row):
+        """Guarda en caché la fila (shard, moving) del mapa, o su ausencia."""
+        entry = (row.shard, bool(row.moving)) if row is not None else (None, False)
+        self.cache.set(user_id, entry)
+        return entry
+
+    def lookup(self, user_id):
+        """(bind del shard del usuario o None para la principal, mudanza en curso)."""
+        entry = self.cached(user_id)
+        if entry is None:
+            row = directory_execute(
+                db.select(UserShard.shard, UserShard.moving).where(UserShard.user_id == user_id)
+            ).first()
+            entry = self.remember(user_id, row)
+        return entry
+
+    def place(self, user_ids):
+        """Reparte usuarios nuevos por turnos: {bind o None: [ids]}."""
+        placement = {}
+        for user_id in user_ids:
+            key = self.new_user_keys[user_id % len(self.new_user_keys)] if self.new_user_keys else None
+            placement.setdefault(key, []).append(user_id)
+        return placement
+
+
+shard_router = ShardRouter()
+
+
+def init_shards(app):
+    """Configura el mapa según DB_SHARD_URIS y SHARD_NEW_USERS."""
+    shard_router.configure(
+        sorted(shard_binds(app.config['DB_SHARD_URIS'])),
+        app.config['SHARD_NEW_USERS'],
+        cache_size=app.config['SHARD_MAP_CACHE_SIZE'],
+        cache_ttl=app.config['SHARD_MAP_CACHE_SECONDS'],
+    )
+
+
+# --- CONTEXTO ---
+
+def current_shard():
+    """Bind del contexto actual (None = base principal)."""
+    return g.get('shard') if has_app_context() else None
+
+
+@contextmanager
+def shard_context(key):
+    """Envía a `key` (None = principal) las consultas de la sesión dentro del bloque."""
+    previous = g.get('shard')
+    g.shard = key
+    try:
+        yield key
+    finally:
+        g.shard = previous
+
+
+def each_shard():
+    """Recorre todas las bases con datos de usuario fijando cada una como contexto.
+
+    La sesión se cierra al pasar a la siguiente: hay que confirmar dentro
+    del bucle.
+    """
+    for key in shard_router.all_shards():
+        with shard_context(key):
+            try:
+                yield key
+            finally:
+                db.session.close()
+
+
+def shards_for(user_id=None):
+    """Como `each_shard`, pero solo el shard de `user_id` si se indica."""
+    if user_id is None:
+        yield from each_shard()
+        return
+    key, _ = shard_router.lookup(user_id)
+    with shard_context(key):
+        try:
+            yield key
+        finally:
+            db.session.close()
+
+
+def bind_user_shard(user_id, writing):
+    """Fija en `g` el shard del usuario autenticado.
+
+    Devuelve False si la petición escribe y el usuario se está mudando.
+    """
+    if not shard_router.enabled:
+        return True
+    key, moving = shard_router.lookup(user_id)
+    g.shard = key
+    return not (moving and writing)
+
+
+# --- DIRECTORIO ---
+
+def directory_execute(statement, params=None):
+    """Ejecuta `statement` en la base principal, sea cual sea el shard del contexto."""
+    return db.session.execute(statement, params, bind_arguments={'bind': db.engine})
+
+
+def assign_users(user_ids, key, moving=False):
+    """Apunta `user_ids` al shard `key` en el mapa (None = principal). No hace commit.
+
+    Con `moving` sus escrituras quedan congeladas hasta la siguiente asignación.
+    """
+    table = UserShard.__table__
+    directory_execute(table.delete().where(table.c.user_id.in_(user_ids)))
+    if key is not None or moving:
+        directory_execute(table.insert(), [
+            {'user_id': user_id, 'shard': key, 'moving': moving} for user_id in user_ids
+        ])
+    shard_router.cache.delete(*user_ids)
+
+
+def moving_users():
+    """Ids de los usuarios con una mudanza en curso (sus escrituras están congeladas)."""
+    return directory_execute(db.select(UserShard.user_id).where(UserShard.moving.is_(True))).scalars().all()
+
+
+def copy_user_rows(user_ids, source, target):
+    """Copia las filas `users` de `user_ids` de la base `source` a `target`. No hace commit."""
+    table = User.__table__
+    with shard_context(source):
+        rows = [dict(row) for row in db.session.execute(
+            db.select(table).where(table.c.id.in_(user_ids))
+        ).mappings()]
+    if rows:
+        with shard_context(target):
+            db.session.execute(table.insert(), rows)
+    return len(rows)
@@ -0,0 +1,118 @@
+# Archivo: app/sync.py
+"""Sincronización delta de transacciones y categorías (`GET /api/sync`).
+
+Cada escritura incrementa `users.data_version` (ver app/versioning.py) y
+marca las filas que toca con esa versión en `change_version`; los borrados
+dejan una baja en `deleted_records` con la versión del borrado. Un cliente
+que guarda la última versión recibida pide solo lo que cambió después.
+
+Las bajas antiguas se purgan con `flask purge-tombstones`; la versión
+purgada queda en `users.sync_floor` y un cliente que pide cambios desde una
+versión anterior recibe de nuevo el estado completo.
+"""
+from datetime import datetime, timedelta
+from app import db
+from app.models import User, Transaction, ArchivedTransaction, Category, DeletedRecord
+
+ENTITY_TRANSACTION = 'transaction'
+ENTITY_CATEGORY = 'category'
+
+
+# --- BAJAS ---
+
+def record_deletions(user_id, entity, entity_ids, version):
+    """Registra las bajas de `entity_ids` con la versión `version`. No hace commit."""
+    if not entity_ids:
+        return
+    now = datetime.utcnow()
+    db.session.execute(DeletedRecord.__table__.insert(), [
+        {'user_id': user_id, 'entity': entity, 'entity_id': entity_id,
+         'change_version': version, 'deleted_at': now}
+        for entity_id in entity_ids
+    ])
+
+
+def record_transaction_deletions(user_id, query, version):
+    """Registra como bajas las transacciones de `query` con un INSERT ... SELECT.
+
+    Se llama antes del DELETE de un lote, sin traer los ids a Python.
+    """
+    select_stmt = query.with_entities(
+        Transaction.user_id, db.literal(ENTITY_TRANSACTION), Transaction.id,
+        db.literal(version), db.literal(datetime.utcnow())
+    ).order_by(None).statement
+    db.session.execute(
+        DeletedRecord.__table__.insert().from_select(
+            ['user_id', 'entity', 'entity_id', 'change_version', 'deleted_at'], select_stmt
+        )
+    )
+
+
+def purge_tombstones(days):
+    """Borra las bajas de hace más de `days` días y sube `sync_floor`. No hace commit."""
+    threshold = datetime.utcnow() - timedelta(days=days)
+    tombstones = DeletedRecord.__table__
+    floors = db.session.execute(
+        db.select(tombstones.c.user_id, db.func.max(tombstones.c.change_version))
+        .where(tombstones.c.deleted_at < threshold)
+        .group_by(tombstones.c.user_id)
+    ).all()
+    if not floors:
+        return 0
+
+    users = User.__table__
+    db.session.execute(
+        users.update()
+        .where(users.c.id == db.bindparam('b_user_id'), users.c.sync_floor < db.bindparam('b_floor'))
+        .values(sync_floor=db.bindparam('b_floor')),
+        [{'b_user_id': user_id, 'b_floor': floor} for user_id, floor in floors]
+    )
+    result = db.session.execute(tombstones.delete().where(tombstones.c.deleted_at < threshold))
+    return result.rowcount
+
+
+# --- CAMBIOS ---
+
+def get_changes(user_id, since):
+    """Cambios del usuario posteriores a la versión `since`.
+
+    Devuelve (versión actual, completo, filas de transacciones (t, nombre de
+    categoría), categorías serializadas, bajas {'transaction': [...],
+    'category': [...]}). Con `completo` el cliente debe sustituir su copia:
+    ocurre con `since` 0, anterior a las bajas purgadas o posterior a la
+    versión actual (p. ej. tras restaurar la base de datos).
+    """
+    from app.categories import categories_statement, serialize_categories
+
+    version, floor = db.session.query(User.data_version, User.sync_floor).filter(User.id == user_id).one()
+    full = since <= 0 or since < floor or since > version
+
+    categories = categories_statement(user_id).where(Category.change_version <= version)
+    deleted = {ENTITY_TRANSACTION: [], ENTITY_CATEGORY: []}
+    transactions = []
+
+    # Las transacciones archivadas también cambian (p. ej. al fusionar categorías)
+    for entity in (Transaction, ArchivedTransaction):
+        query = db.session.query(entity, Category.name).outerjoin(
+            Category, entity.category_id == Category.id
+        ).filter(
+            entity.user_id == user_id,
+            entity.change_version <= version
+        )
+        if not full:
+            query = query.filter(entity.change_version > since)
+        transactions.extend(query.order_by(entity.change_version, entity.id).all())
+    transactions.sort(key=lambda row: (row[0].change_version, row[0].id))
+
+    if not full:
+        categories = categories.where(Category.change_version > since)
+        rows = db.session.query(DeletedRecord.entity, DeletedRecord.entity_id).filter(
+            DeletedRecord.user_id == user_id,
+            DeletedRecord.change_version > since,
+            DeletedRecord.change_version <= version
+        ).order_by(DeletedRecord.id)
+        for entity, entity_id in rows:
+            deleted.setdefault(entity, []).append(entity_id)
+
+    categories = serialize_categories(db.session.execute(categories).all())
+    return version, full, transactions, categories, deleted
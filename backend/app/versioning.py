@@ -0,0 +1,109 @@
+# Archivo: app/versioning.py
+"""Versión de datos por usuario y GETs condicionales (ETag / If-None-Match).
+
+Cada escritura sobre transacciones o categorías incrementa
+`users.data_version` en la misma transacción de base de datos. Los endpoints
+de lectura derivan su ETag de esa versión, de modo que una petición con
+`If-None-Match` vigente se responde con 304 tras una única lectura por
+clave primaria, sin ejecutar las consultas pesadas ni serializar nada. La
+misma versión forma parte de las claves de la caché de aplicación.
+"""
+import hashlib
+from datetime import date
+from functools import wraps
+from flask import g, request, make_response
+from app import db
+from app.models import User
+from app.replicas import replica_router
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def bump_data_version(user_id):
+    """Incrementa la versión de datos del usuario y devuelve la nueva. No hace commit.
+
+    El UPDATE bloquea la fila del usuario hasta el commit, así que dos
+    escrituras concurrentes obtienen versiones distintas y consecutivas; las
+    filas modificadas se marcan con ella en `change_version`. También abre
+    la ventana en la que el usuario lee del primario (app/replicas.py).
+    """
+    table = User.__table__
+    statement = table.update().where(table.c.id == user_id).values(data_version=table.c.data_version + 1)
+    replica_router.note_write(user_id)
+    # La nueva versión aún no está confirmada: el resto de la petición no
+    # lee ni guarda en la caché (ver `cached_data_version`)
+    g.data_version = (user_id, None)
+    # Con UPDATE ... RETURNING (SQLite >= 3.35, PostgreSQL) basta una sentencia
+    if db.engine.dialect.update_returning:
+        return db.session.execute(statement.returning(table.c.data_version)).scalar() or 0
+    db.session.execute(statement)
+    return get_data_version(user_id)
+
+
+def get_data_version(user_id):
+    """Versión de datos actual del usuario (0 si no existe)."""
+    version = db.session.query(User.data_version).filter(User.id == user_id).scalar()
+    return version or 0
+
+
+def get_user_state(user_id):
+    """(data_version, archived_until) del usuario en una sola lectura por clave primaria.
+
+    `archived_until` queda en `g` para el resto de la petición, así que el
+    listado no vuelve a consultarlo (ver `app.archive.archived_until`).
+    """
+    row = db.session.query(User.data_version, User.archived_until).filter(User.id == user_id).first()
+    version, archived_until = row if row is not None else (0, None)
+    g.archived_until = (user_id, archived_until)
+    g.data_version = (user_id, version or 0)
+    return version or 0, archived_until
+
+
+def cached_data_version(user_id):
+    """Versión con la que se construyen las claves de `response_cache` (ver app/cache.py).
+
+    Reutiliza la leída por `conditional_get` en la misma petición. Devuelve
+    None después de `bump_data_version`: hasta el commit la versión nueva no
+    es definitiva y no debe usarse como clave.
+    """
+    known = g.get('data_version')
+    if known is not None and known[0] == user_id:
+        return known[1]
+    version = get_data_version(user_id)
+    g.data_version = (user_id, version)
+    return version
+
+
+def build_etag(user_id, version, full_path=None):
+    """ETag fuerte para la petición actual (o para `full_path`, 'ruta?query').
+
+    Incluye la ruta con sus parámetros y la fecha del día, porque el resumen
+    depende del mes en curso.
+    """
+    key = f"{user_id}:{version}:{date.today().isoformat()}:{full_path or request.full_path}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def conditional_get(f):
+    """Decorador para handlers GET protegidos con `token_required`.
+
+    Responde 304 si el ETag enviado coincide; en otro caso ejecuta el handler
+    y añade `ETag` y `Cache-Control` a las respuestas 200.
+    """
+    @wraps(f)
+    def decorated(current_user, *args, **kwargs):
+        version, _ = get_user_state(current_user.id)
+        etag = build_etag(current_user.id, version)
+
+        # Comparación débil (RFC 9110): la compresión convierte el ETag en débil
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+        else:
+            response = make_response(f(current_user, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        return response
+    return decorated
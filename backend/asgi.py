@@ -0,0 +1,7 @@
+# Archivo: asgi.py
+# Punto de entrada ASGI (solo lectura) para alta concurrencia:
+#   uvicorn asgi:app --workers 4
+# Requiere: pip install starlette uvicorn aiomysql
+from app.asgi import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,2 @@
+# Archivo: benchmarks/__init__.py
+"""Scripts de benchmark de Gestomoney (se ejecutan con `python -m benchmarks.<script>` desde backend/)."""
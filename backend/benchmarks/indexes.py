@@ -0,0 +1,114 @@
+# Archivo: benchmarks/indexes.py
+"""Benchmark de los índices compuestos de `transactions`.
+
+Siembra un conjunto de datos sintético, ejecuta las consultas calientes de
+routes.py sin y con los índices compuestos, y muestra el plan EXPLAIN y los
+tiempos de cada una.
+
+Uso (desde backend/):
+    python -m benchmarks.indexes --database-url sqlite:////tmp/bench.db --users 20 --transactions 20000
+"""
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+from app import create_app, db
+from app.config import Config
+from app.models import User, Transaction
+from benchmarks.seed import seed_dataset
+
+COMPOSITE_INDEXES = ('ix_transactions_user_date_id', 'ix_transactions_user_type_date_amount')
+
+
+def build_queries(user_id):
+    """Consultas representativas de list_transactions y del resumen."""
+    start = date.today().replace(day=1) - timedelta(days=90)
+    return {
+        'list_page': db.select(Transaction.id, Transaction.amount, Transaction.transaction_date)
+            .where(Transaction.user_id == user_id)
+            .order_by(Transaction.transaction_date.desc(), Transaction.id.desc())
+            .limit(50),
+        'list_type_range': db.select(Transaction.id, Transaction.amount, Transaction.transaction_date)
+            .where(Transaction.user_id == user_id, Transaction.type == 'EXPENSE',
+                   Transaction.transaction_date >= start)
+            .order_by(Transaction.transaction_date.desc()),
+        'sum_by_type': db.select(db.func.sum(Transaction.amount))
+            .where(Transaction.user_id == user_id, Transaction.type == 'INCOME',
+                   Transaction.transaction_date >= start),
+    }
+
+
+def explain(connection, statement):
+    """Devuelve el plan de ejecución de `statement` como lista de líneas."""
+    compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = connection.exec_driver_sql(prefix + str(compiled)).fetchall()
+    return [' | '.join(str(value) for value in row) for row in rows]
+
+
+def time_query(connection, statement, repeat):
+    """Mediana en milisegundos de `repeat` ejecuciones."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.execute(statement).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def set_composite_indexes(enabled):
+    """Crea o elimina los índices compuestos definidos en el modelo."""
+    indexes = {index.name: index for index in Transaction.__table__.indexes}
+    for name in COMPOSITE_INDEXES:
+        index = indexes[name]
+        index.drop(db.engine, checkfirst=True)
+        if enabled:
+            index.create(db.engine)
+
+
+def run_phase(label, user_id, repeat):
+    print(f"\n=== {label} ===")
+    results = {}
+    with db.engine.connect() as connection:
+        for name, statement in build_queries(user_id).items():
+            results[name] = time_query(connection, statement, repeat)
+            print(f"\n-- {name}: {results[name]:.2f} ms (mediana de {repeat})")
+            for line in explain(connection, statement):
+                print(f"   {line}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=Config.SQLALCHEMY_DATABASE_URI)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--transactions', type=int, default=10000, help='Transacciones por usuario.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = args.database_url
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        user = User.query.order_by(User.id).first()
+        if user is None:
+            print(f"🌱 Sembrando {args.users} usuarios x {args.transactions} transacciones...")
+            seed_dataset(args.users, args.transactions, seed=args.seed)
+            user = User.query.order_by(User.id).first()
+
+        set_composite_indexes(False)
+        before = run_phase('Sin índices compuestos', user.id, args.repeat)
+        set_composite_indexes(True)
+        after = run_phase('Con índices compuestos', user.id, args.repeat)
+
+        print("\n=== Resumen ===")
+        for name in before:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            print(f"{name:<18} {before[name]:>9.2f} ms -> {after[name]:>9.2f} ms  (x{speedup:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+# Archivo: benchmarks/load.py
+"""Prueba de carga de la API de Gestomoney.
+
+Levanta `create_app` contra una base de datos local (SQLite por defecto),
+siembra N usuarios x M transacciones con el generador determinista de
+benchmarks/seed.py y lanza peticiones concurrentes contra register, login,
+listado, resumen y CRUD de transacciones. Para cada endpoint informa de
+latencias p50/p95/p99, throughput y consultas SQL por petición, y compara el
+resultado con un fichero de referencia JSON.
+
+Uso (desde backend/):
+    python -m benchmarks.load --users 20 --transactions 2000 --concurrency 8
+    python -m benchmarks.load --update-baseline      # regenera benchmarks/baseline.json
+
+Sale con código 1 si algún endpoint empeora más de `--tolerance` respecto a
+la referencia (p95 o consultas por petición).
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.models import User
+from benchmarks.seed import seed_dataset, benchmark_email, BENCHMARK_PASSWORD
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Margen de consultas por petición (la caché hace que la media no sea exacta)
+QUERY_TOLERANCE = 0.5
+
+# Contador de consultas SQL por hilo (el test client ejecuta la petición en el hilo que la lanza)
+_local = threading.local()
+
+
+def _count_query(*args):
+    _local.queries = getattr(_local, 'queries', 0) + 1
+
+
+def percentile(values, pct):
+    """Percentil por el método del rango más cercano."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class LoadRunner:
+    """Ejecuta los escenarios contra la app con un pool de hilos."""
+
+    def __init__(self, app, user_count, concurrency, seed):
+        self.app = app
+        self.user_count = user_count
+        self.concurrency = concurrency
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.tokens = {}
+        self.expense_categories = {}
+        self.created_ids = []
+        self.created_lock = threading.Lock()
+        self.register_counter = itertools.count()
+
+    def _random(self, fn, *args):
+        with self.rng_lock:
+            return fn(*args)
+
+    def login_all(self):
+        client = self.app.test_client()
+        for index in range(self.user_count):
+            response = client.post('/api/login', json={
+                'email': benchmark_email(index), 'password': BENCHMARK_PASSWORD
+            })
+            self.tokens[index] = response.get_json()['token']
+            categories = client.get('/api/categories', headers={'Authorization': f"Bearer {self.tokens[index]}"})
+            self.expense_categories[index] = [c['id'] for c in categories.get_json() if c['type'] == 'EXPENSE']
+
+    def _headers(self):
+        index = self._random(self.rng.randrange, self.user_count)
+        return {'Authorization': f"Bearer {self.tokens[index]}"}, index
+
+    # --- ESCENARIOS (devuelven la respuesta) ---
+
+    def do_register(self, client):
+        number = next(self.register_counter)
+        return client.post('/api/register', json={
+            'email': f"load{number}-{time.time_ns()}@gestomoney.test",
+            'password': BENCHMARK_PASSWORD,
+            'fullName': f"Carga {number}"
+        })
+
+    def do_login(self, client):
+        index = self._random(self.rng.randrange, self.user_count)
+        return client.post('/api/login', json={'email': benchmark_email(index), 'password': BENCHMARK_PASSWORD})
+
+    def do_list(self, client):
+        headers, _ = self._headers()
+        return client.get('/api/transactions?limit=50', headers=headers)
+
+    def do_list_filtered(self, client):
+        headers, _ = self._headers()
+        start = (date.today() - timedelta(days=90)).isoformat()
+        return client.get(f'/api/transactions?limit=50&type=EXPENSE&start_date={start}', headers=headers)
+
+    def do_summary(self, client):
+        headers, _ = self._headers()
+        return client.get('/api/data/summary', headers=headers)
+
+    def do_categories(self, client):
+        headers, _ = self._headers()
+        return client.get('/api/categories', headers=headers)
+
+    def do_create(self, client):
+        headers, index = self._headers()
+        response = client.post('/api/transactions', headers=headers, json={
+            'amount': self._random(self.rng.randint, 1, 300),
+            'type': 'EXPENSE',
+            'category_id': self._random(self.rng.choice, self.expense_categories[index]),
+            'date': date.today().isoformat(),
+            'description': 'Carga'
+        })
+        if response.status_code == 201:
+            with self.created_lock:
+                self.created_ids.append((index, response.get_json()['id']))
+        return response
+
+    def _pop_created(self):
+        with self.created_lock:
+            return self.created_ids.pop() if self.created_ids else None
+
+    def do_update(self, client):
+        item = self._pop_created()
+        if item is None:
+            return None
+        index, transaction_id = item
+        response = client.put(f'/api/transactions/{transaction_id}',
+                              headers={'Authorization': f"Bearer {self.tokens[index]}"},
+                              json={'amount': 42, 'description': 'Carga editada'})
+        with self.created_lock:
+            self.created_ids.insert(0, item)
+        return response
+
+    def do_delete(self, client):
+        item = self._pop_created()
+        if item is None:
+            return None
+        index, transaction_id = item
+        return client.delete(f'/api/transactions/{transaction_id}',
+                             headers={'Authorization': f"Bearer {self.tokens[index]}"})
+
+    # --- EJECUCIÓN ---
+
+    def _call(self, scenario):
+        client = self.app.test_client()
+        _local.queries = 0
+        started = time.perf_counter()
+        response = scenario(client)
+        elapsed = (time.perf_counter() - started) * 1000
+        if response is None:
+            return None
+        return elapsed, _local.queries, response.status_code
+
+    def run(self, name, scenario, requests):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = [r for r in pool.map(lambda _: self._call(scenario), range(requests)) if r]
+        wall = time.perf_counter() - started
+
+        latencies = [r[0] for r in results]
+        errors = sum(1 for r in results if r[2] >= 400)
+        return {
+            'requests': len(results),
+            'errors': errors,
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'throughput_rps': round(len(results) / wall, 1) if wall else 0.0,
+            'queries_per_request': round(statistics.mean(r[1] for r in results), 2),
+        }
+
+
+SCENARIOS = [
+    ('register', 'do_register'),
+    ('login', 'do_login'),
+    ('categories', 'do_categories'),
+    ('summary', 'do_summary'),
+    ('list', 'do_list'),
+    ('list_filtered', 'do_list_filtered'),
+    ('create', 'do_create'),
+    ('update', 'do_update'),
+    ('delete', 'do_delete'),
+]
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Devuelve la lista de regresiones respecto a la referencia."""
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get('endpoints', {}).get(name)
+        if not reference:
+            continue
+        if current['p95_ms'] > reference['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {current['p95_ms']} ms > {reference['p95_ms']} ms")
+        if current['queries_per_request'] > reference['queries_per_request'] + QUERY_TOLERANCE:
+            regressions.append(
+                f"{name}: {current['queries_per_request']} consultas/petición > {reference['queries_per_request']}"
+            )
+        if current['errors'] > reference.get('errors', 0):
+            regressions.append(f"{name}: {current['errors']} errores")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=None,
+                        help='Por defecto, una base SQLite en un fichero temporal.')
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--transactions', type=int, default=1000, help='Transacciones por usuario.')
+    parser.add_argument('--requests', type=int, default=200, help='Peticiones por endpoint.')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--bcrypt-rounds', type=int, default=4,
+                        help='Coste de bcrypt para register/login (12 en producción).')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Empeoramiento de p95 admitido respecto a la referencia (0.5 = 50%%).')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    temporary_path = None
+    if database_url is None:
+        handle, temporary_path = tempfile.mkstemp(prefix='gestomoney-load-', suffix='.db')
+        os.close(handle)
+        database_url = f"sqlite:///{temporary_path}"
+
+    try:
+        return run_benchmark(args, database_url)
+    finally:
+        if temporary_path:
+            os.remove(temporary_path)
+
+
+def run_benchmark(args, database_url):
+    class LoadConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        BCRYPT_LOG_ROUNDS = args.bcrypt_rounds
+        PASSWORD_HASH_MAX_PENDING = args.concurrency
+        # Todas las peticiones salen de la misma IP: los límites por IP y por
+        # usuario convertirían la prueba de carga en una de 429
+        RATELIMIT_ENABLED = False
+
+    app = create_app(LoadConfig)
+    with app.app_context():
+        db.create_all()
+        if User.query.filter_by(email=benchmark_email(0)).first() is None:
+            print(f"🌱 Sembrando {args.users} usuarios x {args.transactions} transacciones en {database_url}")
+            seed_dataset(args.users, args.transactions, seed=args.seed)
+        event.listen(db.engine, 'before_cursor_execute', _count_query)
+
+    runner = LoadRunner(app, args.users, args.concurrency, args.seed)
+    runner.login_all()
+
+    results = {}
+    print(f"\n{'endpoint':<14}{'req':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}{'SQL/req':>9}")
+    for name, method in SCENARIOS:
+        stats = runner.run(name, getattr(runner, method), args.requests)
+        results[name] = stats
+        print(f"{name:<14}{stats['requests']:>6}{stats['errors']:>5}{stats['p50_ms']:>10.2f}"
+              f"{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}{stats['throughput_rps']:>9.1f}"
+              f"{stats['queries_per_request']:>9.2f}")
+
+    report = {
+        'parameters': {
+            'users': args.users, 'transactions': args.transactions, 'requests': args.requests,
+            'concurrency': args.concurrency, 'seed': args.seed, 'bcrypt_rounds': args.bcrypt_rounds,
+            'database': database_url.split(':', 1)[0],
+        },
+        'endpoints': results,
+    }
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"\n✅ Referencia actualizada en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️  No hay referencia en {args.baseline} (usa --update-baseline)")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ Regresiones respecto a la referencia:")
+        for line in regressions:
+            print(f"   {line}")
+        return 1
+    print("\n✅ Sin regresiones respecto a la referencia")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+# Archivo: benchmarks/seed.py
+"""Generador determinista de datos sintéticos para los benchmarks.
+
+Con la misma semilla siempre produce los mismos usuarios, categorías y
+transacciones, así que las mediciones entre ejecuciones son comparables.
+"""
+import random
+from datetime import date, timedelta
+from app import db
+from app.models import User, Category, Transaction
+from app.provisioning import provision_default_categories
+from app.rollups import rebuild_rollups
+
+# Hash bcrypt fijo de la contraseña 'benchmark' (evita pagar bcrypt al sembrar)
+BENCHMARK_PASSWORD = 'benchmark'
+BENCHMARK_PASSWORD_HASH = '$2b$04$csfSL3wLQ.kt7I3mQi8QzO5FJq4egW5ticmjYUJY2IwgqaweH2MHu'
+
+DESCRIPTIONS = [
+    'Supermercado', 'Alquiler', 'Gasolina', 'Cine', 'Restaurante', 'Nómina',
+    'Farmacia', 'Luz', 'Agua', 'Internet', 'Regalo cumpleaños', 'Taxi',
+]
+
+CHUNK_SIZE = 5000
+
+
+def benchmark_email(index):
+    """Email del usuario sintético número `index`."""
+    return f"bench{index}@gestomoney.test"
+
+
+def seed_dataset(users, transactions_per_user, seed=42, years=3, password_hash=None):
+    """Inserta `users` usuarios con `transactions_per_user` transacciones cada uno.
+
+    Usa inserciones multi-fila por bloques y construye los rollups mensuales
+    de cada usuario con el mismo INSERT ... SELECT de `flask rebuild-rollups`.
+    Devuelve la lista de ids de usuario creados. Hace commit al terminar cada
+    usuario.
+    """
+    rng = random.Random(seed)
+    password_hash = password_hash or BENCHMARK_PASSWORD_HASH
+    today = date.today()
+    first_day = today - timedelta(days=365 * years)
+    span_days = (today - first_day).days
+
+    user_ids = []
+    for index in range(users):
+        user = User(full_name=f"Usuario {index}", email=benchmark_email(index), password_hash=password_hash)
+        db.session.add(user)
+        db.session.flush()
+        user_ids.append(user.id)
+
+        provision_default_categories([user.id])
+        categories = db.session.query(Category.id, Category.type).filter_by(user_id=user.id).all()
+        income_ids = [cid for cid, cat_type in categories if cat_type == 'INCOME']
+        expense_ids = [cid for cid, cat_type in categories if cat_type == 'EXPENSE']
+
+        rows = []
+        for _ in range(transactions_per_user):
+            is_income = rng.random() < 0.2
+            rows.append({
+                'user_id': user.id,
+                'category_id': rng.choice(income_ids if is_income else expense_ids),
+                'amount': round(rng.uniform(500, 3000) if is_income else rng.uniform(1, 300), 2),
+                'type': 'INCOME' if is_income else 'EXPENSE',
+                'description': rng.choice(DESCRIPTIONS),
+                'transaction_date': first_day + timedelta(days=rng.randrange(span_days + 1)),
+            })
+            if len(rows) >= CHUNK_SIZE:
+                db.session.execute(Transaction.__table__.insert(), rows)
+                rows = []
+        if rows:
+            db.session.execute(Transaction.__table__.insert(), rows)
+        rebuild_rollups(user.id)
+        db.session.commit()
+
+    return user_ids
@@ -0,0 +1,47 @@
+# Archivo: gunicorn.conf.py
+# Configuración de Gunicorn generada a partir de variables de entorno.
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#
+# WEB_CONCURRENCY       procesos worker (por defecto 2 x núcleos + 1)
+# GUNICORN_WORKER_CLASS 'gthread' (por defecto), 'sync' o 'gevent'
+#                       (gevent requiere el paquete gevent y un driver en
+#                       Python puro como mysqlconnector; mysqldb bloquea el hilo)
+# GUNICORN_THREADS      hilos por worker con gthread
+# GUNICORN_WORKER_CONNECTIONS  conexiones simultáneas por worker con gevent
+#
+# Detrás de un proxy inverso (nginx, balanceador...) hay que fijar
+# RATELIMIT_TRUSTED_PROXIES al nº de saltos para que el limitador use la IP
+# real del cliente; en Railway y Render vale 1 por defecto.
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5002')}"
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+# Reciclar workers periódicamente (con jitter para no reiniciarlos a la vez)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'False').lower() in ['true', '1', 't']
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    # Con preload_app el engine se crea en el maestro: cada worker debe abrir
+    # sus propias conexiones en lugar de compartir los sockets heredados.
+    if preload_app:
+        from app import db
+        app = worker.app.wsgi()
+        with app.app_context():
+            db.engine.dispose(close=False)
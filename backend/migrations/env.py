@@ -24,6 +24,29 @@ def get_engine():
         return current_app.extensions['migrate'].db.engine
 
 
+def get_shard_engines():
+    """(nombre, engine) de las bases a migrar: la principal y los shards.
+
+    Los shards (DB_SHARD_URIS, ver app/shards.py) tienen el mismo esquema,
+    así que cada revisión se aplica a todos. `-x shard=<nombre>` ('primary'
+    o 'shard_N') limita la ejecución a una sola base.
+    """
+    from app.shards import PRIMARY_SHARD, shard_binds
+
+    engines = [(PRIMARY_SHARD, get_engine())]
+    binds = shard_binds(current_app.config.get('DB_SHARD_URIS', []))
+    if binds:
+        all_engines = current_app.extensions['migrate'].db.engines
+        engines.extend((key, all_engines[key]) for key in sorted(binds))
+
+    selected = context.get_x_argument(as_dictionary=True).get('shard')
+    if selected:
+        engines = [(name, engine) for name, engine in engines if name == selected]
+        if not engines:
+            raise RuntimeError(f"Shard desconocido: {selected}")
+    return engines
+
+
 def get_engine_url():
     try:
         return get_engine().url.render_as_string(hide_password=False).replace(
@@ -51,6 +74,22 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """Excluye de autogenerate los objetos que dependen del motor.
+
+    - Tablas internas de la búsqueda FTS5 de SQLite (transactions_fts*,
+      transactions_archive_fts*).
+    - Índices del modelo limitados a otro motor con ddl_if (p. ej. FULLTEXT de MySQL).
+    """
+    if type_ == 'table' and name.startswith(('transactions_fts', 'transactions_archive_fts')):
+        return False
+    if type_ == 'index' and not reflected:
+        ddl_if = getattr(object, '_ddl_if', None)
+        if ddl_if is not None and ddl_if.dialect and ddl_if.dialect != get_engine().dialect.name:
+            return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +104,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,18 +133,25 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
-
-    connectable = get_engine()
-
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=get_metadata(),
-            **conf_args
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+    conf_args.setdefault("include_object", include_object)
+
+    targets = get_shard_engines()
+    # autogenerate compara solo con la principal: una revisión por cambio de esquema
+    if getattr(config.cmd_opts, 'autogenerate', False):
+        targets = targets[:1]
+
+    for name, connectable in targets:
+        if len(targets) > 1:
+            logger.info('Base de datos: %s', name)
+        with connectable.connect() as connection:
+            context.configure(
+                connection=connection,
+                target_metadata=get_metadata(),
+                **conf_args
+            )
+
+            with context.begin_transaction():
+                context.run_migrations()
 
 
 if context.is_offline_mode():
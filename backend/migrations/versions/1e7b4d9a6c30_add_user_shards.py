@@ -0,0 +1,36 @@
+"""Add user_shards map for user-id sharding
+
+Revision ID: 1e7b4d9a6c30
+Revises: 9a3f6c2d8e47
+Create Date: 2026-10-18 12:32:05.510550
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1e7b4d9a6c30'
+down_revision = '9a3f6c2d8e47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_shards',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('shard', sa.String(length=32), nullable=True),
+    sa.Column('moving', sa.Boolean(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    with op.batch_alter_table('user_shards', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_shards_shard'), ['shard'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_shards', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_shards_shard'))
+
+    op.drop_table('user_shards')
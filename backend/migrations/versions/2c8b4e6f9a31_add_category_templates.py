@@ -0,0 +1,41 @@
+"""Add category_templates
+
+Revision ID: 2c8b4e6f9a31
+Revises: 7d2e5a9c0b13
+Create Date: 2026-10-18 16:02:44.170395
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c8b4e6f9a31'
+down_revision = '7d2e5a9c0b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    templates = op.create_table('category_templates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), server_default='1', nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Las mismas categorías que creaba create_default_categories()
+    op.bulk_insert(templates, [
+        {'name': 'Salario', 'type': 'INCOME', 'position': 1, 'is_active': True},
+        {'name': 'Regalo', 'type': 'INCOME', 'position': 2, 'is_active': True},
+        {'name': 'Comida y Bebidas', 'type': 'EXPENSE', 'position': 3, 'is_active': True},
+        {'name': 'Vivienda', 'type': 'EXPENSE', 'position': 4, 'is_active': True},
+        {'name': 'Transporte', 'type': 'EXPENSE', 'position': 5, 'is_active': True},
+        {'name': 'Ocio y Viajes', 'type': 'EXPENSE', 'position': 6, 'is_active': True},
+    ])
+
+
+def downgrade():
+    op.drop_table('category_templates')
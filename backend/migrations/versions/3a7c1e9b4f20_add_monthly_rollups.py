@@ -0,0 +1,55 @@
+"""Add monthly_rollups
+
+Revision ID: 3a7c1e9b4f20
+Revises: d5ef9c5110ec
+Create Date: 2026-10-18 10:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a7c1e9b4f20'
+down_revision = 'd5ef9c5110ec'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('monthly_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year_month', sa.String(length=7), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('total', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'year_month', 'category_id', 'type', name='uq_monthly_rollups_key')
+    )
+    with op.batch_alter_table('monthly_rollups', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_monthly_rollups_user_id'), ['user_id'], unique=False)
+
+    # Rellenar los rollups con el historial existente
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        month_expr = "DATE_FORMAT(transaction_date, '%Y-%m')"
+    elif dialect == 'sqlite':
+        month_expr = "strftime('%Y-%m', transaction_date)"
+    else:
+        month_expr = "to_char(transaction_date, 'YYYY-MM')"
+    op.execute(
+        "INSERT INTO monthly_rollups (user_id, year_month, category_id, type, total, count) "
+        f"SELECT user_id, {month_expr}, category_id, type, SUM(amount), COUNT(id) "
+        f"FROM transactions GROUP BY user_id, {month_expr}, category_id, type"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('monthly_rollups', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_monthly_rollups_user_id'))
+
+    op.drop_table('monthly_rollups')
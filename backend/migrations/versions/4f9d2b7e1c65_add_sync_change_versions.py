@@ -0,0 +1,67 @@
+"""Add change versions and deleted_records for delta sync
+
+Revision ID: 4f9d2b7e1c65
+Revises: 2c8b4e6f9a31
+Create Date: 2026-10-18 12:16:43.194901
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f9d2b7e1c65'
+down_revision = '2c8b4e6f9a31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('deleted_records',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('change_version', sa.Integer(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('deleted_records', schema=None) as batch_op:
+        batch_op.create_index('ix_deleted_records_deleted_at', ['deleted_at'], unique=False)
+        batch_op.create_index('ix_deleted_records_user_change_version', ['user_id', 'change_version'], unique=False)
+
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('change_version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_categories_user_change_version', ['user_id', 'change_version'], unique=False)
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('change_version', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_transactions_user_change_version', ['user_id', 'change_version'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sync_floor', sa.Integer(), server_default='0', nullable=False))
+
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('sync_floor')
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_user_change_version')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('change_version')
+
+    with op.batch_alter_table('categories', schema=None) as batch_op:
+        batch_op.drop_index('ix_categories_user_change_version')
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('change_version')
+
+    with op.batch_alter_table('deleted_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_deleted_records_user_change_version')
+        batch_op.drop_index('ix_deleted_records_deleted_at')
+
+    op.drop_table('deleted_records')
@@ -0,0 +1,26 @@
+"""Add users.data_version
+
+Revision ID: 5b0d3e8f1a76
+Revises: c92f4a1d6e08
+Create Date: 2026-10-18 12:40:19.583302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b0d3e8f1a76'
+down_revision = 'c92f4a1d6e08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
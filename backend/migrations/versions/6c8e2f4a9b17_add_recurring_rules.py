@@ -0,0 +1,86 @@
+"""Add recurring_rules, calendar_days and transactions.recurring_rule_id
+
+Revision ID: 6c8e2f4a9b17
+Revises: 1e7b4d9a6c30
+Create Date: 2026-10-18 12:39:53.723408
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c8e2f4a9b17'
+down_revision = '1e7b4d9a6c30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('calendar_days',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('day_index', sa.Integer(), nullable=False),
+    sa.Column('week_index', sa.Integer(), nullable=False),
+    sa.Column('month_index', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('day_of_month', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=False),
+    sa.Column('is_month_end', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('recurring_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('frequency', sa.String(length=10), nullable=False),
+    sa.Column('every', sa.Integer(), nullable=False),
+    sa.Column('anchor', sa.Integer(), nullable=False),
+    sa.Column('weekday', sa.Integer(), nullable=True),
+    sa.Column('day_of_month', sa.Integer(), nullable=True),
+    sa.Column('month', sa.Integer(), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=True),
+    sa.Column('next_date', sa.Date(), nullable=False),
+    sa.Column('active', sa.Boolean(), server_default='1', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('recurring_rules', schema=None) as batch_op:
+        batch_op.create_index('ix_recurring_rules_active_next_date', ['active', 'next_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_recurring_rules_category_id'), ['category_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_recurring_rules_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recurring_rule_id', sa.Integer(), nullable=True))
+        batch_op.create_unique_constraint('uq_transactions_recurring_rule_date', ['recurring_rule_id', 'transaction_date'])
+        batch_op.create_foreign_key('fk_transactions_recurring_rule_id', 'recurring_rules', ['recurring_rule_id'], ['id'])
+
+    with op.batch_alter_table('transactions_archive', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recurring_rule_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key('fk_transactions_archive_recurring_rule_id', 'recurring_rules', ['recurring_rule_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('transactions_archive', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_transactions_archive_recurring_rule_id', type_='foreignkey')
+        batch_op.drop_column('recurring_rule_id')
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_transactions_recurring_rule_id', type_='foreignkey')
+        batch_op.drop_constraint('uq_transactions_recurring_rule_date', type_='unique')
+        batch_op.drop_column('recurring_rule_id')
+
+    with op.batch_alter_table('recurring_rules', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recurring_rules_user_id'))
+        batch_op.drop_index(batch_op.f('ix_recurring_rules_category_id'))
+        batch_op.drop_index('ix_recurring_rules_active_next_date')
+
+    op.drop_table('recurring_rules')
+    op.drop_table('calendar_days')
@@ -0,0 +1,28 @@
+"""Add composite indexes on transactions
+
+Revision ID: 8e41b2d07c53
+Revises: 3a7c1e9b4f20
+Create Date: 2026-10-18 11:03:47.918224
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e41b2d07c53'
+down_revision = '3a7c1e9b4f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_user_date_id', ['user_id', 'transaction_date', 'id'], unique=False)
+        batch_op.create_index('ix_transactions_user_type_date_amount', ['user_id', 'type', 'transaction_date', 'amount'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_user_type_date_amount')
+        batch_op.drop_index('ix_transactions_user_date_id')
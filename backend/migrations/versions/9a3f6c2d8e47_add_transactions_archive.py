@@ -0,0 +1,46 @@
+"""Add transactions_archive for cold storage of old transactions
+
+Revision ID: 9a3f6c2d8e47
+Revises: 4f9d2b7e1c65
+Create Date: 2026-10-18 12:24:55.858183
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3f6c2d8e47'
+down_revision = '4f9d2b7e1c65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('transactions_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('type', sa.String(length=10), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('transaction_date', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('change_version', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('transactions_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_transactions_archive_category_id'), ['category_id'], unique=False)
+        batch_op.create_index('ix_transactions_archive_user_date_id', ['user_id', 'transaction_date', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_archive_user_date_id')
+        batch_op.drop_index(batch_op.f('ix_transactions_archive_category_id'))
+
+    op.drop_table('transactions_archive')
@@ -0,0 +1,33 @@
+"""Add users.archived_until so listings skip the archive lookup
+
+Revision ID: b7d3a1e5c902
+Revises: 6c8e2f4a9b17
+Create Date: 2026-10-18 12:50:15.555605
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3a1e5c902'
+down_revision = '6c8e2f4a9b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('archived_until', sa.Date(), nullable=True))
+
+    # Usuarios que ya tienen transacciones archivadas
+    op.execute(
+        "UPDATE users SET archived_until = ("
+        "SELECT MAX(transactions_archive.transaction_date) FROM transactions_archive "
+        "WHERE transactions_archive.user_id = users.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('archived_until')
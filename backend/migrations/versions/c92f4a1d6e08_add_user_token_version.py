@@ -0,0 +1,26 @@
+"""Add users.token_version
+
+Revision ID: c92f4a1d6e08
+Revises: 8e41b2d07c53
+Create Date: 2026-10-18 11:48:05.261930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c92f4a1d6e08'
+down_revision = '8e41b2d07c53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('token_version')
@@ -0,0 +1,52 @@
+"""Add full-text search on transactions_archive.description
+
+Revision ID: f3c8d2a7b519
+Revises: b7d3a1e5c902
+Create Date: 2026-10-18 16:20:41.208317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8d2a7b519'
+down_revision = 'b7d3a1e5c902'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transactions_archive_fts USING fts5("
+    "description, content='transactions_archive', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS transactions_archive_fts_ai AFTER INSERT ON transactions_archive BEGIN "
+    "INSERT INTO transactions_archive_fts(rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_archive_fts_ad AFTER DELETE ON transactions_archive BEGIN "
+    "INSERT INTO transactions_archive_fts(transactions_archive_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_archive_fts_au AFTER UPDATE OF description ON transactions_archive BEGIN "
+    "INSERT INTO transactions_archive_fts(transactions_archive_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "INSERT INTO transactions_archive_fts(rowid, description) VALUES (new.id, new.description); END",
+    "INSERT INTO transactions_archive_fts(transactions_archive_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.create_index('ix_transactions_archive_description_ft', 'transactions_archive', ['description'],
+                        unique=False, mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.drop_index('ix_transactions_archive_description_ft', table_name='transactions_archive')
+    elif dialect == 'sqlite':
+        for name in ('transactions_archive_fts_au', 'transactions_archive_fts_ad', 'transactions_archive_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS transactions_archive_fts")
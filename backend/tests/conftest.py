@@ -0,0 +1,116 @@
+# Archivo: tests/conftest.py
+"""Fixtures comunes: app contra una base SQLite temporal y usuarios con token.
+
+Se ejecutan desde backend/ con `python -m pytest`.
+"""
+import pytest
+from app import create_app, db
+from app.auth import decode_access_token
+from app.config import Config
+from app.models import MonthlyRollup
+from app.rollups import rebuild_rollups
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        TESTING = True
+        BCRYPT_LOG_ROUNDS = 4
+        PASSWORD_HASH_WORKERS = 0
+        REPORT_WORKERS = 0
+        RATELIMIT_ENABLED = False
+        CACHE_BACKEND = 'null'
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        # Solo la base principal: `db` recuerda los binds de shards de otras apps
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class ApiUser:
+    """Usuario registrado con su token y atajos para llamar a la API."""
+
+    def __init__(self, client, email):
+        assert client.post('/api/register', json={
+            'email': email, 'password': 'secreto', 'fullName': 'Prueba'
+        }).status_code == 201
+        token = client.post('/api/login', json={'email': email, 'password': 'secreto'}).get_json()['token']
+        self.id = decode_access_token(token)['user_id']
+        self.client = client
+        self.headers = {'Authorization': f'Bearer {token}'}
+        self.categories = self.get('/api/categories').get_json()
+
+    def get(self, path, **kwargs):
+        return self.client.get(path, headers=self.headers, **kwargs)
+
+    def post(self, path, json=None):
+        return self.client.post(path, headers=self.headers, json=json)
+
+    def put(self, path, json=None):
+        return self.client.put(path, headers=self.headers, json=json)
+
+    def patch(self, path, json=None):
+        return self.client.patch(path, headers=self.headers, json=json)
+
+    def delete(self, path, json=None):
+        return self.client.delete(path, headers=self.headers, json=json)
+
+    def category(self, cat_type, index=0):
+        """Id de la `index`-ésima categoría por defecto del tipo indicado."""
+        return [c['id'] for c in self.categories if c['type'] == cat_type][index]
+
+    def create(self, amount, date, cat_type='EXPENSE', category_id=None, description=None):
+        response = self.post('/api/transactions', json={
+            'amount': amount, 'type': cat_type, 'date': date, 'description': description,
+            'category_id': category_id or self.category(cat_type),
+        })
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()['id']
+
+    def bulk(self, rows):
+        response = self.post('/api/transactions/bulk', json=rows)
+        assert response.status_code == 201, response.get_json()
+        return response.get_json()
+
+
+@pytest.fixture
+def user(client):
+    return ApiUser(client, 'ana@gestomoney.test')
+
+
+@pytest.fixture
+def other_user(client):
+    return ApiUser(client, 'luis@gestomoney.test')
+
+
+def rollup_rows(user_id):
+    """Filas de monthly_rollups del usuario como {(mes, categoría, tipo): (total, nº)}."""
+    rows = db.session.query(
+        MonthlyRollup.year_month, MonthlyRollup.category_id, MonthlyRollup.type,
+        MonthlyRollup.total, MonthlyRollup.count
+    ).filter(MonthlyRollup.user_id == user_id).all()
+    return {(month, category, kind): (total, count) for month, category, kind, total, count in rows}
+
+
+@pytest.fixture
+def assert_rollups_consistent(app):
+    """Comprueba que los rollups incrementales coinciden con una reconstrucción completa."""
+    def check(user_id):
+        with app.app_context():
+            incremental = rollup_rows(user_id)
+            rebuild_rollups(user_id)
+            rebuilt = rollup_rows(user_id)
+            db.session.rollback()
+        assert incremental == rebuilt
+        return incremental
+    return check
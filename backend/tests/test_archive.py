@@ -0,0 +1,145 @@
+# Archivo: tests/test_archive.py
+"""Listados que mezclan la tabla caliente con el archivo de transacciones (user-023)."""
+from datetime import date
+import pytest
+from sqlalchemy.dialects import mysql
+from app import db
+from app.archive import archive_transactions, transaction_sources
+from app.models import ArchivedTransaction, Transaction, User
+from app.queries import keyset_condition, transaction_list_query
+
+SORTS = ['-date', 'date', 'amount', '-amount', 'description', '-category']
+CUTOFF = date(2024, 1, 1)
+
+
+def _seed(user):
+    # Importes y descripciones repetidos a ambos lados del corte, fechas
+    # intercaladas para que el orden por id no coincida con el de fechas. La
+    # última (id más alto) es reciente: el archivado nunca mueve esa fila
+    rows = []
+    for index in range(25):
+        year = 2023 if index % 2 else 2024
+        cat_type = 'INCOME' if index % 5 == 0 else 'EXPENSE'
+        rows.append({
+            'amount': str(10 + index % 4),
+            'type': cat_type,
+            'date': f"{year}-{index % 12 + 1:02d}-{index % 3 + 10}",
+            'description': ['Cine', 'Agua', None][index % 3],
+            'category_id': user.category(cat_type, index % 2),
+        })
+    user.bulk(rows)
+
+
+def _archive(app, user_id=None):
+    with app.app_context():
+        moved = archive_transactions(CUTOFF, chunk_size=5, user_id=user_id)
+        hot = db.session.query(Transaction).count()
+        cold = db.session.query(ArchivedTransaction).count()
+    return moved, hot, cold
+
+
+def _list(user, **params):
+    response = user.get('/api/transactions', query_string=params)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def _pages(user, limit, **params):
+    rows, cursor = [], None
+    while True:
+        page = _list(user, limit=limit, **params, **({'cursor': cursor} if cursor else {}))
+        rows.extend(t['id'] for t in page['transactions'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return rows
+
+
+@pytest.mark.parametrize('sort', SORTS)
+def test_archived_rows_keep_their_place(app, user, sort):
+    _seed(user)
+    before = [t['id'] for t in _list(user, sort=sort)['transactions']]
+
+    moved, hot, cold = _archive(app)
+    assert moved == 12 and cold == 12 and hot == 13
+
+    assert [t['id'] for t in _list(user, sort=sort)['transactions']] == before
+    assert _pages(user, 5, sort=sort) == before
+    assert _list(user, sort=sort, include_total=1, limit=1)['total'] == 25
+
+
+def test_ndjson_stream_merges_both_tables(app, user):
+    _seed(user)
+    before = [t['id'] for t in _list(user)['transactions']]
+    _archive(app)
+    response = user.get('/api/transactions', query_string={'format': 'ndjson'})
+    ids = [int(line.split('"id":')[1].split(',')[0]) for line in response.get_data(as_text=True).splitlines()]
+    assert ids == before
+
+
+def test_archived_until_skips_the_archive(app, user, other_user):
+    _seed(user)
+    other_user.create(5, '2020-06-01')
+    other_user.create(5, '2024-06-01')
+    _archive(app, user_id=user.id)
+
+    with app.app_context():
+        assert db.session.get(User, user.id).archived_until == date(2023, 12, 12)
+        # Solo se archivó a `user`
+        assert db.session.get(User, other_user.id).archived_until is None
+
+    with app.test_request_context():
+        # Un rango posterior a la última fecha archivada no consulta el archivo
+        assert len(transaction_sources(user.id, {'start_date': date(2023, 12, 13)}, 'date', True)) == 1
+        assert len(transaction_sources(user.id, {'start_date': date(2023, 12, 12)}, 'date', True)) == 2
+        assert len(transaction_sources(other_user.id, {}, 'date', True)) == 1
+
+    recent = _list(user, start_date='2024-01-01')
+    assert all(t['date'] >= '2024-01-01' for t in recent['transactions'])
+    assert recent['count'] == 13
+    assert _list(user, start_date='2023-12-01')['count'] == 15
+
+
+def test_filters_apply_to_archived_rows(app, user):
+    _seed(user)
+    expected = [t['id'] for t in _list(user, q='Cine', type='EXPENSE', sort='amount')['transactions']]
+    _archive(app)
+    assert [t['id'] for t in _list(user, q='Cine', type='EXPENSE', sort='amount')['transactions']] == expected
+
+
+def _seed_texts(user, descriptions):
+    # Cada descripción una vez a cada lado del corte
+    user.bulk([{
+        'amount': '10', 'type': 'EXPENSE', 'date': f"{year}-0{index % 9 + 1}-15",
+        'description': description, 'category_id': user.category('EXPENSE'),
+    } for year in (2023, 2024) for index, description in enumerate(descriptions)])
+
+
+def test_search_matches_the_same_words_in_the_archive(app, user):
+    # La búsqueda es por prefijo de palabra: 'cin' no encuentra 'Ecine'
+    _seed_texts(user, ['Cine club', 'cinema', 'Ecine', 'Agua'])
+    expected = _list(user, q='cin')['transactions']
+    assert {t['description'] for t in expected} == {'Cine club', 'cinema'}
+
+    _archive(app)
+    assert _list(user, q='cin')['transactions'] == expected
+    assert _list(user, q='cin', include_total=1, limit=10)['total'] == 4
+
+
+@pytest.mark.parametrize('sort', ['description', '-description'])
+def test_text_order_survives_archiving(app, user, sort):
+    _seed_texts(user, ['agua', 'Agua', 'Árbol', 'arbol', 'Zeta', 'éxito', 'b'])
+    before = [t['id'] for t in _list(user, sort=sort)['transactions']]
+    _archive(app)
+    assert [t['id'] for t in _list(user, sort=sort)['transactions']] == before
+    assert _pages(user, 3, sort=sort) == before
+
+
+def test_text_sort_is_binary_on_mysql(app):
+    # El merge en Python compara `str` por código de carácter: MySQL tiene que
+    # ordenar y paginar igual en las dos tablas (no con la collation *_ai_ci)
+    with app.app_context():
+        for entity in (Transaction, ArchivedTransaction):
+            query = transaction_list_query(1, {}, 'description', True, entity=entity)
+            query = query.filter(keyset_condition('description', True, 'x', 1, entity))
+            sql = str(query.statement.compile(dialect=mysql.dialect()))
+            assert sql.count('COLLATE utf8mb4_0900_bin') == 3
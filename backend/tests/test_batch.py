@@ -0,0 +1,106 @@
+# Archivo: tests/test_batch.py
+"""Edición y borrado de transacciones por lotes (user-016)."""
+from decimal import Decimal
+import pytest
+from sqlalchemy import event
+from app import db
+
+
+def _seed(user):
+    return [
+        user.create(10, '2024-01-05', description='Pan'),
+        user.create(20, '2024-01-20', category_id=user.category('EXPENSE', 1)),
+        user.create(1500, '2024-01-31', cat_type='INCOME'),
+        user.create(30, '2024-02-10', description='Cine'),
+    ]
+
+
+def _listed(user):
+    return {t['id']: t for t in user.get('/api/transactions').get_json()['transactions']}
+
+
+def test_update_by_ids_applies_the_changes(user):
+    ids = _seed(user)
+    response = user.patch('/api/transactions', json={
+        'ids': ids[:2], 'changes': {'amount': '7.5', 'description': 'Mercado', 'date': '2024-03-01'},
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['updated'] == 2
+    rows = _listed(user)
+    for transaction_id in ids[:2]:
+        assert Decimal(str(rows[transaction_id]['amount'])) == Decimal('7.50')
+        assert (rows[transaction_id]['description'], rows[transaction_id]['date']) == ('Mercado', '2024-03-01')
+    assert rows[ids[3]]['description'] == 'Cine'
+
+
+def test_update_by_filter_is_one_statement(app, user):
+    _seed(user)
+    updates = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE transactions '):
+            updates.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = user.patch('/api/transactions', json={
+            'filter': {'type': 'EXPENSE'}, 'changes': {'category_id': user.category('EXPENSE', 2)},
+        })
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.get_json()['updated'] == 3
+    assert len(updates) == 1
+    assert {t['category_id'] for t in _listed(user).values() if t['type'] == 'EXPENSE'} == {user.category('EXPENSE', 2)}
+
+
+def test_other_users_rows_are_never_selected(user, other_user):
+    ids = _seed(user)
+    theirs = other_user.create(99, '2024-01-05')
+
+    response = user.patch('/api/transactions', json={'ids': [ids[0], theirs], 'changes': {'amount': 1}})
+    assert response.get_json()['updated'] == 1
+    response = user.delete('/api/transactions', json={'ids': [theirs]})
+    assert response.get_json()['deleted'] == 0
+
+    assert Decimal(str(_listed(other_user)[theirs]['amount'])) == Decimal('99.00')
+
+
+def test_delete_by_filter(user):
+    ids = _seed(user)
+    response = user.delete('/api/transactions', json={'filter': {'start_date': '2024-01-15', 'type': 'EXPENSE'}})
+
+    assert response.get_json()['deleted'] == 2
+    assert set(_listed(user)) == {ids[0], ids[2]}
+
+
+def test_category_of_another_user_is_a_404(user, other_user):
+    ids = _seed(user)
+    before = {t['id']: t['category_id'] for t in _listed(user).values()}
+    response = user.patch('/api/transactions', json={
+        'ids': ids, 'changes': {'category_id': other_user.category('EXPENSE')},
+    })
+    assert response.status_code == 404
+    assert {t['id']: t['category_id'] for t in _listed(user).values()} == before
+
+
+@pytest.mark.parametrize('body', [
+    {'changes': {'amount': 1}},
+    {'ids': [], 'changes': {'amount': 1}},
+    {'ids': ['x'], 'changes': {'amount': 1}},
+    {'filter': {}, 'changes': {'amount': 1}},
+    {'ids': [1], 'changes': {}},
+    {'ids': [1], 'changes': {'amount': '-3'}},
+    {'ids': [1], 'changes': {'type': 'GASTO'}},
+    {'ids': [1], 'changes': {'date': '01/01/2024'}},
+])
+def test_invalid_selection_or_changes_is_a_400(user, body):
+    assert user.patch('/api/transactions', json=body).status_code == 400
+
+
+def test_too_many_ids_is_a_400(app, user):
+    app.config['BATCH_MAX_IDS'] = 2
+    assert user.delete('/api/transactions', json={'ids': [1, 2, 3]}).status_code == 400
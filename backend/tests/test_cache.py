@@ -0,0 +1,73 @@
+# Archivo: tests/test_cache.py
+"""Caché de aplicación con varios workers: claves por versión de datos y ETags (user-009)."""
+from contextlib import contextmanager
+from datetime import date
+import pytest
+from app.cache import LocalCache, response_cache
+
+
+@pytest.fixture
+def workers():
+    """Dos cachés locales independientes, como las de dos workers de gunicorn."""
+    previous = response_cache.backend
+    caches = {'a': LocalCache(), 'b': LocalCache()}
+
+    @contextmanager
+    def worker(name):
+        response_cache.backend = caches[name]
+        try:
+            yield
+        finally:
+            response_cache.backend = previous
+    yield worker
+    response_cache.backend = previous
+
+
+def _summary(user, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    return user.client.get('/api/data/summary', headers={**user.headers, **headers})
+
+
+def test_not_modified_while_version_is_unchanged(user, workers):
+    with workers('a'):
+        first = _summary(user)
+        assert first.status_code == 200
+        assert _summary(user, first.headers['ETag']).status_code == 304
+
+
+def test_write_on_one_worker_is_seen_by_the_other(user, workers):
+    today = date.today().isoformat()
+    with workers('a'):
+        _summary(user)
+    with workers('b'):
+        stale = _summary(user)
+        assert stale.get_json()['summary']['monthly_expenses'] == 0.0
+
+    with workers('a'):
+        user.create(42, today)
+
+    with workers('b'):
+        fresh = _summary(user, stale.headers['ETag'])
+        assert fresh.status_code == 200
+        assert fresh.headers['ETag'] != stale.headers['ETag']
+        assert fresh.get_json()['summary']['monthly_expenses'] == 42.0
+        # Revalidar con el ETag nuevo no devuelve el cuerpo viejo
+        assert _summary(user, fresh.headers['ETag']).status_code == 304
+
+
+def test_deleted_category_is_rejected_on_other_worker(user, workers):
+    category = {'name': 'Mascotas', 'type': 'EXPENSE'}
+    with workers('a'):
+        category_id = user.post('/api/categories', json=category).get_json()['id']
+    with workers('b'):
+        assert any(c['id'] == category_id for c in user.get('/api/categories').get_json())
+
+    with workers('a'):
+        assert user.delete(f'/api/categories/{category_id}').status_code == 200
+
+    with workers('b'):
+        assert all(c['id'] != category_id for c in user.get('/api/categories').get_json())
+        response = user.post('/api/transactions', json={
+            'amount': 5, 'type': 'EXPENSE', 'date': '2024-05-01', 'category_id': category_id,
+        })
+        assert response.status_code == 404
@@ -0,0 +1,97 @@
+# Archivo: tests/test_categories.py
+"""Gestión de categorías y lista cacheada por usuario (user-017)."""
+import pytest
+from sqlalchemy import event
+from app import db
+from app.cache import LocalCache, response_cache
+
+
+@pytest.fixture
+def local_cache():
+    previous = response_cache.backend
+    response_cache.backend = LocalCache()
+    yield
+    response_cache.backend = previous
+
+
+@pytest.fixture
+def category_selects(app):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SELECT') and 'FROM categories' in statement:
+            seen.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+def _names(user, cat_type='EXPENSE'):
+    return [c['name'] for c in user.get('/api/categories').get_json() if c['type'] == cat_type]
+
+
+def test_create_rename_and_delete(user):
+    response = user.post('/api/categories', json={'name': ' Mascotas ', 'type': 'expense'})
+    assert response.status_code == 201
+    category = response.get_json()
+    assert (category['name'], category['type'], category['is_default']) == ('Mascotas', 'EXPENSE', False)
+    assert 'Mascotas' in _names(user)
+
+    assert user.put(f"/api/categories/{category['id']}", json={'name': 'Animales'}).status_code == 200
+    assert 'Animales' in _names(user) and 'Mascotas' not in _names(user)
+
+    assert user.delete(f"/api/categories/{category['id']}").status_code == 200
+    assert 'Animales' not in _names(user)
+
+
+@pytest.mark.parametrize('body, status', [
+    ({'name': '', 'type': 'EXPENSE'}, 400),
+    ({'name': 'x' * 51, 'type': 'EXPENSE'}, 400),
+    ({'name': 'Viajes', 'type': 'OTRO'}, 400),
+])
+def test_invalid_category_is_rejected(user, body, status):
+    assert user.post('/api/categories', json=body).status_code == status
+
+
+def test_duplicate_name_ignores_case_within_a_type(user):
+    existing = _names(user)[0]
+    assert user.post('/api/categories', json={'name': existing.upper(), 'type': 'EXPENSE'}).status_code == 409
+    assert user.post('/api/categories', json={'name': existing, 'type': 'INCOME'}).status_code == 201
+
+
+def test_categories_of_other_users_are_not_found(user, other_user):
+    theirs = other_user.category('EXPENSE')
+    assert user.put(f'/api/categories/{theirs}', json={'name': 'Mía'}).status_code == 404
+    assert user.delete(f'/api/categories/{theirs}').status_code == 404
+    assert user.post(f"/api/categories/{user.category('EXPENSE')}/merge", json={'target_id': theirs}).status_code == 404
+
+
+def test_delete_in_use_needs_reassign_to(user):
+    source, target = user.category('EXPENSE', 1), user.category('EXPENSE')
+    transaction_id = user.create(10, '2024-01-05', category_id=source)
+
+    assert user.delete(f'/api/categories/{source}').status_code == 409
+    response = user.delete(f'/api/categories/{source}?reassign_to={target}')
+    assert response.get_json()['moved'] == 1
+
+    listed = user.get('/api/transactions').get_json()['transactions']
+    assert [(t['id'], t['category_id']) for t in listed] == [(transaction_id, target)]
+
+
+def test_merge_needs_the_same_type(user):
+    response = user.post(f"/api/categories/{user.category('EXPENSE')}/merge",
+                         json={'target_id': user.category('INCOME')})
+    assert response.status_code == 400
+
+
+def test_list_is_served_from_cache_until_a_write(user, local_cache, category_selects):
+    user.get('/api/categories')
+    category_selects.clear()
+    user.get('/api/categories')
+    assert category_selects == []
+
+    user.post('/api/categories', json={'name': 'Regalos', 'type': 'EXPENSE'})
+    assert 'Regalos' in _names(user)
@@ -0,0 +1,69 @@
+# Archivo: tests/test_exports.py
+"""Exportación en streaming del historial (user-015)."""
+import csv
+import io
+import pytest
+from sqlalchemy import event
+from app import db, routes
+
+SORTS = ['-date', 'amount', '-category']
+
+
+@pytest.fixture
+def statements(app):
+    """SELECT sobre transactions ejecutados durante la prueba."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'FROM transactions' in statement:
+            seen.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+def _seed(user):
+    user.bulk([{
+        'amount': str(10 + index % 4),
+        'type': 'EXPENSE',
+        'date': f"2024-{index % 12 + 1:02d}-{index % 3 + 10}",
+        'description': ['Cine', 'Agua', None][index % 3],
+        'category_id': user.category('EXPENSE', index % 2),
+    } for index in range(10)])
+
+
+def _export(user, **params):
+    response = user.get('/api/transactions/export', query_string={'format': 'csv', **params})
+    assert response.status_code == 200, response.get_json()
+    body = response.get_data().decode('utf-8-sig')
+    return list(csv.reader(io.StringIO(body)))
+
+
+@pytest.mark.parametrize('sort', SORTS)
+def test_csv_matches_listing_order(user, monkeypatch, sort):
+    _seed(user)
+    monkeypatch.setattr(routes, 'STREAM_BATCH_SIZE', 3)
+
+    listed = user.get('/api/transactions', query_string={'sort': sort}).get_json()['transactions']
+    rows = _export(user, sort=sort)
+
+    assert rows[0] == ['id', 'fecha', 'tipo', 'monto', 'categoria', 'descripcion']
+    assert [int(row[0]) for row in rows[1:]] == [t['id'] for t in listed]
+
+
+def test_csv_reads_keyset_pages(user, monkeypatch, statements):
+    # Sin cursores de servidor (mysqlconnector) la única forma de acotar la
+    # memoria es pedir páginas con LIMIT
+    _seed(user)
+    monkeypatch.setattr(routes, 'STREAM_BATCH_SIZE', 3)
+    statements.clear()
+
+    rows = _export(user)
+
+    assert len(rows) == 11
+    pages = [s for s in statements if 'LIMIT' in s.upper()]
+    assert len(pages) >= 4
+    assert len(pages) == len(statements)
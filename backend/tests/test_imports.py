@@ -0,0 +1,116 @@
+# Archivo: tests/test_imports.py
+"""Importación masiva de transacciones: JSON, CSV y OFX por bloques (user-005)."""
+import io
+from decimal import Decimal
+from sqlalchemy import event
+from app import db
+
+OFX = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20240105120000<TRNAMT>-42.50<NAME>Supermercado
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20240131<TRNAMT>1500.00<MEMO>Nómina
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+def _expense(user, **row):
+    return {'amount': '10', 'type': 'EXPENSE', 'date': '2024-01-10',
+            'category_id': user.category('EXPENSE'), **row}
+
+
+def _listed(user):
+    return user.get('/api/transactions').get_json()['transactions']
+
+
+def _upload(user, name, text, **form):
+    return user.client.post('/api/transactions/import', headers=user.headers, data={
+        'file': (io.BytesIO(text.encode('utf-8')), name), **form,
+    }, content_type='multipart/form-data')
+
+
+def test_invalid_rows_are_reported_and_the_rest_inserted(user, other_user, assert_rollups_consistent):
+    response = user.post('/api/transactions/bulk', json={'transactions': [
+        _expense(user),
+        _expense(user, amount='-5'),
+        _expense(user, type='GASTO'),
+        _expense(user, date='10/01/2024'),
+        _expense(user, category_id=other_user.category('EXPENSE')),
+        'no es una fila',
+        _expense(user, amount='2,5', description='Café'),
+    ]})
+
+    body = response.get_json()
+    assert response.status_code == 201
+    assert body['inserted'] == 2
+    assert [error['row'] for error in body['errors']] == [2, 3, 4, 5, 6]
+    assert sorted(Decimal(str(t['amount'])) for t in _listed(user)) == [Decimal('2.50'), Decimal('10.00')]
+    assert _listed(other_user) == []
+    assert_rollups_consistent(user.id)
+
+
+def test_nothing_valid_is_a_400(user):
+    response = user.post('/api/transactions/bulk', json=[_expense(user, amount='x')])
+    assert response.status_code == 400
+    assert response.get_json()['inserted'] == 0
+
+
+def test_category_by_name_ignores_case(user):
+    category = next(c for c in user.categories if c['type'] == 'EXPENSE')
+    user.bulk([{'amount': '5', 'type': 'EXPENSE', 'date': '2024-01-10', 'category': category['name'].upper()}])
+    assert _listed(user)[0]['category_id'] == category['id']
+
+
+def test_rows_are_inserted_in_chunks(app, user, assert_rollups_consistent):
+    app.config['BULK_INSERT_CHUNK_SIZE'] = 2
+    inserts = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO transactions '):
+            inserts.append(len(parameters) if executemany else 1)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        user.bulk([_expense(user, date=f'2024-0{month}-10') for month in range(1, 6)])
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert inserts == [2, 2, 1]
+    assert len(_listed(user)) == 5
+    assert_rollups_consistent(user.id)
+
+
+def test_too_many_rows_is_a_413(app, user):
+    app.config['BULK_IMPORT_MAX_ROWS'] = 2
+    response = user.post('/api/transactions/bulk', json=[_expense(user)] * 3)
+    assert response.status_code == 413
+    assert _listed(user) == []
+
+
+def test_csv_upload_uses_default_categories(user):
+    text = 'Date, Amount ,TYPE,description\n2024-01-05,12.30,EXPENSE,Pan\n2024-01-06,800,INCOME,\n'
+    response = _upload(user, 'extracto.csv', text,
+                       income_category_id=user.category('INCOME'), expense_category_id=user.category('EXPENSE', 1))
+
+    assert response.status_code == 201, response.get_json()
+    rows = {t['type']: t for t in _listed(user)}
+    assert rows['EXPENSE']['category_id'] == user.category('EXPENSE', 1)
+    assert rows['EXPENSE']['description'] == 'Pan'
+    assert rows['INCOME']['category_id'] == user.category('INCOME')
+
+
+def test_ofx_upload_takes_the_type_from_the_sign(user):
+    response = _upload(user, 'banco.ofx', OFX,
+                       income_category_id=user.category('INCOME'), expense_category_id=user.category('EXPENSE'))
+
+    assert response.get_json()['inserted'] == 2
+    rows = sorted(_listed(user), key=lambda t: t['date'])
+    assert [(t['date'], t['type'], t['description']) for t in rows] == [
+        ('2024-01-05', 'EXPENSE', 'Supermercado'), ('2024-01-31', 'INCOME', 'Nómina'),
+    ]
+    assert Decimal(str(rows[0]['amount'])) == Decimal('42.50')
+
+
+def test_unknown_upload_format_is_a_400(user):
+    assert _upload(user, 'datos.xls', 'x').status_code == 400
@@ -0,0 +1,77 @@
+# Archivo: tests/test_pagination.py
+"""Cursores keyset del listado de transacciones (user-001)."""
+from datetime import date
+from decimal import Decimal
+import pytest
+from app.queries import FilterError, encode_cursor, decode_cursor
+
+SORTS = ['date', '-date', 'amount', '-amount', 'type', 'description', '-description', 'category', '-category']
+
+
+@pytest.mark.parametrize('sort_key, value', [
+    ('date', date(2024, 2, 29)),
+    ('amount', Decimal('10.50')),
+    ('type', 'EXPENSE'),
+    ('description', 'Café, ñandú y "comillas"'),
+    ('category', ''),
+])
+def test_cursor_round_trip(sort_key, value):
+    assert decode_cursor(encode_cursor(sort_key, value, 42), sort_key) == (value, 42)
+
+
+def test_cursor_of_other_sort_is_rejected():
+    cursor = encode_cursor('date', date(2024, 1, 1), 1)
+    with pytest.raises(FilterError):
+        decode_cursor(cursor, 'amount')
+
+
+@pytest.mark.parametrize('cursor', ['', 'no-es-base64!', encode_cursor('date', 'ayer', 1)])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(FilterError):
+        decode_cursor(cursor, 'date')
+
+
+def _seed_ties(user):
+    # Fechas, importes y descripciones repetidos: el id desempata el orden
+    rows = []
+    for index in range(17):
+        cat_type = 'INCOME' if index % 4 == 0 else 'EXPENSE'
+        rows.append({
+            'amount': str(Decimal('5.00') + index % 3),
+            'type': cat_type,
+            'date': f"2024-0{index % 3 + 1}-1{index % 2}",
+            'description': [None, 'Cine', 'cine', 'Agua'][index % 4],
+            'category_id': user.category(cat_type, index % 2),
+        })
+    user.bulk(rows)
+
+
+def _ids(response):
+    assert response.status_code == 200, response.get_json()
+    return [t['id'] for t in response.get_json()['transactions']]
+
+
+@pytest.mark.parametrize('sort', SORTS)
+def test_pages_cover_the_unpaginated_list(user, sort):
+    _seed_ties(user)
+    expected = _ids(user.get('/api/transactions', query_string={'sort': sort}))
+    assert len(expected) == 17
+
+    seen, cursor = [], None
+    while True:
+        params = {'sort': sort, 'limit': 4}
+        if cursor:
+            params['cursor'] = cursor
+        response = user.get('/api/transactions', query_string=params)
+        seen.extend(_ids(response))
+        cursor = response.get_json()['next_cursor']
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+def test_cursor_from_another_sort_returns_400(user):
+    _seed_ties(user)
+    cursor = user.get('/api/transactions', query_string={'sort': 'date', 'limit': 2}).get_json()['next_cursor']
+    response = user.get('/api/transactions', query_string={'sort': 'amount', 'limit': 2, 'cursor': cursor})
+    assert response.status_code == 400
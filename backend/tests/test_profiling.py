@@ -0,0 +1,32 @@
+# Archivo: tests/test_profiling.py
+"""Cabecera Server-Timing de la instrumentación por petición (user-012)."""
+from app import create_app, db
+from app.config import Config
+
+
+def test_server_timing_is_off_by_default(client):
+    response = client.post('/api/login', json={'email': 'nadie@gestomoney.test', 'password': 'x'})
+    assert 'Server-Timing' not in response.headers
+    assert 'Timing-Allow-Origin' not in response.headers
+
+
+def test_server_timing_when_enabled(tmp_path):
+    class TimingConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        TESTING = True
+        RATELIMIT_ENABLED = False
+        CACHE_BACKEND = 'null'
+        SERVER_TIMING_ENABLED = True
+
+    app = create_app(TimingConfig)
+    with app.app_context():
+        db.create_all(bind_key=None)
+
+    response = app.test_client().post('/api/login', json={'email': 'nadie@gestomoney.test', 'password': 'x'})
+
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    # Solo para las DevTools del propio origen: sin exponer tiempos a otros sitios
+    assert 'Timing-Allow-Origin' not in response.headers
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
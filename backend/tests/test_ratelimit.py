@@ -0,0 +1,160 @@
+# Archivo: tests/test_ratelimit.py
+"""Token buckets del limitador en memoria y sobre un Redis simulado (user-020)."""
+import fnmatch
+import pytest
+from app.ratelimit import RateLimit, LocalBuckets, RedisBuckets, RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Cliente mínimo con `register_script` que reproduce el script Lua en Python.
+
+    Guarda el hash de cada cubo como lo haría Redis (valores en texto) y
+    devuelve la espera en bytes, como el cliente real.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.hashes = {}
+        self.down = False
+
+    def register_script(self, source):
+        assert "redis.call('TIME')" in source
+
+        def script(keys, args):
+            if self.down:
+                raise ConnectionError('Redis no responde')
+            capacity, rate, cost = (float(value) for value in args)
+            now = self.clock()
+            state = self.hashes.get(keys[0], {})
+            tokens = float(state.get('tokens', capacity))
+            updated = float(state.get('ts', now))
+            tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+            allowed, wait = 0, 0.0
+            if tokens >= cost:
+                tokens -= cost
+                allowed = 1
+            else:
+                wait = (cost - tokens) / rate
+            self.hashes[keys[0]] = {'tokens': str(tokens), 'ts': str(now)}
+            return [allowed, str(wait).encode()]
+        return script
+
+    def scan_iter(self, match):
+        return [key for key in self.hashes if fnmatch.fnmatchcase(key, match)]
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture(params=['local', 'redis'])
+def backend(request, clock):
+    if request.param == 'local':
+        return LocalBuckets(clock=clock)
+    return RedisBuckets(FakeRedis(clock))
+
+
+def test_parse():
+    limit = RateLimit.parse('120/minute')
+    assert (limit.capacity, limit.rate) == (120, 2.0)
+    assert RateLimit.parse('5/seconds').rate == 5
+    for spec in ('0/minute', '10/week', 'diez/minute', None):
+        with pytest.raises(ValueError):
+            RateLimit.parse(spec)
+
+
+def test_bucket_empties_and_refills(backend, clock):
+    limit = RateLimit.parse('3/minute')
+    assert [backend.consume('ip:1', limit, 1)[0] for _ in range(3)] == [True, True, True]
+
+    allowed, wait = backend.consume('ip:1', limit, 1)
+    assert not allowed and wait == pytest.approx(20.0)
+
+    clock.now += 20
+    assert backend.consume('ip:1', limit, 1)[0]
+    assert not backend.consume('ip:1', limit, 1)[0]
+
+    # Nunca se acumulan más fichas que la capacidad
+    clock.now += 3600
+    assert [backend.consume('ip:1', limit, 1)[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_weighted_cost_and_independent_keys(backend):
+    limit = RateLimit.parse('10/second')
+    assert backend.consume('user:1', limit, 7)[0]
+    allowed, wait = backend.consume('user:1', limit, 5)
+    assert not allowed and wait == pytest.approx(0.2)
+    assert backend.consume('user:2', limit, 10)[0]
+
+
+def test_clear(backend):
+    limit = RateLimit.parse('1/hour')
+    backend.consume('ip:1', limit, 1)
+    assert not backend.consume('ip:1', limit, 1)[0]
+    backend.clear()
+    assert backend.consume('ip:1', limit, 1)[0]
+
+
+def test_local_eviction_only_makes_limits_looser(clock):
+    buckets = LocalBuckets(max_size=2, clock=clock)
+    limit = RateLimit.parse('1/hour')
+    for key in ('a', 'b', 'c'):
+        assert buckets.consume(key, limit, 1)[0]
+    # 'a' fue expulsado: vuelve con el cubo lleno; 'c' sigue vacío
+    assert buckets.consume('a', limit, 1)[0]
+    assert not buckets.consume('c', limit, 1)[0]
+
+
+def test_redis_keys_use_prefix(clock):
+    client = FakeRedis(clock)
+    RedisBuckets(client, prefix='test:').consume('ip:1', RateLimit.parse('1/second'), 1)
+    assert list(client.hashes) == ['test:ip:1']
+
+
+def test_redis_failure_lets_requests_through(clock):
+    client = FakeRedis(clock)
+    buckets = RedisBuckets(client)
+    limit = RateLimit.parse('1/hour')
+    buckets.consume('ip:1', limit, 1)
+    client.down = True
+    assert buckets.consume('ip:1', limit, 1) == (True, 0.0)
+
+
+def test_limiter_caps_cost_at_capacity(clock):
+    limiter = RateLimiter()
+    limiter.enabled = True
+    limiter.backend = LocalBuckets(clock=clock)
+    limiter.user_limit = RateLimit.parse('5/minute')
+    # Un coste mayor que el cubo vacía el cubo en lugar de rechazarse siempre
+    assert limiter.check_user(1, cost=50) is None
+    assert limiter.check_user(1) == pytest.approx(12.0)
+
+    limiter.enabled = False
+    assert limiter.check_user(1) is None
+
+
+def test_login_endpoint_limit(app, client):
+    from app.ratelimit import rate_limiter, init_rate_limit
+    app.config.update(RATELIMIT_ENABLED=True, RATELIMIT_ENDPOINTS={'main.login': '2/minute'})
+    init_rate_limit(app)
+    try:
+        statuses = [client.post('/api/login', json={'email': 'x@y.z', 'password': 'x'}).status_code
+                    for _ in range(3)]
+        assert statuses == [401, 401, 429]
+        response = client.post('/api/login', json={}, environ_base={'REMOTE_ADDR': '10.0.0.2'})
+        assert response.status_code == 400
+    finally:
+        rate_limiter.enabled = False
@@ -0,0 +1,107 @@
+# Archivo: tests/test_rebalance.py
+"""Mudanza de usuarios entre shards con `flask move-user` (user-024)."""
+from datetime import date
+import pytest
+from app import create_app, db
+from app.archive import archive_transactions
+from app.config import Config
+from app.models import ArchivedTransaction, Transaction
+from app.rebalance import move_user
+from app.shards import assign_users, shard_context, shard_router
+from conftest import ApiUser
+
+CUTOFF = date(2024, 1, 1)
+
+
+@pytest.fixture
+def app(tmp_path):
+    class ShardedConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        DB_SHARD_URIS = [f"sqlite:///{tmp_path / 'shard_0.db'}", f"sqlite:///{tmp_path / 'shard_1.db'}"]
+        SHARD_NEW_USERS = ['shard_0']
+        TESTING = True
+        BCRYPT_LOG_ROUNDS = 4
+        PASSWORD_HASH_WORKERS = 0
+        REPORT_WORKERS = 0
+        RATELIMIT_ENABLED = False
+        CACHE_BACKEND = 'null'
+
+    app = create_app(ShardedConfig)
+    with app.app_context():
+        for engine in db.engines.values():
+            db.metadata.create_all(engine)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def _seed(user):
+    user.bulk([
+        {'amount': str(10 + index), 'type': 'EXPENSE', 'date': f"{2023 + index % 2}-0{index % 9 + 1}-15",
+         'description': f'gasto {index}', 'category_id': user.category('EXPENSE', index % 2)}
+        for index in range(12)
+    ])
+
+
+def _content(user):
+    # Los ids cambian al mudarse: se compara todo lo demás
+    rows = user.get('/api/transactions').get_json()['transactions']
+    return [{key: value for key, value in row.items() if key not in ('id', 'category_id')} for row in rows]
+
+
+def _counts(app, key, user_id):
+    with app.app_context(), shard_context(key):
+        return tuple(
+            db.session.query(entity).filter(entity.user_id == user_id).count()
+            for entity in (Transaction, ArchivedTransaction)
+        )
+
+
+def test_move_keeps_data_and_forces_full_sync(app, client):
+    user = ApiUser(client, 'ana@gestomoney.test')
+    _seed(user)
+    before = _content(user)
+    summary = user.get('/api/data/summary').get_json()
+    version = user.get('/api/sync').get_json()['version']
+
+    with app.app_context():
+        assert move_user(user.id, 'shard_1', wait=0) == 12
+        shard_router.cache.clear()
+
+    assert _counts(app, 'shard_0', user.id) == (0, 0)
+    assert _counts(app, 'shard_1', user.id) == (12, 0)
+    assert _content(user) == before
+    assert user.get('/api/data/summary').get_json() == summary
+    assert user.get('/api/sync', query_string={'since': version}).get_json()['full'] is True
+
+
+def test_move_of_user_with_archive_does_not_duplicate_rows(app, client):
+    user = ApiUser(client, 'ana@gestomoney.test')
+    _seed(user)
+    user.create(1, '2024-12-01')
+    before = _content(user)
+    with app.app_context(), shard_context('shard_0'):
+        assert archive_transactions(CUTOFF, chunk_size=4) == 6
+
+    with app.app_context():
+        move_user(user.id, 'shard_1', wait=0)
+        shard_router.cache.clear()
+
+    # En el destino se vuelve a archivar con ARCHIVE_AFTER_MONTHS
+    hot, cold = _counts(app, 'shard_1', user.id)
+    assert hot + cold == 13 and cold >= 6
+    assert _content(user) == before
+
+
+def test_archive_skips_users_being_moved(app, client):
+    user = ApiUser(client, 'ana@gestomoney.test')
+    _seed(user)
+    user.create(1, '2024-12-01')
+    with app.app_context():
+        assign_users([user.id], 'shard_0', moving=True)
+        db.session.commit()
+        with shard_context('shard_0'):
+            assert archive_transactions(CUTOFF, chunk_size=4) == 0
+            assert archive_transactions(CUTOFF, chunk_size=4, include_moving=True) == 6
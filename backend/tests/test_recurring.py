@@ -0,0 +1,145 @@
+# Archivo: tests/test_recurring.py
+"""Reglas recurrentes y su generación por conjuntos (user-025)."""
+from calendar import monthrange
+from datetime import date, timedelta
+import pytest
+from app.recurring import materialize_recurring
+
+TODAY = date.today()
+# Un día 31 de hace entre 200 y 260 días: prueba los meses más cortos
+LAST_31 = next(TODAY - timedelta(days=offset) for offset in range(200, 262)
+               if (TODAY - timedelta(days=offset)).day == 31)
+
+
+def _shift_months(start, months):
+    index = start.year * 12 + start.month - 1 + months
+    year, month = divmod(index, 12)
+    return date(year, month + 1, min(start.day, monthrange(year, month + 1)[1]))
+
+
+def _expected(frequency, every, start, until, end=None):
+    """Fechas de la regla calculadas una a una, para comparar con el SQL."""
+    days = []
+    for step in range(100000):
+        if frequency == 'DAILY':
+            day = start + timedelta(days=every * step)
+        elif frequency == 'WEEKLY':
+            day = start + timedelta(weeks=every * step)
+        elif frequency == 'MONTHLY':
+            day = _shift_months(start, every * step)
+        else:
+            day = _shift_months(start, 12 * every * step)
+        if day > until or (end is not None and day > end):
+            return days
+        days.append(day)
+
+
+def _rule(user, **fields):
+    body = {'amount': '15', 'type': 'EXPENSE', 'category_id': user.category('EXPENSE'),
+            'frequency': 'MONTHLY', 'start_date': LAST_31.isoformat(), **fields}
+    response = user.post('/api/recurring', json=body)
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def _dates(user, description):
+    listed = user.get('/api/transactions', query_string={'sort': 'date'}).get_json()['transactions']
+    return [date.fromisoformat(t['date']) for t in listed if t['description'] == description]
+
+
+def _materialize(app, until, chunk_size=1000):
+    with app.app_context():
+        return materialize_recurring(until, chunk_size)
+
+
+SCHEDULES = [
+    ('DAILY', 3, LAST_31),
+    ('WEEKLY', 2, LAST_31 + timedelta(days=1)),
+    ('MONTHLY', 1, LAST_31),
+    ('MONTHLY', 5, LAST_31),
+    ('YEARLY', 1, LAST_31),
+]
+
+
+@pytest.mark.parametrize('frequency, every, start', SCHEDULES)
+def test_occurrences_follow_the_schedule(app, user, assert_rollups_consistent, frequency, every, start):
+    rule = _rule(user, frequency=frequency, every=every, start_date=start.isoformat(), description='Regla')
+    expected = _expected(frequency, every, start, TODAY)
+    assert rule['created'] == len(expected)
+    assert _dates(user, 'Regla') == expected
+
+    # La pasada programada continúa desde `next_date` sin repetir nada
+    until = TODAY + timedelta(days=800)
+    assert _materialize(app, until) == len(_expected(frequency, every, start, until)) - len(expected)
+    assert _dates(user, 'Regla') == _expected(frequency, every, start, until)
+    assert _materialize(app, until) == 0
+    assert_rollups_consistent(user.id)
+
+
+def test_end_date_stops_the_rule(app, user):
+    end = LAST_31 + timedelta(days=70)
+    _rule(user, frequency='WEEKLY', end_date=end.isoformat(), description='Con fin')
+    assert _dates(user, 'Con fin') == _expected('WEEKLY', 1, LAST_31, TODAY, end)
+
+    assert _materialize(app, TODAY + timedelta(days=30)) == 0
+    assert user.get('/api/recurring').get_json()[0]['active'] is False
+
+
+def test_deleted_occurrence_is_not_generated_again(app, user):
+    _rule(user, frequency='DAILY', start_date=(TODAY - timedelta(days=5)).isoformat(), description='Diaria')
+    listed = user.get('/api/transactions').get_json()['transactions']
+    removed = next(t for t in listed if t['date'] == (TODAY - timedelta(days=2)).isoformat())
+    assert user.delete(f"/api/transactions/{removed['id']}").status_code == 200
+
+    _materialize(app, TODAY)
+    assert removed['date'] not in {t['date'] for t in user.get('/api/transactions').get_json()['transactions']}
+
+
+def test_chunks_cover_every_user(app, user, other_user, assert_rollups_consistent):
+    start = TODAY + timedelta(days=1)
+    for owner in (user, other_user):
+        for every in (1, 2, 3):
+            _rule(owner, frequency='DAILY', every=every, start_date=start.isoformat(), description=f'Cada {every}')
+
+    until = TODAY + timedelta(days=30)
+    total = sum(len(_expected('DAILY', every, start, until)) for every in (1, 2, 3))
+    assert _materialize(app, until, chunk_size=2) == 2 * total
+    for owner in (user, other_user):
+        assert _dates(owner, 'Cada 2') == _expected('DAILY', 2, start, until)
+        assert_rollups_consistent(owner.id)
+
+
+def test_paused_rule_skips_the_paused_days(app, user):
+    rule = _rule(user, frequency='DAILY', start_date=(TODAY + timedelta(days=1)).isoformat(), description='Pausa')
+    assert user.put(f"/api/recurring/{rule['id']}", json={'active': False}).status_code == 200
+    assert _materialize(app, TODAY + timedelta(days=10)) == 0
+    assert _dates(user, 'Pausa') == []
+
+
+def test_deleting_a_rule_keeps_its_transactions(user):
+    rule = _rule(user, frequency='MONTHLY', description='Alquiler')
+    generated = _dates(user, 'Alquiler')
+    assert user.delete(f"/api/recurring/{rule['id']}").status_code == 200
+    assert _dates(user, 'Alquiler') == generated
+    assert user.get('/api/recurring').get_json() == []
+
+
+@pytest.mark.parametrize('fields', [
+    {'frequency': 'HOURLY'},
+    {'every': 0},
+    {'amount': '-1'},
+    {'start_date': (TODAY - timedelta(days=400)).isoformat()},
+    {'end_date': (LAST_31 - timedelta(days=1)).isoformat()},
+    {'category_id': None},
+])
+def test_invalid_rule_is_rejected(user, fields):
+    body = {'amount': '15', 'type': 'EXPENSE', 'category_id': user.category('EXPENSE'),
+            'frequency': 'MONTHLY', 'start_date': LAST_31.isoformat(), **fields}
+    assert user.post('/api/recurring', json=body).status_code == 400
+    assert user.get('/api/recurring').get_json() == []
+
+
+def test_category_of_another_user_is_a_404(user, other_user):
+    body = {'amount': '15', 'type': 'EXPENSE', 'category_id': other_user.category('EXPENSE'),
+            'frequency': 'MONTHLY', 'start_date': LAST_31.isoformat()}
+    assert user.post('/api/recurring', json=body).status_code == 404
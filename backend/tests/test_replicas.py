@@ -0,0 +1,99 @@
+# Archivo: tests/test_replicas.py
+"""Lecturas en réplicas: lee tus escrituras y reintento en el primario (user-022)."""
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.config import Config
+from app.replicas import READ_PRIMARY_HEADER
+from conftest import ApiUser
+
+
+@pytest.fixture
+def app(tmp_path):
+    # La réplica es una base SQLite vacía: responde al ping, pero cualquier
+    # consulta sobre las tablas falla como una réplica caída a mitad de petición
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'test.db'}"
+        DB_REPLICA_URIS = [f"sqlite:///{tmp_path / 'replica.db'}"]
+        TESTING = True
+        BCRYPT_LOG_ROUNDS = 4
+        PASSWORD_HASH_WORKERS = 0
+        REPORT_WORKERS = 0
+        RATELIMIT_ENABLED = False
+        CACHE_BACKEND = 'null'
+        REPLICA_READ_YOUR_WRITES_SECONDS = 30
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def replica_statements(app):
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement != 'SELECT 1':
+            seen.append(statement)
+
+    with app.app_context():
+        engine = db.engines['replica_0']
+    event.listen(engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+@pytest.mark.parametrize('path', ['/api/categories', '/api/transactions', '/api/data/summary'])
+def test_failed_replica_read_is_retried_on_primary(client, replica_statements, path):
+    user = ApiUser(client, 'ana@gestomoney.test')
+    replica_statements.clear()
+
+    response = user.get(path)
+
+    assert response.status_code == 200, response.get_json()
+    assert replica_statements
+
+
+def test_write_response_carries_marker(client):
+    user = ApiUser(client, 'ana@gestomoney.test')
+
+    response = user.post('/api/transactions', json={
+        'amount': '10', 'type': 'EXPENSE', 'date': '2024-05-01',
+        'category_id': user.category('EXPENSE'),
+    })
+
+    assert response.status_code == 201
+    assert float(response.headers[READ_PRIMARY_HEADER]) > 0
+    assert READ_PRIMARY_HEADER in response.headers['Access-Control-Expose-Headers']
+
+
+def test_marker_sends_reads_to_primary(client, replica_statements):
+    # Con la caché nula la marca del servidor no existe: solo cuenta la del cliente
+    user = ApiUser(client, 'ana@gestomoney.test')
+    marker = user.post('/api/transactions', json={
+        'amount': '10', 'type': 'EXPENSE', 'date': '2024-05-01',
+        'category_id': user.category('EXPENSE'),
+    }).headers[READ_PRIMARY_HEADER]
+    replica_statements.clear()
+
+    response = client.get('/api/transactions', headers={**user.headers, READ_PRIMARY_HEADER: marker})
+
+    assert response.status_code == 200
+    assert len(response.get_json()['transactions']) == 1
+    assert replica_statements == []
+
+
+@pytest.mark.parametrize('marker', ['', 'x', '1', '99999999999'])
+def test_stale_or_forged_marker_is_ignored(client, replica_statements, marker):
+    user = ApiUser(client, 'ana@gestomoney.test')
+    replica_statements.clear()
+
+    response = client.get('/api/categories', headers={**user.headers, READ_PRIMARY_HEADER: marker})
+
+    assert response.status_code == 200
+    assert replica_statements
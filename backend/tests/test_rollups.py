@@ -0,0 +1,85 @@
+# Archivo: tests/test_rollups.py
+"""Los rollups mensuales mantenidos por deltas deben coincidir con una reconstrucción (user-002)."""
+from decimal import Decimal
+
+
+def _seed(user):
+    return [
+        user.create(12.5, '2024-01-05'),
+        user.create(7.25, '2024-01-20', category_id=user.category('EXPENSE', 1)),
+        user.create(1500, '2024-01-31', cat_type='INCOME'),
+        user.create(30, '2024-02-10'),
+        user.create(45.10, '2024-03-01', category_id=user.category('EXPENSE', 1)),
+    ]
+
+
+def test_create(user, assert_rollups_consistent):
+    _seed(user)
+    rows = assert_rollups_consistent(user.id)
+    assert rows[('2024-01', user.category('EXPENSE'), 'EXPENSE')] == (Decimal('12.50'), 1)
+
+
+def test_update_moves_between_months_categories_and_types(user, assert_rollups_consistent):
+    ids = _seed(user)
+    assert user.put(f'/api/transactions/{ids[0]}', json={'amount': 20, 'date': '2024-02-15'}).status_code == 200
+    assert user.put(f'/api/transactions/{ids[1]}', json={'category_id': user.category('EXPENSE')}).status_code == 200
+    assert user.put(f'/api/transactions/{ids[3]}', json={
+        'type': 'INCOME', 'category_id': user.category('INCOME'),
+    }).status_code == 200
+    rows = assert_rollups_consistent(user.id)
+    # El único gasto de enero en la categoría 1 se movió: su fila desaparece
+    assert ('2024-01', user.category('EXPENSE', 1), 'EXPENSE') not in rows
+
+
+def test_delete(user, assert_rollups_consistent):
+    ids = _seed(user)
+    for transaction_id in ids[:2]:
+        assert user.delete(f'/api/transactions/{transaction_id}').status_code == 200
+    rows = assert_rollups_consistent(user.id)
+    assert ('2024-01', user.category('EXPENSE'), 'EXPENSE') not in rows
+
+
+def test_batch_update_and_delete(user, assert_rollups_consistent):
+    ids = _seed(user)
+    response = user.patch('/api/transactions', json={
+        'filter': {'type': 'EXPENSE', 'end_date': '2024-02-28'},
+        'changes': {'amount': '9.99', 'category_id': user.category('EXPENSE', 1)},
+    })
+    assert response.get_json()['updated'] == 3
+    assert_rollups_consistent(user.id)
+
+    response = user.patch('/api/transactions', json={'ids': ids[2:4], 'changes': {'date': '2024-03-31'}})
+    assert response.get_json()['updated'] == 2
+    assert_rollups_consistent(user.id)
+
+    response = user.delete('/api/transactions', json={'filter': {'start_date': '2024-03-01'}})
+    assert response.get_json()['deleted'] == 3
+    assert_rollups_consistent(user.id)
+
+
+def test_bulk_import(user, assert_rollups_consistent):
+    user.bulk([
+        {'amount': '3.10', 'type': 'EXPENSE', 'date': '2023-12-24', 'category_id': user.category('EXPENSE')},
+        {'amount': '3.10', 'type': 'EXPENSE', 'date': '2023-12-25', 'category_id': user.category('EXPENSE')},
+        {'amount': '900', 'type': 'INCOME', 'date': '2023-12-31', 'category_id': user.category('INCOME')},
+    ])
+    rows = assert_rollups_consistent(user.id)
+    assert rows[('2023-12', user.category('EXPENSE'), 'EXPENSE')] == (Decimal('6.20'), 2)
+
+
+def test_merge_category(user, assert_rollups_consistent):
+    _seed(user)
+    source, target = user.category('EXPENSE', 1), user.category('EXPENSE')
+    response = user.post(f'/api/categories/{source}/merge', json={'target_id': target})
+    assert response.get_json()['moved'] == 2
+    rows = assert_rollups_consistent(user.id)
+    assert rows[('2024-01', target, 'EXPENSE')] == (Decimal('19.75'), 2)
+    assert all(category != source for _, category, _ in rows)
+
+
+def test_other_users_are_untouched(user, other_user, assert_rollups_consistent):
+    _seed(user)
+    other_user.create(99, '2024-01-05')
+    user.delete('/api/transactions', json={'filter': {'start_date': '2024-01-01'}})
+    assert assert_rollups_consistent(user.id) == {}
+    assert len(assert_rollups_consistent(other_user.id)) == 1
@@ -0,0 +1,88 @@
+# Archivo: tests/test_sync.py
+"""Sincronización delta: versiones, bajas y `sync_floor` tras purgar (user-021)."""
+from datetime import datetime, timedelta
+from app import db
+from app.models import DeletedRecord, User
+from app.sync import purge_tombstones
+
+
+def _sync(user, since):
+    response = user.get('/api/sync', query_string={'since': since})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_initial_sync_is_full(user):
+    transaction_id = user.create(10, '2024-05-01')
+    data = _sync(user, 0)
+    assert data['full'] is True
+    assert [t['id'] for t in data['transactions']] == [transaction_id]
+    assert len(data['categories']) == len(user.categories)
+
+
+def test_delta_contains_only_later_changes(user):
+    kept, edited, removed = (user.create(amount, '2024-05-01') for amount in (1, 2, 3))
+    version = _sync(user, 0)['version']
+
+    user.put(f'/api/transactions/{edited}', json={'amount': 20})
+    user.delete(f'/api/transactions/{removed}')
+    data = _sync(user, version)
+
+    assert data['full'] is False
+    assert data['version'] > version
+    assert [t['id'] for t in data['transactions']] == [edited]
+    assert data['deleted'] == {'transactions': [removed], 'categories': []}
+    assert kept not in data['deleted']['transactions']
+
+    # Al día: nada nuevo
+    caught_up = _sync(user, data['version'])
+    assert caught_up['transactions'] == [] and caught_up['deleted']['transactions'] == []
+
+
+def test_batch_delete_and_merge_leave_tombstones(user):
+    ids = [user.create(amount, '2024-05-01') for amount in (1, 2, 3)]
+    version = _sync(user, 0)['version']
+
+    user.delete('/api/transactions', json={'ids': ids[:2]})
+    source = user.category('EXPENSE', 1)
+    user.post(f'/api/categories/{source}/merge', json={'target_id': user.category('EXPENSE')})
+    data = _sync(user, version)
+
+    assert sorted(data['deleted']['transactions']) == sorted(ids[:2])
+    assert data['deleted']['categories'] == [source]
+
+
+def test_purge_raises_sync_floor_and_forces_full_sync(app, user, other_user):
+    first, second, third = (user.create(amount, '2024-05-01') for amount in (1, 2, 3))
+    other_user.create(3, '2024-05-01')
+    before_delete = _sync(user, 0)['version']
+    user.delete(f'/api/transactions/{first}')
+    after_delete = _sync(user, 0)['version']
+
+    with app.app_context():
+        db.session.query(DeletedRecord).update({'deleted_at': datetime.utcnow() - timedelta(days=100)})
+        db.session.commit()
+    user.delete(f'/api/transactions/{third}')
+
+    with app.app_context():
+        # Solo se purga la baja antigua
+        assert purge_tombstones(90) == 1
+        db.session.commit()
+        assert db.session.get(User, user.id).sync_floor == after_delete
+        assert db.session.get(User, other_user.id).sync_floor == 0
+
+    # Pedir desde antes de la baja purgada obliga a recargar todo
+    data = _sync(user, before_delete)
+    assert data['full'] is True
+    assert [t['id'] for t in data['transactions']] == [second]
+
+    # Desde la versión purgada en adelante sigue siendo un delta con la baja reciente
+    data = _sync(user, after_delete)
+    assert data['full'] is False
+    assert data['deleted']['transactions'] == [third]
+
+
+def test_version_ahead_of_server_forces_full_sync(user):
+    user.create(1, '2024-05-01')
+    version = _sync(user, 0)['version']
+    assert _sync(user, version + 10)['full'] is True
@@ -46,8 +46,8 @@ const DashboardPage = () => {
       const dashData = await dashboardService.getSummary();
       setDashboardData(dashData);
 
-      // Cargar transacciones recientes
-      const transData = await transactionService.getAll();
+      // Cargar solo las transacciones recientes (primera página del cursor)
+      const transData = await transactionService.getAll({ limit: 5 });
       setTransactions(transData.transactions || []);
 
       setLoading(false);
@@ -2,18 +2,41 @@
 import { useState, useEffect } from 'react';
 import DashboardLayout from '../components/Layout/DashboardLayout';
 import Header from '../components/Layout/Header';
-import { dashboardService } from '../services/api';
+import { dashboardService, reportService } from '../services/api';
 import { formatCurrency } from '../utils/formatters';
 import Skeleton from '../components/Common/Skeleton';
 
+const currentYear = new Date().getFullYear();
+const YEARS = Array.from({ length: 5 }, (_, index) => currentYear - index);
+
 const ReportsPage = () => {
   const [dashboardData, setDashboardData] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [year, setYear] = useState(currentYear);
+  const [report, setReport] = useState(null);
+  const [reportLoading, setReportLoading] = useState(true);
 
   useEffect(() => {
     loadReportsData();
   }, []);
 
+  // El informe anual se genera en segundo plano en el servidor
+  useEffect(() => {
+    let cancelled = false;
+    setReportLoading(true);
+    reportService.generate({ year })
+      .then((result) => {
+        if (!cancelled) setReport(result);
+      })
+      .catch((err) => console.error('Error al generar el informe anual:', err))
+      .finally(() => {
+        if (!cancelled) setReportLoading(false);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [year]);
+
   const loadReportsData = async () => {
     try {
       setLoading(true);
@@ -88,14 +111,26 @@ const ReportsPage = () => {
   );
 }
 
-  const categories = dashboardData?.categories_spending || [];
+  const categories = report
+    ? report.categories.filter((cat) => cat.type === 'EXPENSE')
+    : dashboardData?.categories_spending || [];
   const summary = dashboardData?.summary || {};
+  const netBalance = report ? report.totals.balance : summary.total_balance || 0;
 
   return (
     <DashboardLayout>
       <Header title="Informes" subtitle="Analiza tus datos financieros" />
 
       <section className="dashboard-content">
+        {/* Selector de año del informe */}
+        <div style={{ marginBottom: 'var(--spacing-lg)' }}>
+          <select value={year} onChange={(e) => setYear(Number(e.target.value))}>
+            {YEARS.map((option) => (
+              <option key={option} value={option}>{option}</option>
+            ))}
+          </select>
+        </div>
+
         {/* Grid de reportes */}
         <div className="report-grid" style={{ 
           display: 'grid', 
@@ -118,17 +153,33 @@ const ReportsPage = () => {
               borderBottom: '1px solid #2c3444',
               paddingBottom: '10px'
             }}>
-              <h3 style={{ fontSize: '1.2rem', fontWeight: 600 }}>Flujo de efectivo en el tiempo</h3>
+              <h3 style={{ fontSize: '1.2rem', fontWeight: 600 }}>Comercios con más gasto</h3>
               <span style={{ color: 'var(--color-success)' }}>
-                {formatCurrency(summary.total_balance || 0)} Neto
+                {formatCurrency(netBalance)} Neto
               </span>
             </div>
-            <div style={{ 
-              textAlign: 'center', 
-              padding: '50px', 
-              color: '#9fa6ad' 
-            }}>
-              [Gráfico de flujo de efectivo]
+            <div className="summary-list" style={{ marginTop: '20px' }}>
+              {reportLoading && (
+                <p style={{ textAlign: 'center', color: '#9fa6ad', padding: '20px' }}>
+                  Generando informe...
+                </p>
+              )}
+              {!reportLoading && (report?.top_merchants || []).map((merchant, index) => (
+                <div key={index} className="summary-item" style={{
+                  display: 'flex',
+                  justifyContent: 'space-between',
+                  padding: '8px 0',
+                  borderBottom: '1px dashed #2c3444',
+                  fontSize: '0.95rem'
+                }}>
+                  <span style={{ color: 'var(--color-text-light)' }}>
+                    {merchant.description} ({merchant.count})
+                  </span>
+                  <span style={{ fontWeight: 500, color: 'var(--color-danger)' }}>
+                    -{formatCurrency(merchant.total)}
+                  </span>
+                </div>
+              ))}
             </div>
           </div>
 
@@ -205,15 +256,26 @@ const ReportsPage = () => {
               Tendencia mensual: ingresos vs gastos
             </h3>
             <span style={{ fontSize: '0.9rem', color: '#9fa6ad' }}>
-              Oct 2024 - Oct 2025
+              Ene {year} - Dic {year}
             </span>
           </div>
-          <div style={{ 
-            textAlign: 'center', 
-            padding: '50px', 
-            color: '#9fa6ad' 
-          }}>
-            [Gráfico de tendencia mensual]
+          <div className="summary-list">
+            {(report?.monthly || []).map((month) => (
+              <div key={month.month} className="summary-item" style={{
+                display: 'flex',
+                justifyContent: 'space-between',
+                padding: '8px 0',
+                borderBottom: '1px dashed #2c3444',
+                fontSize: '0.95rem'
+              }}>
+                <span style={{ color: 'var(--color-text-light)' }}>{month.month}</span>
+                <span>
+                  <span style={{ color: 'var(--color-success)' }}>+{formatCurrency(month.income)}</span>
+                  {' / '}
+                  <span style={{ color: 'var(--color-danger)' }}>-{formatCurrency(month.expense)}</span>
+                </span>
+              </div>
+            ))}
           </div>
         </div>
       </section>
@@ -1,5 +1,5 @@
 // Archivo: src/pages/TransactionsPage.jsx
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import DashboardLayout from '../components/Layout/DashboardLayout';
 import Header from '../components/Layout/Header';
 import TransactionTable from '../components/Transactions/TransactionTable';
@@ -10,82 +10,110 @@ import SkeletonTable from '../components/Common/SkeletonTable';
 import { transactionService, categoryService } from '../services/api';
 import { showConfirm, showSuccess, showError } from '../utils/notifications';
 
+// Convierte los filtros de la barra en parámetros del endpoint
+const toServerFilters = (filters) => {
+  const params = {};
+  if (filters.search) params.q = filters.search;
+  if (filters.type) params.type = filters.type;
+  if (filters.category_id) params.category_id = filters.category_id;
+  return params;
+};
+
 const TransactionsPage = () => {
-  const [transactions, setTransactions] = useState([]);
-  const [filteredTransactions, setFilteredTransactions] = useState([]);
   const [paginatedTransactions, setPaginatedTransactions] = useState([]);
   const [categories, setCategories] = useState([]);
   const [loading, setLoading] = useState(true);
   const [isModalOpen, setIsModalOpen] = useState(false);
   const [selectedTransaction, setSelectedTransaction] = useState(null);
   
-  // Estados de paginación
+  // Estados de paginación (keyset: cursores conocidos por página)
+  const [filters, setFilters] = useState({});
   const [currentPage, setCurrentPage] = useState(1);
   const [itemsPerPage, setItemsPerPage] = useState(10);
+  const [totalItems, setTotalItems] = useState(0);
+  const pageCursors = useRef([null]);
+
+  // Carga una página; si no conocemos su cursor avanzamos página a página
+  const loadPage = useCallback(async (page) => {
+    const params = { ...toServerFilters(filters), limit: itemsPerPage };
+
+    for (let known = pageCursors.current.length; known < page; known++) {
+      const previous = await transactionService.getPage({ ...params, cursor: pageCursors.current[known - 1] });
+      if (!previous.next_cursor) {
+        page = known;
+        break;
+      }
+      pageCursors.current[known] = previous.next_cursor;
+    }
+
+    const data = await transactionService.getPage({
+      ...params,
+      cursor: pageCursors.current[page - 1],
+      include_total: 1,
+    });
+    if (data.next_cursor) {
+      pageCursors.current[page] = data.next_cursor;
+    }
+    setPaginatedTransactions(data.transactions || []);
+    setTotalItems(data.total ?? 0);
+    setCurrentPage(page);
+  }, [filters, itemsPerPage]);
 
   useEffect(() => {
-    loadInitialData();
+    const loadCategories = async () => {
+      try {
+        const catData = await categoryService.getAll();
+        setCategories(catData || []);
+      } catch (err) {
+        console.error('Error al cargar categorías:', err);
+      }
+    };
+    loadCategories();
   }, []);
 
-  // Actualizar transacciones paginadas cuando cambien los filtros o la página
+  // Al cambiar filtros o tamaño de página se reinician los cursores
   useEffect(() => {
-    const startIndex = (currentPage - 1) * itemsPerPage;
-    const endIndex = startIndex + itemsPerPage;
-    setPaginatedTransactions(filteredTransactions.slice(startIndex, endIndex));
-  }, [filteredTransactions, currentPage, itemsPerPage]);
+    pageCursors.current = [null];
+    reloadPage(1);
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [filters, itemsPerPage]);
 
-  const loadInitialData = async () => {
+  const reloadPage = async (page) => {
     try {
-      setLoading(true);
-      
-      const [transData, catData] = await Promise.all([
-        transactionService.getAll(),
-        categoryService.getAll()
-      ]);
-      
-      setTransactions(transData.transactions || []);
-      setFilteredTransactions(transData.transactions || []);
-      setCategories(catData || []);
-      
-      setLoading(false);
+      await loadPage(page);
     } catch (err) {
       console.error('Error al cargar datos:', err);
       showError('Error al cargar los datos');
+    } finally {
       setLoading(false);
     }
   };
 
-  const handleFilterChange = useCallback((filters) => {
-    let filtered = [...transactions];
-
-    if (filters.search) {
-      const searchLower = filters.search.toLowerCase();
-      filtered = filtered.filter(t => 
-        (t.description && t.description.toLowerCase().includes(searchLower)) ||
-        t.amount.toString().includes(searchLower)
-      );
-    }
-
-    if (filters.type) {
-      filtered = filtered.filter(t => t.type === filters.type);
-    }
-
-    if (filters.category_id) {
-      filtered = filtered.filter(t => t.category_id === parseInt(filters.category_id));
-    }
+  const loadInitialData = () => {
+    pageCursors.current = [null];
+    reloadPage(1);
+  };
 
-    setFilteredTransactions(filtered);
-    setCurrentPage(1); // Resetear a la primera página cuando se filtran
-  }, [transactions]);
+  const handleFilterChange = useCallback((newFilters) => {
+    setFilters({ ...newFilters });
+  }, []);
 
   const handlePageChange = (page) => {
-    setCurrentPage(page);
+    reloadPage(page);
     window.scrollTo({ top: 0, behavior: 'smooth' });
   };
 
   const handleItemsPerPageChange = (newItemsPerPage) => {
     setItemsPerPage(newItemsPerPage);
-    setCurrentPage(1); // Resetear a la primera página
+  };
+
+  const handleExport = async (format) => {
+    try {
+      await transactionService.exportFile(format, toServerFilters(filters));
+    } catch (err) {
+      console.error('Error al exportar transacciones:', err);
+      showError('Error al exportar las transacciones');
+    }
   };
 
   const handleQuickAdd = () => {
@@ -123,7 +151,7 @@ const TransactionsPage = () => {
     loadInitialData();
   };
 
-  const totalPages = Math.ceil(filteredTransactions.length / itemsPerPage);
+  const totalPages = Math.ceil(totalItems / itemsPerPage);
 
   if (loading) {
     return (
@@ -157,9 +185,15 @@ const TransactionsPage = () => {
         <TransactionFilters 
           categories={categories}
           onFilterChange={handleFilterChange}
-          resultsCount={filteredTransactions.length}
+          resultsCount={totalItems}
         />
 
+        {/* Exportación del historial filtrado */}
+        <div style={{ display: 'flex', gap: '10px', justifyContent: 'flex-end', marginBottom: 'var(--spacing-md)' }}>
+          <button className="btn btn-text" onClick={() => handleExport('csv')}>Exportar CSV</button>
+          <button className="btn btn-text" onClick={() => handleExport('xlsx')}>Exportar Excel</button>
+        </div>
+
         {/* Tabla de transacciones (solo las de la página actual) */}
         <TransactionTable 
           transactions={paginatedTransactions}
@@ -171,7 +205,7 @@ const TransactionsPage = () => {
         <Pagination 
           currentPage={currentPage}
           totalPages={totalPages}
-          totalItems={filteredTransactions.length}
+          totalItems={totalItems}
           itemsPerPage={itemsPerPage}
           onPageChange={handlePageChange}
           onItemsPerPageChange={handleItemsPerPageChange}
@@ -14,6 +14,12 @@ const api = axios.create({
   },
 });
 
+// Tras una escritura el backend devuelve X-Read-Primary-Until y se reenvía en
+// las peticiones siguientes para que las lecturas vean el cambio (no van a una
+// réplica); el backend comprueba si sigue vigente con su propio reloj
+const READ_PRIMARY_HEADER = 'X-Read-Primary-Until';
+let readPrimaryUntil = null;
+
 // Interceptor para agregar el token JWT automáticamente
 api.interceptors.request.use(
   (config) => {
@@ -21,6 +27,9 @@ api.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    if (readPrimaryUntil) {
+      config.headers[READ_PRIMARY_HEADER] = readPrimaryUntil;
+    }
     return config;
   },
   (error) => {
@@ -30,7 +39,13 @@ api.interceptors.request.use(
 
 // Interceptor para manejar errores de respuesta
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const until = Number(response.headers[READ_PRIMARY_HEADER.toLowerCase()]);
+    if (until) {
+      readPrimaryUntil = until;
+    }
+    return response;
+  },
   (error) => {
     if (error.response?.status === 401) {
       // Token expirado o inválido
@@ -76,6 +91,28 @@ export const categoryService = {
     const response = await api.get('/categories');
     return response.data;
   },
+
+  create: async (categoryData) => {
+    const response = await api.post('/categories', categoryData);
+    return response.data;
+  },
+
+  rename: async (id, name) => {
+    const response = await api.put(`/categories/${id}`, { name });
+    return response.data;
+  },
+
+  // Mueve las transacciones de la categoría a targetId y la elimina
+  merge: async (id, targetId) => {
+    const response = await api.post(`/categories/${id}/merge`, { target_id: targetId });
+    return response.data;
+  },
+
+  delete: async (id, reassignTo = null) => {
+    const params = reassignTo ? `?reassign_to=${reassignTo}` : '';
+    const response = await api.delete(`/categories/${id}${params}`);
+    return response.data;
+  },
 };
 
 // --- SERVICIOS DE DASHBOARD ---
@@ -87,6 +124,36 @@ export const dashboardService = {
   },
 };
 
+// --- SERVICIOS DE INFORMES (EN SEGUNDO PLANO) ---
+
+const REPORT_POLL_INTERVAL = 1000;
+
+export const reportService = {
+  // Encola un informe: { year } o { start_date, end_date }
+  create: async (params) => {
+    const response = await api.post('/reports', params);
+    return response.data;
+  },
+
+  get: async (id) => {
+    const response = await api.get(`/reports/${id}`);
+    return response.data;
+  },
+
+  // Crea el informe y consulta su estado hasta que termina
+  generate: async (params) => {
+    let job = await reportService.create(params);
+    while (job.status === 'PENDING' || job.status === 'RUNNING') {
+      await new Promise((resolve) => setTimeout(resolve, REPORT_POLL_INTERVAL));
+      job = await reportService.get(job.id);
+    }
+    if (job.status !== 'DONE') {
+      throw new Error(job.error || 'No se pudo generar el informe');
+    }
+    return job.result;
+  },
+};
+
 // --- SERVICIOS DE TRANSACCIONES ---
 
 export const transactionService = {
@@ -96,11 +163,52 @@ export const transactionService = {
     return response.data;
   },
 
+  // Paginación por cursor: devuelve { transactions, next_cursor }
+  getPage: async ({ limit = 50, cursor = null, ...filters } = {}) => {
+    const params = new URLSearchParams({ ...filters, limit });
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const response = await api.get(`/transactions?${params.toString()}`);
+    return response.data;
+  },
+
   create: async (transactionData) => {
     const response = await api.post('/transactions', transactionData);
     return response.data;
   },
 
+  // Importación masiva: lista de transacciones en una sola petición
+  bulkCreate: async (transactions) => {
+    const response = await api.post('/transactions/bulk', { transactions });
+    return response.data;
+  },
+
+  // Importación de un archivo CSV u OFX
+  importFile: async (file, options = {}) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    Object.entries(options).forEach(([key, value]) => formData.append(key, value));
+    const response = await api.post('/transactions/import', formData, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data;
+  },
+
+  // Descarga del historial filtrado: format = 'csv' | 'xlsx' | 'parquet'
+  exportFile: async (format = 'csv', filters = {}) => {
+    const params = new URLSearchParams({ ...filters, format });
+    const response = await api.get(`/transactions/export?${params.toString()}`, {
+      responseType: 'blob',
+    });
+    const url = window.URL.createObjectURL(response.data);
+    const link = document.createElement('a');
+    link.href = url;
+    link.download = `transacciones.${format}`;
+    link.click();
+    window.URL.revokeObjectURL(url);
+  },
+
   update: async (id, transactionData) => {
     const response = await api.put(`/transactions/${id}`, transactionData);
     return response.data;
@@ -110,6 +218,47 @@ export const transactionService = {
     const response = await api.delete(`/transactions/${id}`);
     return response.data;
   },
+
+  // Operaciones por lotes: selection = { ids: [...] } o { filter: {...} }
+  batchUpdate: async (selection, changes) => {
+    const response = await api.patch('/transactions', { ...selection, changes });
+    return response.data;
+  },
+
+  batchDelete: async (selection) => {
+    const response = await api.delete('/transactions', { data: selection });
+    return response.data;
+  },
+};
+
+// --- SINCRONIZACIÓN DELTA ---
+
+// Aplica una respuesta de /sync a una copia local { version, transactions, categories }
+// (objetos indexados por id). Con `full` la copia se sustituye por completo.
+const applySyncChanges = (state, changes) => {
+  const transactions = changes.full ? {} : { ...state.transactions };
+  const categories = changes.full ? {} : { ...state.categories };
+
+  changes.transactions.forEach((transaction) => { transactions[transaction.id] = transaction; });
+  changes.categories.forEach((category) => { categories[category.id] = category; });
+  changes.deleted.transactions.forEach((id) => { delete transactions[id]; });
+  changes.deleted.categories.forEach((id) => { delete categories[id]; });
+
+  return { version: changes.version, transactions, categories };
+};
+
+export const syncService = {
+  getChanges: async (since = 0) => {
+    const response = await api.get(`/sync?since=${since}`);
+    return response.data;
+  },
+
+  // Trae solo lo que cambió desde state.version (estado completo si no hay copia)
+  pull: async (state = null) => {
+    const current = state || { version: 0, transactions: {}, categories: {} };
+    const changes = await syncService.getChanges(current.version);
+    return applySyncChanges(current, changes);
+  },
 };
 
 export default api;
@@ -24,4 +24,5 @@ if __name__ == '__main__':
     print(f"🌐 Servidor escuchando en puerto: {port}")
     
     # Importante: host='0.0.0.0' es necesario para que Railway vea tu app
+    # Servidor de desarrollo. En producción: gunicorn -c gunicorn.conf.py wsgi:app
     app.run(host='0.0.0.0', port=port, debug=debug_mode)